@@ -1,47 +1,96 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional, TypeVar
 from datetime import datetime, timedelta
+from pydantic import TypeAdapter, ValidationError
+import inspect
 from app.models.base import get_db
 from app.models.sale import Sale, SaleLineItem
 from app.models.product import Product
 from app.models.inventory import Inventory
 from app.models.customer import Customer
+from app.models.analytics import DailySalesRollup, CustomerSegment
 from app.models.user import User, UserRole
-from app.middleware.auth import get_current_user, require_role
+from app.models.shards import fan_out, is_sharded
+from app.middleware.auth import get_current_user, get_user_db, require_role
+from app.middleware.rate_limit import rate_limit
+from app.services.inventory import LOW_STOCK
+from app.services.analytics import closed_days_start
+from app.services.loyalty import pending_deltas
+from app.services.segmentation import SEGMENTS
+from app.services.partitions import SALE_LINE_ITEM_JOIN, bound_sale_dates
+from app.services import snapshots
+from app.services.single_flight import single_flight
+from app.schemas.analytics import AnalyticsJobCreate, AnalyticsJob
+from app.config import settings
 
 router = APIRouter()
 
+T = TypeVar("T")
 
-@router.get("/sales-summary")
+
+def report_store(current_user: User) -> Optional[int]:
+    """Store a report is limited to: the user's own, or None (all stores) for admins"""
+    if current_user.role != UserRole.ADMIN and current_user.store_id:
+        return current_user.store_id
+    return None
+
+
+def report_scope(kwargs: Dict[str, Any]) -> Optional[int]:
+    """single_flight scope of store reports: requests for the same store share a result"""
+    return report_store(kwargs["current_user"])
+
+
+def per_shard(db: Session, store_id: Optional[int], fn: Callable[[Session], T]) -> List[T]:
+    """fn(session) on the request's database, or on every shard concurrently for all-store reports"""
+    if store_id is None and is_sharded():
+        return fan_out(fn)
+    return [fn(db)]
+
+
+@router.get("/sales-summary", dependencies=[Depends(rate_limit("analytics", coalesced=True))])
+@single_flight(scope=report_scope)
 def get_sales_summary(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_user_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get sales summary statistics"""
-    query = db.query(Sale)
-    
     # Default to last 30 days if no dates provided
     if not start_date:
         start_date = datetime.utcnow() - timedelta(days=30)
     if not end_date:
         end_date = datetime.utcnow()
     
-    query = query.filter(Sale.date >= start_date, Sale.date <= end_date)
+    store_id = report_store(current_user)
     
-    # Filter by store if not admin
-    if current_user.role != UserRole.ADMIN and current_user.store_id:
-        query = query.filter(Sale.store_id == current_user.store_id)
+    parts = []
+    live_from = start_date
+    cold_until = snapshots.cold_end(start_date, end_date)
+    if cold_until:
+        # History older than the hot window comes from the Parquet snapshots
+        parts.append(snapshots.sales_totals(start_date, cold_until, store_id))
+        live_from = cold_until
+    
+    def live_totals(session: Session):
+        query = session.query(
+            func.coalesce(func.sum(Sale.final_amount), 0),
+            func.count(Sale.sale_id),
+            func.coalesce(func.sum(Sale.discount_amount), 0)
+        ).filter(Sale.date >= live_from, Sale.date <= end_date)
+        if store_id:
+            query = query.filter(Sale.store_id == store_id)
+        return query.one()
     
-    sales = query.all()
+    if live_from <= end_date:
+        parts += per_shard(db, store_id, live_totals)
     
-    total_sales = sum(sale.final_amount for sale in sales)
-    total_transactions = len(sales)
+    total_sales = sum(part[0] for part in parts)
+    total_transactions = sum(part[1] for part in parts)
+    total_discount = sum(part[2] for part in parts)
     avg_transaction_value = total_sales / total_transactions if total_transactions > 0 else 0
-    total_discount = sum(sale.discount_amount for sale in sales)
     
     return {
         "total_sales": round(total_sales, 2),
@@ -55,15 +104,21 @@ def get_sales_summary(
     }
 
 
-@router.get("/top-products")
+@router.get("/top-products", dependencies=[Depends(rate_limit("analytics", coalesced=True))])
+@single_flight(scope=report_scope)
 def get_top_products(
     limit: int = 10,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_user_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get top selling products"""
+    store_id = report_store(current_user)
+    cold_until = snapshots.cold_end(start_date, end_date)
+    if cold_until or (store_id is None and is_sharded()):
+        return _merged_top_products(db, limit, start_date, end_date, cold_until, store_id)
+    
     query = db.query(
         Product.product_id,
         Product.name,
@@ -71,15 +126,11 @@ def get_top_products(
         func.sum(SaleLineItem.quantity).label("total_quantity"),
         func.sum(SaleLineItem.total).label("total_revenue")
     ).join(SaleLineItem, Product.product_id == SaleLineItem.product_id
-    ).join(Sale, SaleLineItem.sale_id == Sale.sale_id)
-    
-    if start_date:
-        query = query.filter(Sale.date >= start_date)
-    if end_date:
-        query = query.filter(Sale.date <= end_date)
+    ).join(Sale, SALE_LINE_ITEM_JOIN)
+    query = bound_sale_dates(query, start_date, end_date, line_items=True)
     
-    if current_user.role != UserRole.ADMIN and current_user.store_id:
-        query = query.filter(Sale.store_id == current_user.store_id)
+    if store_id:
+        query = query.filter(Sale.store_id == store_id)
     
     top_products = query.group_by(
         Product.product_id, Product.name, Product.sku
@@ -97,29 +148,84 @@ def get_top_products(
     ]
 
 
-@router.get("/inventory-metrics")
+def _merged_top_products(db: Session, limit: int, start_date: Optional[datetime], end_date: Optional[datetime],
+                         cold_until: Optional[datetime], store_id: Optional[int]) -> List[Dict[str, Any]]:
+    """
+    Top products over per-product totals merged from the snapshots (before
+    `cold_until`) and from every shard queried (after it)
+    """
+    totals: Dict[int, tuple] = {}
+    parts = []
+    live_from = start_date
+    if cold_until:
+        parts.append(snapshots.product_totals(start_date, cold_until, store_id))
+        live_from = cold_until
+    
+    def live_totals(session: Session) -> Dict[int, tuple]:
+        query = session.query(
+            SaleLineItem.product_id,
+            func.sum(SaleLineItem.quantity),
+            func.sum(SaleLineItem.total)
+        ).join(Sale, SALE_LINE_ITEM_JOIN)
+        query = bound_sale_dates(query, live_from, end_date, line_items=True)
+        if store_id:
+            query = query.filter(Sale.store_id == store_id)
+        return {product_id: (quantity, revenue) for product_id, quantity, revenue in query.group_by(
+            SaleLineItem.product_id
+        )}
+    
+    if end_date is None or live_from is None or live_from <= end_date:
+        parts += per_shard(db, store_id, live_totals)
+    for part in parts:
+        for product_id, (quantity, revenue) in part.items():
+            known_quantity, known_revenue = totals.get(product_id, (0.0, 0.0))
+            totals[product_id] = (known_quantity + quantity, known_revenue + revenue)
+    
+    top = sorted(totals.items(), key=lambda item: item[1][0], reverse=True)[:limit]
+    products = {
+        p.product_id: p
+        for p in db.query(Product.product_id, Product.name, Product.sku).filter(
+            Product.product_id.in_([product_id for product_id, _ in top])
+        )
+    }
+    return [
+        {
+            "product_id": product_id,
+            "product_name": products[product_id].name if product_id in products else None,
+            "sku": products[product_id].sku if product_id in products else None,
+            "total_quantity_sold": float(quantity),
+            "total_revenue": round(float(revenue), 2)
+        }
+        for product_id, (quantity, revenue) in top
+    ]
+
+
+@router.get("/inventory-metrics", dependencies=[Depends(rate_limit("analytics", coalesced=True))])
+@single_flight(scope=report_scope)
 def get_inventory_metrics(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_user_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get inventory metrics"""
-    query = db.query(Inventory).join(Product, Inventory.product_id == Product.product_id)
-    
-    if current_user.role != UserRole.ADMIN and current_user.store_id:
-        query = query.filter(Inventory.store_id == current_user.store_id)
-    
-    inventory_items = query.all()
+    store_id = report_store(current_user)
     
-    total_items = len(inventory_items)
-    low_stock_count = sum(1 for item in inventory_items if item.quantity <= item.reorder_level)
-    out_of_stock_count = sum(1 for item in inventory_items if item.quantity == 0)
+    def shard_metrics(session: Session):
+        totals = session.query(
+            func.count(Inventory.inventory_id),
+            func.coalesce(func.sum(Inventory.quantity * Product.cost), 0)
+        ).join(Product, Inventory.product_id == Product.product_id)
+        # Counted from the low-stock partial index; out-of-stock rows are a subset
+        low_stock = session.query(
+            func.count(Inventory.inventory_id),
+            func.count(Inventory.inventory_id).filter(Inventory.quantity == 0)
+        ).filter(LOW_STOCK)
+        if store_id:
+            totals = totals.filter(Inventory.store_id == store_id)
+            low_stock = low_stock.filter(Inventory.store_id == store_id)
+        return (*totals.one(), *low_stock.one())
     
-    # Calculate total inventory value
-    total_value = 0
-    for item in inventory_items:
-        product = db.query(Product).filter(Product.product_id == item.product_id).first()
-        if product:
-            total_value += item.quantity * product.cost
+    parts = per_shard(db, store_id, shard_metrics)
+    total_items, total_value, low_stock_count, out_of_stock_count = (sum(values) for values in zip(*parts))
     
     return {
         "total_items": total_items,
@@ -129,54 +235,226 @@ def get_inventory_metrics(
     }
 
 
-@router.get("/daily-sales")
+@router.get("/daily-sales", dependencies=[Depends(rate_limit("analytics", coalesced=True))])
+@single_flight(scope=report_scope)
 def get_daily_sales(
     days: int = 30,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_user_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get daily sales for the last N days"""
     start_date = datetime.utcnow() - timedelta(days=days)
+    store_id = report_store(current_user)
     
-    query = db.query(
-        func.date(Sale.date).label("sale_date"),
-        func.sum(Sale.final_amount).label("total_sales"),
-        func.count(Sale.sale_id).label("transaction_count")
-    ).filter(Sale.date >= start_date)
+    totals: Dict[str, list] = {}
+    cold_until = snapshots.cold_end(start_date, None)
+    if cold_until:
+        # Days older than the hot window come from the Parquet snapshots
+        totals.update(snapshots.daily_sales(start_date, cold_until, store_id))
+        start_date = cold_until
     
-    if current_user.role != UserRole.ADMIN and current_user.store_id:
-        query = query.filter(Sale.store_id == current_user.store_id)
+    def shard_daily_sales(session: Session) -> Dict[str, list]:
+        shard_totals: Dict[str, list] = {}
+        live_from = start_date
+        if settings.ANALYTICS_USE_ROLLUPS:
+            # Closed days come from the worker-built rollups; only the open ones are aggregated live
+            live_from = max(start_date, datetime.combine(closed_days_start(), datetime.min.time()))
+            rollups = session.query(
+                DailySalesRollup.sale_date,
+                func.sum(DailySalesRollup.total_sales),
+                func.sum(DailySalesRollup.transaction_count)
+            ).filter(
+                DailySalesRollup.sale_date >= start_date.date(),
+                DailySalesRollup.sale_date < live_from.date()
+            )
+            if store_id:
+                rollups = rollups.filter(DailySalesRollup.store_id == store_id)
+            for sale_date, total_sales, transaction_count in rollups.group_by(DailySalesRollup.sale_date):
+                shard_totals[str(sale_date)] = [total_sales, transaction_count]
+        
+        query = session.query(
+            func.date(Sale.date).label("sale_date"),
+            func.sum(Sale.final_amount).label("total_sales"),
+            func.count(Sale.sale_id).label("transaction_count")
+        ).filter(Sale.date >= live_from)
+        
+        if store_id:
+            query = query.filter(Sale.store_id == store_id)
+        
+        for day in query.group_by(func.date(Sale.date)).all():
+            shard_totals[str(day.sale_date)] = [day.total_sales, day.transaction_count]
+        return shard_totals
     
-    daily_sales = query.group_by(func.date(Sale.date)).order_by("sale_date").all()
+    for shard_totals in per_shard(db, store_id, shard_daily_sales):
+        for sale_date, (total_sales, transaction_count) in shard_totals.items():
+            known_sales, known_count = totals.get(sale_date, (0, 0))
+            totals[sale_date] = [known_sales + total_sales, known_count + transaction_count]
     
     return [
         {
-            "date": str(day.sale_date),
-            "total_sales": round(float(day.total_sales), 2),
-            "transaction_count": day.transaction_count
+            "date": sale_date,
+            "total_sales": round(float(total_sales), 2),
+            "transaction_count": transaction_count
         }
-        for day in daily_sales
+        for sale_date, (total_sales, transaction_count) in sorted(totals.items())
     ]
 
 
-@router.get("/customer-insights")
+@router.get("/customer-insights", dependencies=[Depends(rate_limit("analytics", coalesced=True))])
+@single_flight()
 def get_customer_insights(
+    segment: Optional[str] = None,
     limit: int = 10,
+    offset: int = 0,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role([UserRole.ADMIN, UserRole.MANAGER]))
 ):
-    """Get top customers by spending"""
-    top_customers = db.query(Customer).order_by(
-        desc(Customer.total_spent)
-    ).limit(limit).all()
+    """
+    Get top customers by spending, optionally within one RFM segment
+
+    Segments come from the batch segmentation job (see /customer-segments);
+    within a segment customers are ordered by spend over the scoring window.
+    Totals include loyalty accruals not folded yet, but the order without a
+    segment is by folded spend.
+    """
+    if segment is not None and segment not in SEGMENTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown segment '{segment}'. Expected one of: {', '.join(SEGMENTS)}"
+        )
     
+    query = db.query(
+        Customer.customer_id, Customer.name, Customer.phone, Customer.total_spent, Customer.loyalty_points,
+        CustomerSegment.segment, CustomerSegment.recency_days, CustomerSegment.frequency,
+        CustomerSegment.monetary, CustomerSegment.r_score, CustomerSegment.f_score, CustomerSegment.m_score
+    )
+    if segment:
+        query = query.join(CustomerSegment, CustomerSegment.customer_id == Customer.customer_id).filter(
+            CustomerSegment.segment == segment
+        ).order_by(desc(CustomerSegment.monetary), desc(CustomerSegment.customer_id))
+    else:
+        query = query.outerjoin(CustomerSegment, CustomerSegment.customer_id == Customer.customer_id).order_by(
+            desc(Customer.total_spent)
+        )
+    
+    customers = query.offset(offset).limit(limit).all()
+    pending = pending_deltas(db, (c.customer_id for c in customers))
     return [
         {
             "customer_id": c.customer_id,
             "name": c.name,
             "phone": c.phone,
-            "total_spent": round(c.total_spent, 2),
-            "loyalty_points": c.loyalty_points
+            "total_spent": round((c.total_spent or 0) + pending.get(c.customer_id, (0, 0))[0], 2),
+            "loyalty_points": (c.loyalty_points or 0) + pending.get(c.customer_id, (0, 0))[1],
+            "segment": c.segment,
+            "recency_days": c.recency_days,
+            "frequency": c.frequency,
+            "monetary": c.monetary,
+            "rfm_score": f"{c.r_score}{c.f_score}{c.m_score}" if c.segment else None
         }
-        for c in top_customers
+        for c in customers
     ]
+
+
+@router.get("/customer-segments", dependencies=[Depends(rate_limit("analytics", coalesced=True))])
+@single_flight()
+def get_customer_segments(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role([UserRole.ADMIN, UserRole.MANAGER]))
+):
+    """Get customer counts and average RFM measures per segment"""
+    rows = db.query(
+        CustomerSegment.segment,
+        func.count(CustomerSegment.customer_id).label("customers"),
+        func.avg(CustomerSegment.recency_days).label("avg_recency_days"),
+        func.avg(CustomerSegment.frequency).label("avg_frequency"),
+        func.avg(CustomerSegment.monetary).label("avg_monetary"),
+        func.sum(CustomerSegment.monetary).label("total_monetary"),
+        func.max(CustomerSegment.computed_at).label("computed_at")
+    ).group_by(CustomerSegment.segment).all()
+    by_segment = {row.segment: row for row in rows}
+    
+    summary = []
+    for name in SEGMENTS:
+        row = by_segment.get(name)
+        summary.append({
+            "segment": name,
+            "customers": row.customers if row else 0,
+            "avg_recency_days": round(float(row.avg_recency_days), 1) if row else None,
+            "avg_frequency": round(float(row.avg_frequency), 2) if row else None,
+            "avg_monetary": round(float(row.avg_monetary), 2) if row else None,
+            "total_monetary": round(float(row.total_monetary), 2) if row else 0,
+            "computed_at": row.computed_at if row else None
+        })
+    return summary
+
+
+# Reports that can run in the background: name -> (handler, roles allowed or None for any user)
+REPORTS = {
+    "sales-summary": (get_sales_summary, None),
+    "top-products": (get_top_products, None),
+    "inventory-metrics": (get_inventory_metrics, None),
+    "daily-sales": (get_daily_sales, None),
+    "customer-insights": (get_customer_insights, [UserRole.ADMIN, UserRole.MANAGER]),
+    "customer-segments": (get_customer_segments, [UserRole.ADMIN, UserRole.MANAGER]),
+}
+
+
+def report_arguments(handler, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate report parameters against the handler's query parameters"""
+    signature = inspect.signature(handler)
+    allowed = {name: p for name, p in signature.parameters.items() if name not in ("db", "current_user")}
+    unknown = set(params) - set(allowed)
+    if unknown:
+        raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+    return {
+        name: TypeAdapter(allowed[name].annotation).validate_python(value)
+        for name, value in params.items()
+    }
+
+
+@router.post(
+    "/jobs", response_model=AnalyticsJob, status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(rate_limit("export"))]
+)
+def create_analytics_job(
+    job: AnalyticsJobCreate,
+    current_user: User = Depends(get_current_user)
+):
+    """Start a report in the background worker; poll GET /jobs/{job_id} for the result"""
+    if job.report not in REPORTS:
+        raise HTTPException(status_code=404, detail=f"Unknown report '{job.report}'")
+    handler, roles = REPORTS[job.report]
+    if roles and current_user.role not in roles:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions")
+    try:
+        report_arguments(handler, job.params)
+    except (ValueError, ValidationError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    # Celery is imported on first use to keep it out of worker startup
+    from app.tasks.jobs import generate_report
+    result = generate_report.delay(job.report, job.params, current_user.user_id)
+    return AnalyticsJob(job_id=result.id, status=result.status, report=job.report)
+
+
+@router.get("/jobs/{job_id}", response_model=AnalyticsJob)
+def get_analytics_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Get the status of a background report, with its result once finished"""
+    from app.tasks import celery_app
+    
+    result = celery_app.AsyncResult(job_id)
+    args = result.args or []
+    # Jobs are visible to the user who started them (and admins)
+    if args and args[2] != current_user.user_id and current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    job = AnalyticsJob(job_id=job_id, status=result.status, report=args[0] if args else None)
+    if result.successful():
+        job.result = result.result
+    elif result.failed():
+        job.error = str(result.result)
+    return job
@@ -64,8 +64,9 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
     db.commit()
     
     # Create tokens
-    access_token = create_access_token(data={"sub": user.user_id, "username": user.username})
-    refresh_token = create_refresh_token(data={"sub": user.user_id})
+    # JWT "sub" must be a string; get_current_user converts it back
+    access_token = create_access_token(data={"sub": str(user.user_id), "username": user.username})
+    refresh_token = create_refresh_token(data={"sub": str(user.user_id)})
     
     return {
         "access_token": access_token,
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import List
 from app.models.base import get_db
@@ -6,6 +6,8 @@ from app.models.customer import Customer
 from app.models.user import User
 from app.schemas.customer import CustomerCreate, CustomerUpdate, CustomerResponse
 from app.middleware.auth import get_current_user
+from app.services.loyalty import with_pending
+from app.services.customer_search import search_by_phone_prefix
 
 router = APIRouter()
 
@@ -19,7 +21,20 @@ def get_customers(
 ):
     """Get all customers"""
     customers = db.query(Customer).offset(skip).limit(limit).all()
-    return customers
+    return with_pending(db, customers)
+
+
+@router.get("/search", response_model=List[CustomerResponse])
+def search_customers(
+    phone_prefix: str = Query(..., min_length=3, max_length=20),
+    limit: int = Query(10, ge=1, le=50),
+    rank: str = Query("recent", pattern="^(recent|spend)$"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Search customers by phone prefix, most recent (or highest spending) first"""
+    customers = search_by_phone_prefix(db, phone_prefix, limit, rank)
+    return with_pending(db, customers)
 
 
 @router.get("/{customer_id}", response_model=CustomerResponse)
@@ -35,7 +50,7 @@ def get_customer(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Customer not found"
         )
-    return customer
+    return with_pending(db, [customer])[0]
 
 
 @router.post("", response_model=CustomerResponse, status_code=status.HTTP_201_CREATED)
@@ -82,7 +97,7 @@ def update_customer(
     db.commit()
     db.refresh(db_customer)
     
-    return db_customer
+    return with_pending(db, [db_customer])[0]
 
 
 @router.get("/phone/{phone}", response_model=CustomerResponse)
@@ -98,4 +113,4 @@ def get_customer_by_phone(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Customer not found"
         )
-    return customer
+    return with_pending(db, [customer])[0]
@@ -1,140 +1,264 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Dict, List, Optional
 from datetime import date, timedelta
+import asyncio
+import hashlib
+import json
 from app.models.base import get_db
-from app.models.inventory import Inventory
+from app.models.inventory import Inventory, InventoryLot
+from app.models.forecast import ReorderSuggestion
 from app.models.product import Product
+from app.models.store import Store
+from app.models.transaction import StockTransfer, Transaction, TransactionType
 from app.models.user import User, UserRole
-from app.schemas.inventory import InventoryResponse, InventoryAdjustment, InventoryWithProduct
-from app.middleware.auth import get_current_user, require_role
+from app.schemas.inventory import (
+    InventoryResponse, InventoryAdjustment, InventoryWithProduct, InventoryLotWithProduct, ReorderSuggestionResponse,
+    StockTransferCreate, StockTransferResponse
+)
+from app.middleware.auth import get_current_user, get_store_db, get_stream_user, require_role
+from app.models.shards import same_shard, store_session
+from app.config import settings
+from app.services.catalog import current_catalog_version
+from app.services.inventory import (
+    bump_inventory_version, get_inventory_version, LOW_STOCK, receive_lot, consume_lots, move_lots,
+    apply_stock_changes
+)
+from app.services.stock_events import broker as stock_events, stock_change
+from app.utils.serialization import rows_to_json
 
 router = APIRouter()
 
 
+# Columns matching InventoryWithProduct, selected directly so list endpoints
+# can encode rows to JSON without building ORM objects or Pydantic models
+INVENTORY_WITH_PRODUCT_COLUMNS = (
+    Inventory.inventory_id,
+    Inventory.product_id,
+    Inventory.store_id,
+    Inventory.quantity,
+    Inventory.reorder_level,
+    Inventory.expiry_date,
+    Inventory.last_updated,
+    Product.name.label("product_name"),
+    Product.sku.label("product_sku"),
+    Product.price.label("product_price"),
+)
+INVENTORY_FIELDS = {column.key: column for column in INVENTORY_WITH_PRODUCT_COLUMNS}
+
+
+def inventory_with_product_query(db: Session, columns=INVENTORY_WITH_PRODUCT_COLUMNS):
+    """Base query for inventory rows joined with their product"""
+    return db.query(*columns).join(
+        Product, Inventory.product_id == Product.product_id
+    )
+
+
+def inventory_etag(request: Request, store_id: Optional[int], version: int, catalog_version: int) -> str:
+    """
+    ETag for an inventory listing: the store's version, the catalog version
+    (rows carry product names, SKUs and prices) and the query parameters
+    """
+    params = hashlib.sha1(str(sorted(request.query_params.multi_items())).encode()).hexdigest()[:12]
+    return f'"inv-{store_id or "all"}-{version}-{catalog_version}-{params}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
 @router.get("", response_model=List[InventoryWithProduct])
 def get_inventory(
+    request: Request,
     store_id: int = None,
-    db: Session = Depends(get_db),
+    limit: int = Query(1000, ge=1, le=5000),
+    cursor: Optional[int] = Query(None, description="X-Next-Cursor value from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma separated columns to return"),
+    category: Optional[str] = None,
+    low_stock: bool = False,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_store_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get inventory for a store"""
-    query = db.query(
-        Inventory,
-        Product.name.label("product_name"),
-        Product.sku.label("product_sku"),
-        Product.price.label("product_price")
-    ).join(Product, Inventory.product_id == Product.product_id)
+    """
+    Get inventory for a store, one page at a time
+
+    Rows are ordered by inventory_id; while more rows remain the response
+    carries an X-Next-Cursor header to pass back as `cursor`. Responses are
+    tagged with the store's inventory version and the catalog version, so a
+    request whose If-None-Match still matches gets 304 without running the
+    listing query.
+    """
+    scope_store_id = store_id or current_user.store_id
     
-    if store_id:
-        query = query.filter(Inventory.store_id == store_id)
-    elif current_user.store_id:
-        query = query.filter(Inventory.store_id == current_user.store_id)
+    columns = INVENTORY_WITH_PRODUCT_COLUMNS
+    if fields:
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = requested - INVENTORY_FIELDS.keys()
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+            )
+        requested.add("inventory_id")  # needed for the cursor
+        columns = tuple(column for column in INVENTORY_WITH_PRODUCT_COLUMNS if column.key in requested)
     
-    results = query.all()
-    
-    inventory_list = []
-    for inv, prod_name, prod_sku, prod_price in results:
-        item = InventoryWithProduct(
-            inventory_id=inv.inventory_id,
-            product_id=inv.product_id,
-            store_id=inv.store_id,
-            quantity=inv.quantity,
-            reorder_level=inv.reorder_level,
-            expiry_date=inv.expiry_date,
-            last_updated=inv.last_updated,
-            product_name=prod_name,
-            product_sku=prod_sku,
-            product_price=prod_price
-        )
-        inventory_list.append(item)
+    etag = inventory_etag(
+        request, scope_store_id, get_inventory_version(db, scope_store_id), current_catalog_version(db)
+    )
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    query = inventory_with_product_query(db, columns)
+    
+    if scope_store_id:
+        query = query.filter(Inventory.store_id == scope_store_id)
+    if category:
+        query = query.filter(Product.category == category)
+    if low_stock:
+        query = query.filter(LOW_STOCK)
+    if cursor is not None:
+        query = query.filter(Inventory.inventory_id > cursor)
+    
+    rows = query.order_by(Inventory.inventory_id).limit(limit).all()
+    if len(rows) == limit:
+        headers["X-Next-Cursor"] = str(rows[-1].inventory_id)
     
-    return inventory_list
+    return rows_to_json(rows, headers=headers)
+
+
+@router.get("/stream")
+async def stream_stock_changes(
+    request: Request,
+    store_id: Optional[int] = None,
+    current_user: User = Depends(get_stream_user)
+):
+    """
+    Server-sent stream of stock changes for a store.
+
+    Each `stock` event carries a batch of changed rows
+    (product_id, quantity, reorder_level, low_stock, crossed), so screens can
+    patch their state instead of polling the list endpoints.
+    """
+    store_id = store_id or current_user.store_id
+    if not store_id:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="store_id is required")
+    
+    async def frames():
+        yield "retry: 3000\n\n"
+        batches = stock_events.subscribe(store_id).__aiter__()
+        pending = asyncio.ensure_future(batches.__anext__())
+        try:
+            while not await request.is_disconnected():
+                done, _ = await asyncio.wait({pending}, timeout=settings.STOCK_EVENTS_KEEPALIVE_SECONDS)
+                if not done:
+                    yield ": keepalive\n\n"
+                    continue
+                changes = pending.result()
+                pending = asyncio.ensure_future(batches.__anext__())
+                yield f"event: stock\ndata: {json.dumps({'store_id': store_id, 'changes': changes})}\n\n"
+        finally:
+            pending.cancel()
+            await batches.aclose()
+    
+    return StreamingResponse(frames(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
 
 
 @router.get("/low-stock", response_model=List[InventoryWithProduct])
 def get_low_stock_items(
     store_id: int = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_store_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get items with stock below reorder level"""
-    query = db.query(
-        Inventory,
-        Product.name.label("product_name"),
-        Product.sku.label("product_sku"),
-        Product.price.label("product_price")
-    ).join(Product, Inventory.product_id == Product.product_id).filter(
-        Inventory.quantity <= Inventory.reorder_level
-    )
+    query = inventory_with_product_query(db).filter(LOW_STOCK)
     
     if store_id:
         query = query.filter(Inventory.store_id == store_id)
     elif current_user.store_id:
         query = query.filter(Inventory.store_id == current_user.store_id)
     
-    results = query.all()
-    
-    inventory_list = []
-    for inv, prod_name, prod_sku, prod_price in results:
-        item = InventoryWithProduct(
-            inventory_id=inv.inventory_id,
-            product_id=inv.product_id,
-            store_id=inv.store_id,
-            quantity=inv.quantity,
-            reorder_level=inv.reorder_level,
-            expiry_date=inv.expiry_date,
-            last_updated=inv.last_updated,
-            product_name=prod_name,
-            product_sku=prod_sku,
-            product_price=prod_price
-        )
-        inventory_list.append(item)
-    
-    return inventory_list
+    return rows_to_json(query.all())
 
 
-@router.get("/expiry-risk", response_model=List[InventoryWithProduct])
+@router.get("/expiry-risk", response_model=List[InventoryLotWithProduct])
 def get_expiry_risk_items(
     days: int = 30,
-    db: Session = Depends(get_db),
+    store_id: Optional[int] = None,
+    db: Session = Depends(get_store_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get items expiring within specified days"""
+    """Get lots expiring within specified days, soonest first"""
     expiry_date_threshold = date.today() + timedelta(days=days)
     
+    # Range read over the lot expiry indexes, already in expiry order
     query = db.query(
-        Inventory,
+        InventoryLot.lot_id,
+        InventoryLot.product_id,
+        InventoryLot.store_id,
+        InventoryLot.quantity,
+        InventoryLot.expiry_date,
+        InventoryLot.received_at,
         Product.name.label("product_name"),
         Product.sku.label("product_sku"),
-        Product.price.label("product_price")
-    ).join(Product, Inventory.product_id == Product.product_id).filter(
-        Inventory.expiry_date.isnot(None),
-        Inventory.expiry_date <= expiry_date_threshold
+        Product.price.label("product_price"),
+    ).join(Product, InventoryLot.product_id == Product.product_id).filter(
+        InventoryLot.expiry_date <= expiry_date_threshold
     )
     
-    if current_user.store_id:
-        query = query.filter(Inventory.store_id == current_user.store_id)
+    if store_id:
+        query = query.filter(InventoryLot.store_id == store_id)
+    elif current_user.store_id:
+        query = query.filter(InventoryLot.store_id == current_user.store_id)
     
-    results = query.all()
-    
-    inventory_list = []
-    for inv, prod_name, prod_sku, prod_price in results:
-        item = InventoryWithProduct(
-            inventory_id=inv.inventory_id,
-            product_id=inv.product_id,
-            store_id=inv.store_id,
-            quantity=inv.quantity,
-            reorder_level=inv.reorder_level,
-            expiry_date=inv.expiry_date,
-            last_updated=inv.last_updated,
-            product_name=prod_name,
-            product_sku=prod_sku,
-            product_price=prod_price
-        )
-        inventory_list.append(item)
+    return rows_to_json(query.order_by(InventoryLot.expiry_date, InventoryLot.lot_id).all())
+
+
+@router.get("/reorder-suggestions", response_model=List[ReorderSuggestionResponse])
+def get_reorder_suggestions(
+    store_id: Optional[int] = None,
+    only_needed: bool = True,
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_store_db),
+    current_user: User = Depends(require_role([UserRole.ADMIN, UserRole.MANAGER, UserRole.STOCK_KEEPER]))
+):
+    """Get the latest forecast-based reorder suggestions, largest orders first"""
+    query = db.query(
+        ReorderSuggestion.store_id,
+        ReorderSuggestion.product_id,
+        Product.name.label("product_name"),
+        Product.sku.label("product_sku"),
+        ReorderSuggestion.moving_average,
+        ReorderSuggestion.smoothed_demand,
+        ReorderSuggestion.demand_std,
+        ReorderSuggestion.safety_stock,
+        ReorderSuggestion.reorder_point,
+        ReorderSuggestion.current_quantity,
+        ReorderSuggestion.suggested_order_quantity,
+        ReorderSuggestion.generated_at,
+    ).join(Product, ReorderSuggestion.product_id == Product.product_id)
     
-    return inventory_list
+    if store_id:
+        query = query.filter(ReorderSuggestion.store_id == store_id)
+    elif current_user.store_id:
+        query = query.filter(ReorderSuggestion.store_id == current_user.store_id)
+    if only_needed:
+        query = query.filter(ReorderSuggestion.suggested_order_quantity > 0)
+    
+    rows = query.order_by(
+        ReorderSuggestion.suggested_order_quantity.desc(), ReorderSuggestion.product_id
+    ).limit(limit).all()
+    return rows_to_json(rows)
 
 
 @router.post("/adjust", response_model=InventoryResponse)
@@ -144,27 +268,183 @@ def adjust_inventory(
     current_user: User = Depends(require_role([UserRole.ADMIN, UserRole.MANAGER, UserRole.STOCK_KEEPER]))
 ):
     """Adjust inventory quantity"""
-    inventory = db.query(Inventory).filter(
-        Inventory.product_id == adjustment.product_id,
-        Inventory.store_id == adjustment.store_id
-    ).first()
-    
-    if not inventory:
-        # Create new inventory record if it doesn't exist
-        inventory = Inventory(
-            product_id=adjustment.product_id,
-            store_id=adjustment.store_id,
-            quantity=adjustment.quantity_change
-        )
-        db.add(inventory)
-    else:
-        inventory.quantity += adjustment.quantity_change
+    with store_session(db, adjustment.store_id) as db:
+        inventory = db.query(Inventory).filter(
+            Inventory.product_id == adjustment.product_id,
+            Inventory.store_id == adjustment.store_id
+        ).first()
         
-        # Ensure quantity doesn't go negative
-        if inventory.quantity < 0:
-            inventory.quantity = 0
-    
-    db.commit()
-    db.refresh(inventory)
+        before = inventory.quantity if inventory else 0
+        if not inventory:
+            # Create new inventory record if it doesn't exist
+            inventory = Inventory(
+                product_id=adjustment.product_id,
+                store_id=adjustment.store_id,
+                quantity=adjustment.quantity_change
+            )
+            db.add(inventory)
+        else:
+            inventory.quantity += adjustment.quantity_change
+            
+            # Ensure quantity doesn't go negative
+            if inventory.quantity < 0:
+                inventory.quantity = 0
+        
+        if adjustment.quantity_change > 0 and adjustment.expiry_date:
+            receive_lot(db, inventory, adjustment.quantity_change, adjustment.expiry_date)
+        elif adjustment.quantity_change < 0:
+            consume_lots(db, inventory, before - inventory.quantity)
+        
+        bump_inventory_version(db, adjustment.store_id)
+        db.commit()
+        db.refresh(inventory)
+        
+        stock_events.publish(adjustment.store_id, [
+            stock_change(inventory.product_id, before, inventory.quantity, inventory.reorder_level)
+        ])
+        
+        return inventory
+
+
+@router.post("/transfers", response_model=StockTransferResponse, status_code=status.HTTP_201_CREATED)
+def create_transfer(
+    transfer: StockTransferCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role([UserRole.ADMIN, UserRole.MANAGER, UserRole.STOCK_KEEPER]))
+):
+    """
+    Move stock of many products from one store to another in one transaction
+
+    The inventory rows of both stores are locked in (product_id, store_id)
+    order, so concurrent transfers in either direction cannot deadlock.
+    Quantities and lots are then updated in bulk and every product is
+    recorded as a TRANSFER pair in the transactions ledger in one insert.
+    """
+    from_store_id, to_store_id = transfer.from_store_id, transfer.to_store_id
+    if from_store_id == to_store_id:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Source and destination stores must differ")
+    if not transfer.items:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Transfer has no items")
+    quantities: Dict[int, float] = {}
+    for item in transfer.items:
+        if item.quantity <= 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Quantity for product ID {item.product_id} must be positive"
+            )
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+    if not same_shard(from_store_id, to_store_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Stores are on different database shards; transfer through an adjustment at each store"
+        )
     
-    return inventory
+    with store_session(db, from_store_id) as db:
+        product_ids = sorted(quantities)
+        if db.query(Store).filter(Store.store_id.in_([from_store_id, to_store_id])).count() < 2:
+            raise HTTPException(status_code=404, detail="Store not found")
+        
+        def lock_rows(store_ids: List[int], ids: List[int]):
+            rows = db.query(
+                Inventory.inventory_id, Inventory.store_id, Inventory.product_id, Inventory.quantity,
+                Inventory.reorder_level, Inventory.expiry_date
+            ).filter(
+                Inventory.store_id.in_(store_ids), Inventory.product_id.in_(ids)
+            ).order_by(Inventory.product_id, Inventory.store_id).with_for_update().all()
+            return {(row.store_id, row.product_id): row for row in rows}
+        
+        try:
+            rows = lock_rows([from_store_id, to_store_id], product_ids)
+            short = [
+                product_id for product_id in product_ids
+                if (from_store_id, product_id) not in rows
+                or rows[from_store_id, product_id].quantity < quantities[product_id]
+            ]
+            if short:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Insufficient stock at store {from_store_id} "
+                           f"for product IDs {', '.join(map(str, short))}"
+                )
+            
+            # Products new to the destination get an empty inventory row first
+            missing = [product_id for product_id in product_ids if (to_store_id, product_id) not in rows]
+            if missing:
+                db.execute(insert(Inventory), [
+                    {"product_id": product_id, "store_id": to_store_id, "quantity": 0} for product_id in missing
+                ])
+                rows.update(lock_rows([to_store_id], missing))
+            
+            expiries = move_lots(db, from_store_id, to_store_id, quantities)
+            changes = []
+            for product_id in product_ids:
+                source, destination = rows[from_store_id, product_id], rows[to_store_id, product_id]
+                left_expiry, moved_expiry = expiries.get(product_id, (source.expiry_date, None))
+                if moved_expiry and (destination.expiry_date is None or moved_expiry < destination.expiry_date):
+                    destination_expiry = moved_expiry
+                else:
+                    destination_expiry = destination.expiry_date
+                changes.append((source.inventory_id, -quantities[product_id], left_expiry))
+                changes.append((destination.inventory_id, quantities[product_id], destination_expiry))
+            apply_stock_changes(db, changes)
+            
+            db_transfer = StockTransfer(
+                from_store_id=from_store_id,
+                to_store_id=to_store_id,
+                user_id=current_user.user_id,
+                item_count=len(product_ids),
+                total_quantity=sum(quantities.values()),
+                notes=transfer.notes
+            )
+            db.add(db_transfer)
+            db.flush()
+            db.execute(insert(Transaction), [
+                {"type": TransactionType.TRANSFER, "product_id": product_id, "quantity": quantity,
+                 "store_id": store_id, "user_id": current_user.user_id, "reference_id": db_transfer.transfer_id,
+                 "notes": transfer.notes, "date": db_transfer.created_at}
+                for product_id in product_ids
+                for store_id, quantity in (
+                    (from_store_id, -quantities[product_id]), (to_store_id, quantities[product_id])
+                )
+            ])
+            
+            for store_id in sorted([from_store_id, to_store_id]):
+                bump_inventory_version(db, store_id)
+            db.commit()
+        except HTTPException:
+            db.rollback()
+            raise
+        except IntegrityError:
+            # Another request created one of the destination rows first
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT, detail="Inventory changed concurrently, retry the transfer"
+            )
+        
+        # Stock after the transfer, for the stream and the response
+        after = {
+            (store_id, product_id): row.quantity + quantities[product_id] * (1 if store_id == to_store_id else -1)
+            for (store_id, product_id), row in rows.items()
+        }
+        for store_id in (from_store_id, to_store_id):
+            stock_events.publish(store_id, [
+                stock_change(product_id, rows[store_id, product_id].quantity, after[store_id, product_id],
+                             rows[store_id, product_id].reorder_level)
+                for product_id in product_ids
+            ])
+        
+        return StockTransferResponse(
+            transfer_id=db_transfer.transfer_id,
+            from_store_id=from_store_id,
+            to_store_id=to_store_id,
+            user_id=current_user.user_id,
+            item_count=db_transfer.item_count,
+            total_quantity=db_transfer.total_quantity,
+            notes=db_transfer.notes,
+            created_at=db_transfer.created_at,
+            items=[
+                {"product_id": product_id, "quantity": quantities[product_id],
+                 "from_quantity": after[from_store_id, product_id], "to_quantity": after[to_store_id, product_id]}
+                for product_id in product_ids
+            ]
+        )
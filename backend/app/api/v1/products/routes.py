@@ -1,17 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.models.base import get_db
 from app.models.product import Product
+from app.models.sync import ProductTombstone
 from app.models.user import User, UserRole
-from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse
+from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse, CatalogChanges
 from app.middleware.auth import get_current_user, require_role
+from app.services.catalog import current_catalog_version, touch_product, tombstone_product
+from app.services.single_flight import single_flight
 from app.utils.qr_code import generate_qr_code_data
 
 router = APIRouter()
 
 
 @router.get("", response_model=List[ProductResponse])
+@single_flight(response_model=List[ProductResponse])
 def get_products(
     skip: int = 0,
     limit: int = 100,
@@ -37,6 +42,74 @@ def get_products(
     return products
 
 
+@router.get("/changes", response_model=CatalogChanges)
+@single_flight(response_model=CatalogChanges)
+def get_catalog_changes(
+    since: int = Query(0, ge=0, description="Catalog version the client is synced to; 0 for a full copy"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page of this sync"),
+    limit: int = Query(1000, ge=1, le=5000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get catalog changes since a version, for POS terminals keeping a local copy
+
+    Returns products created or updated after `since` (price changes
+    included) and the ids of products deleted after it. While `has_more` is
+    true, call again with the same `since` and the returned `cursor`; the
+    final page's `version` is the new `since`.
+    """
+    # Read the committed version first: catalog writes commit in version
+    # order, so everything at or below it is visible to the queries below
+    version = current_catalog_version(db)
+    
+    query = db.query(Product).filter(Product.change_version <= version)
+    if since:
+        query = query.filter(Product.change_version > since)
+    if cursor:
+        try:
+            after_version, after_id = (int(part) for part in cursor.split(":"))
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        query = query.filter(
+            tuple_(Product.change_version, Product.product_id) > tuple_(after_version, after_id)
+        )
+    
+    upserts = query.order_by(Product.change_version, Product.product_id).limit(limit + 1).all()
+    has_more = len(upserts) > limit
+    if has_more:
+        upserts = upserts[:limit]
+        last = upserts[-1]
+        return {
+            "version": version,
+            "upserts": upserts,
+            "deleted": [],
+            "has_more": True,
+            "cursor": f"{last.change_version}:{last.product_id}",
+        }
+    
+    # Deletions are sent with the last page so clients apply them after upserts
+    deleted = []
+    if since:
+        deleted = [
+            product_id for (product_id,) in db.query(ProductTombstone.product_id).filter(
+                ProductTombstone.change_version > since,
+                ProductTombstone.change_version <= version
+            )
+        ]
+    
+    return {
+        "version": version,
+        "upserts": upserts,
+        "deleted": deleted,
+        "has_more": False,
+        "cursor": None,
+    }
+
+
 @router.get("/{product_id}", response_model=ProductResponse)
 def get_product(
     product_id: int,
@@ -70,12 +143,12 @@ def create_product(
     # Create product
     db_product = Product(**product.model_dump())
     db.add(db_product)
-    db.commit()
-    db.refresh(db_product)
+    db.flush()  # Get product_id for the QR code
     
-    # Generate and update QR code
+    # Generate QR code and publish both in a single catalog change
     qr_data = generate_qr_code_data(db_product.product_id, db_product.name, db_product.sku)
     db_product.qr_code = qr_data
+    touch_product(db, db_product)
     db.commit()
     db.refresh(db_product)
     
@@ -102,6 +175,7 @@ def update_product(
     for field, value in update_data.items():
         setattr(db_product, field, value)
     
+    touch_product(db, db_product)
     db.commit()
     db.refresh(db_product)
     return db_product
@@ -148,6 +222,7 @@ def delete_product(
         )
     
     db.delete(db_product)
+    tombstone_product(db, product_id)
     db.commit()
     return None
 
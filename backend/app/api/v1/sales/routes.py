@@ -1,129 +1,165 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.exc import MultipleResultsFound
+from typing import List, Literal, Optional, Union
 from datetime import datetime
 from app.models.base import get_db
 from app.models.sale import Sale, SaleLineItem
 from app.models.inventory import Inventory
-from app.models.customer import Customer
 from app.models.user import User, UserRole
-from app.schemas.sale import SaleCreate, SaleResponse
-from app.middleware.auth import get_current_user
-import uuid
+from app.schemas.sale import SaleBase, SaleCreate, SaleResponse, SaleSummary
+from app.middleware.auth import get_current_user, get_store_db
+from app.middleware.rate_limit import hold_admission, rate_limit
+from app.models.shards import shard_url, store_session
+from app.services.inventory import bump_inventory_version, consume_lots
+from app.services.stock_events import broker as stock_events, stock_change
+from app.services import outbox, receipt_pdf
+from app.services.receipts import allocator as receipts, parse_receipt_number
+from app.config import settings
 
 router = APIRouter()
 
 
-def generate_receipt_number() -> str:
-    """Generate unique receipt number"""
-    timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-    unique_id = str(uuid.uuid4())[:8].upper()
-    return f"RCP-{timestamp}-{unique_id}"
+def with_line_items(query):
+    """Load line items for every sale of `query` in one extra query, not one per sale"""
+    return query.options(selectinload(Sale.line_items))
 
 
-@router.post("", response_model=SaleResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "", response_model=SaleResponse, status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(rate_limit("checkout"))]
+)
 def create_sale(
     sale_data: SaleCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new sale transaction"""
-    try:
-        # Calculate totals
-        total_amount = sum(item.quantity * item.unit_price for item in sale_data.line_items)
-        discount_amount = sale_data.discount_amount
-        tax_amount = (total_amount - discount_amount) * (sale_data.tax_rate / 100)
-        final_amount = total_amount - discount_amount + tax_amount
-        
-        # Create sale
-        receipt_number = generate_receipt_number()
-        
-        db_sale = Sale(
-            customer_id=sale_data.customer_id,
-            total_amount=total_amount,
-            discount_amount=discount_amount,
-            tax_amount=tax_amount,
-            final_amount=final_amount,
-            payment_method=sale_data.payment_method,
-            user_id=current_user.user_id,
-            store_id=current_user.store_id or 1,  # Default to store 1 if not set
-            receipt_number=receipt_number
-        )
-        
-        db.add(db_sale)
-        db.flush()  # Get sale_id without committing
-        
-        # Create line items and update inventory
-        for item in sale_data.line_items:
-            line_total = item.quantity * item.unit_price - item.discount
+    store_id = current_user.store_id or 1  # Default to store 1 if not set
+    
+    # The sale, its stock and its outbox event all go to the store's shard
+    with store_session(db, store_id) as db:
+        try:
+            # Calculate totals
+            total_amount = sum(item.quantity * item.unit_price for item in sale_data.line_items)
+            discount_amount = sale_data.discount_amount
+            tax_amount = (total_amount - discount_amount) * (sale_data.tax_rate / 100)
+            final_amount = total_amount - discount_amount + tax_amount
             
-            line_item = SaleLineItem(
-                sale_id=db_sale.sale_id,
-                product_id=item.product_id,
-                quantity=item.quantity,
-                unit_price=item.unit_price,
-                discount=item.discount,
-                total=line_total
+            db_sale = Sale(
+                customer_id=sale_data.customer_id,
+                total_amount=total_amount,
+                discount_amount=discount_amount,
+                tax_amount=tax_amount,
+                final_amount=final_amount,
+                payment_method=sale_data.payment_method,
+                user_id=current_user.user_id,
+                store_id=store_id,
+                receipt_seq=receipts.next(db, store_id),
+                date=datetime.utcnow()
             )
-            db.add(line_item)
             
-            # Update inventory
-            inventory = db.query(Inventory).filter(
-                Inventory.product_id == item.product_id,
-                Inventory.store_id == current_user.store_id or 1
-            ).first()
+            db.add(db_sale)
+            db.flush()  # Get sale_id without committing
             
-            if inventory:
-                if inventory.quantity < item.quantity:
+            # Create line items and update inventory
+            stock_before = {}  # product_id -> (quantity before the sale, inventory row)
+            for item in sale_data.line_items:
+                line_total = item.quantity * item.unit_price - item.discount
+                
+                line_item = SaleLineItem(
+                    sale_id=db_sale.sale_id,
+                    product_id=item.product_id,
+                    quantity=item.quantity,
+                    unit_price=item.unit_price,
+                    discount=item.discount,
+                    total=line_total,
+                    sale_date=db_sale.date
+                )
+                db.add(line_item)
+                
+                # Update inventory
+                inventory = db.query(Inventory).filter(
+                    Inventory.product_id == item.product_id,
+                    Inventory.store_id == store_id
+                ).first()
+                
+                if inventory:
+                    if inventory.quantity < item.quantity:
+                        raise HTTPException(
+                            status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Insufficient stock for product ID {item.product_id}"
+                        )
+                    stock_before.setdefault(item.product_id, (inventory.quantity, inventory))
+                    inventory.quantity -= item.quantity
+                    consume_lots(db, inventory, item.quantity)
+                else:
                     raise HTTPException(
                         status_code=status.HTTP_400_BAD_REQUEST,
-                        detail=f"Insufficient stock for product ID {item.product_id}"
+                        detail=f"Product ID {item.product_id} not found in inventory"
                     )
-                inventory.quantity -= item.quantity
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Product ID {item.product_id} not found in inventory"
-                )
-        
-        # Update customer loyalty points and total spent
-        if sale_data.customer_id:
-            customer = db.query(Customer).filter(Customer.customer_id == sale_data.customer_id).first()
-            if customer:
-                customer.total_spent += final_amount
-                customer.loyalty_points += int(final_amount / 10)  # 1 point per $10 spent
-        
-        db.commit()
-        db.refresh(db_sale)
+            
+            # Loyalty and any other follow-up work happens after commit, off the checkout path
+            outbox.enqueue(db, outbox.SALE_COMPLETED, {
+                "sale_id": db_sale.sale_id,
+                "store_id": store_id,
+                "customer_id": sale_data.customer_id,
+                "final_amount": final_amount,
+                "sale_date": db_sale.date.isoformat(),
+            })
+            
+            changes = [
+                stock_change(product_id, before, inventory.quantity, inventory.reorder_level)
+                for product_id, (before, inventory) in stock_before.items()
+            ]
+            bump_inventory_version(db, store_id)
+            db.commit()
+            db.refresh(db_sale)
+            
+            stock_events.publish(store_id, changes)
+            if settings.OUTBOX_DISPATCH_AFTER_RESPONSE:
+                background_tasks.add_task(outbox.dispatch_pending, url=shard_url(store_id))
+            # Serialized before a shard session is closed
+            return SaleResponse.model_validate(db_sale)
         
-        return db_sale
-    
-    except HTTPException:
-        db.rollback()
-        raise
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to create sale: {str(e)}"
-        )
+        except HTTPException:
+            db.rollback()
+            raise
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to create sale: {str(e)}"
+            )
 
 
-@router.get("", response_model=List[SaleResponse])
+@router.get("", response_model=Union[List[SaleResponse], List[SaleSummary]])
 def get_sales(
     skip: int = 0,
     limit: int = 100,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    db: Session = Depends(get_db),
+    include: Literal["line_items", "summary"] = "line_items",
+    store_id: Optional[int] = None,
+    db: Session = Depends(get_store_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get sales history with optional date filtering"""
+    """
+    Get sales history with optional date filtering
+
+    include=summary returns each sale's totals with an item_count instead of
+    its line items. Admins pass store_id to list one store (on its shard).
+    """
     query = db.query(Sale)
     
     # Filter by store if user is not admin
     if current_user.role != UserRole.ADMIN and current_user.store_id:
         query = query.filter(Sale.store_id == current_user.store_id)
+    elif store_id:
+        query = query.filter(Sale.store_id == store_id)
     
     if start_date:
         query = query.filter(Sale.date >= start_date)
@@ -131,18 +167,117 @@ def get_sales(
     if end_date:
         query = query.filter(Sale.date <= end_date)
     
-    sales = query.order_by(Sale.date.desc()).offset(skip).limit(limit).all()
-    return sales
+    query = query.order_by(Sale.date.desc()).offset(skip).limit(limit)
+    if include == "line_items":
+        return with_line_items(query).all()
+    
+    sales = query.all()
+    item_counts = dict(
+        db.query(SaleLineItem.sale_id, func.count(SaleLineItem.line_item_id)).filter(
+            SaleLineItem.sale_id.in_([sale.sale_id for sale in sales])
+        ).group_by(SaleLineItem.sale_id)
+    ) if sales else {}
+    return [
+        SaleSummary(**SaleBase.model_validate(sale).model_dump(), item_count=item_counts.get(sale.sale_id, 0))
+        for sale in sales
+    ]
+
+
+@router.get("/receipts.zip", dependencies=[Depends(rate_limit("export"))])
+def download_receipts(
+    request: Request,
+    start_date: datetime,
+    end_date: datetime,
+    store_id: Optional[int] = None,
+    db: Session = Depends(get_store_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Reprint the receipts of a period as a zip of PDFs
+
+    Receipts render in a background process pool and the archive is
+    streamed as they finish.
+    """
+    query = db.query(Sale).filter(Sale.date >= start_date, Sale.date <= end_date)
+    if current_user.role != UserRole.ADMIN:
+        if store_id and store_id != current_user.store_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Access denied"
+            )
+        store_id = current_user.store_id
+    if store_id:
+        query = query.filter(Sale.store_id == store_id)
+    
+    if query.count() > settings.RECEIPT_BULK_MAX_SALES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"More than {settings.RECEIPT_BULK_MAX_SALES} sales in range; narrow the period or store"
+        )
+    receipts = receipt_pdf.load_receipts(db, query.order_by(Sale.store_id, Sale.receipt_seq))
+    if not receipts:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No sales in range"
+        )
+    
+    filename = f"receipts-{start_date:%Y%m%d}-{end_date:%Y%m%d}.zip"
+    # The export slot is held until the last PDF has been rendered and sent
+    return hold_admission(request, StreamingResponse(
+        receipt_pdf.stream_receipts_zip(receipts), media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    ))
+
+
+@router.get("/receipt/{receipt_number}", response_model=SaleResponse)
+def get_sale_by_receipt(
+    receipt_number: str,
+    db: Session = Depends(get_store_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get a sale by its printed receipt number"""
+    try:
+        store_id, receipt_seq = parse_receipt_number(receipt_number)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sale not found"
+        )
+    
+    if current_user.role != UserRole.ADMIN and store_id != current_user.store_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    
+    # The receipt number names its store, so look on that store's shard
+    with store_session(db, store_id) as shard_db:
+        try:
+            sale = with_line_items(shard_db.query(Sale)).filter(
+                Sale.store_id == store_id, Sale.receipt_seq == receipt_seq
+            ).order_by(Sale.date, Sale.sale_id).one_or_none()
+        except MultipleResultsFound:
+            # Partitioned tables only enforce uniqueness within a month, so never pick one silently
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Receipt number {receipt_number} is shared by more than one sale"
+            )
+    if not sale:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sale not found"
+        )
+    return sale
 
 
 @router.get("/{sale_id}", response_model=SaleResponse)
 def get_sale(
     sale_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_store_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a single sale by ID"""
-    sale = db.query(Sale).filter(Sale.sale_id == sale_id).first()
+    sale = with_line_items(db.query(Sale)).filter(Sale.sale_id == sale_id).first()
     
     if not sale:
         raise HTTPException(
@@ -158,3 +293,28 @@ def get_sale(
         )
     
     return sale
+
+
+@router.get("/{sale_id}/receipt.pdf")
+def get_sale_receipt_pdf(
+    sale_id: int,
+    db: Session = Depends(get_store_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get a printable PDF receipt for a sale"""
+    sale_store_id = db.query(Sale.store_id).filter(Sale.sale_id == sale_id).scalar()
+    if sale_store_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sale not found"
+        )
+    if current_user.role != UserRole.ADMIN and sale_store_id != current_user.store_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    
+    receipt = receipt_pdf.load_receipts(db, db.query(Sale).filter(Sale.sale_id == sale_id))[0]
+    return Response(content=receipt_pdf.render_receipt(receipt), media_type="application/pdf", headers={
+        "Content-Disposition": f'inline; filename="{receipt["receipt_number"]}.pdf"'
+    })
@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
@@ -9,16 +10,29 @@ from app.api.v1.sales import routes as sales_routes
 from app.api.v1.customers import routes as customer_routes
 from app.api.v1.users import routes as user_routes
 from app.api.v1.analytics import routes as analytics_routes
+from app.services.stock_events import broker as stock_events
+from app.services import receipt_pdf
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema changes ship as Alembic migrations; create_all is a dev-only opt-in
+    # so workers don't round-trip to the database before they can serve.
+    if settings.AUTO_CREATE_TABLES:
+        Base.metadata.create_all(bind=engine)
+    await stock_events.start()
+    yield
+    await stock_events.stop()
+    receipt_pdf.shutdown_pool()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title=settings.APP_NAME,
     description="Advanced Shopping Mart Inventory & Billing System API",
     version="1.0.0",
     docs_url="/api/docs",
-    redoc_url="/api/redoc"
+    redoc_url="/api/redoc",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -28,6 +42,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "Retry-After"],
 )
 
 # Include routers
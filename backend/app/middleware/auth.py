@@ -1,32 +1,30 @@
-from fastapi import Depends, HTTPException, status
+from typing import Optional
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from app.models.base import get_db
+from app.models.base import get_db, SessionLocal
+from app.models.shards import store_session
 from app.models.user import User
 from app.utils.auth import verify_token
 
 security = HTTPBearer()
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user"""
+def _authenticate(token: str, db: Session) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    token = credentials.credentials
     payload = verify_token(token, "access")
     
     if payload is None:
         raise credentials_exception
     
-    user_id: int = payload.get("sub")
-    if user_id is None:
+    try:
+        user_id = int(payload.get("sub"))
+    except (TypeError, ValueError):
         raise credentials_exception
     
     user = db.query(User).filter(User.user_id == user_id).first()
@@ -36,6 +34,53 @@ async def get_current_user(
     return user
 
 
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> User:
+    """Get current authenticated user"""
+    return _authenticate(credentials.credentials, db)
+
+
+def get_user_db(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Session on the shard of the user's own store (the regular session when unsharded)"""
+    with store_session(db, current_user.store_id) as shard_db:
+        yield shard_db
+
+
+def get_store_db(
+    store_id: Optional[int] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Session on the shard of the request's store: the `store_id` query
+    parameter when given, else the user's store. Unsharded (or with no
+    store at all) this is the request's regular session.
+    """
+    with store_session(db, store_id or current_user.store_id) as shard_db:
+        yield shard_db
+
+
+def get_stream_user(token: str = Query(..., description="Access token (EventSource cannot send headers)")) -> User:
+    """
+    Authenticate a long-lived streaming request from a query-string token.
+
+    Uses its own short session so the stream doesn't hold a pooled
+    connection open for as long as the client stays connected.
+    """
+    db = SessionLocal()
+    try:
+        user = _authenticate(token, db)
+        db.expunge(user)
+        return user
+    finally:
+        db.close()
+
+
 def require_role(allowed_roles: list):
     """Decorator to require specific roles"""
     def role_checker(current_user: User = Depends(get_current_user)) -> User:
@@ -0,0 +1,94 @@
+import math
+from fastapi import HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTasks
+from app.config import settings
+from app.services.rate_limit import in_flight, limiter
+from app.utils.auth import verify_token
+
+
+def _client(request: Request) -> str:
+    """The token's user, read without a database lookup; the caller's address if there is none"""
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    payload = verify_token(token, "access") if scheme.lower() == "bearer" and token else None
+    if payload and payload.get("sub"):
+        return f"user:{payload['sub']}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def _too_many_requests(route_class: str, retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=f"Too many {route_class} requests, retry later",
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+def rate_limit(route_class: str, coalesced: bool = False):
+    """
+    Dependency admitting a request of a RATE_LIMITS route class.
+
+    Declared on the route (dependencies=[...]) it runs before the route's
+    own dependencies, so a rejected request fails fast with 429 and
+    Retry-After without authenticating against or waiting on the database.
+    On single_flight routes (coalesced=True) a user's identical requests
+    count once toward the concurrency cap, as they share one computation.
+    """
+    def admit(request: Request):
+        if not settings.RATE_LIMIT_ENABLED:
+            yield
+            return
+        client = _client(request)
+        if coalesced and settings.SINGLE_FLIGHT_ENABLED:
+            # A user is never broader than single_flight's scope for reports (their store)
+            request_key = f"{client} {request.method} {request.url.path}?{sorted(request.query_params.multi_items())}"
+        else:
+            request_key = f"request:{id(request)}"
+        if not in_flight.enter(route_class, request_key):
+            raise _too_many_requests(route_class, 1)
+        released = False
+        
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                in_flight.exit(route_class, request_key)
+        
+        request.state.release_admission = release
+        try:
+            retry_after = limiter.take(route_class, client)
+            if retry_after:
+                raise _too_many_requests(route_class, retry_after)
+            yield
+        finally:
+            if not getattr(request.state, "admission_held", False):
+                release()
+    return admit
+
+
+def hold_admission(request: Request, response: StreamingResponse) -> StreamingResponse:
+    """
+    Keep the request's concurrency slot until `response`'s body is sent.
+
+    rate_limit exits before a streaming body is produced, so routes that
+    stream their expensive work return the response through this.
+    """
+    release = getattr(request.state, "release_admission", None)
+    if release is None:
+        return response
+    request.state.admission_held = True
+    body = response.body_iterator
+    
+    async def stream():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            release()
+    
+    response.body_iterator = stream()
+    # Also covers a body that is never started (client gone before the first chunk)
+    background = BackgroundTasks([response.background] if response.background else [])
+    background.add_task(release)
+    response.background = background
+    return response
@@ -1,22 +1,38 @@
 from .user import User
 from .product import Product
-from .inventory import Inventory
-from .transaction import Transaction
+from .inventory import Inventory, InventoryLot
+from .transaction import Transaction, StockTransfer
 from .sale import Sale, SaleLineItem
 from .customer import Customer
 from .supplier import Supplier
 from .store import Store
 from .audit_log import AuditLog
+from .sync import SyncCounter, ProductTombstone
+from .forecast import ReorderSuggestion
+from .analytics import DailySalesRollup, InventoryValuationSnapshot, CustomerSegment
+from .outbox import OutboxEvent, OutboxStatus
+from .loyalty import LoyaltyLedgerEntry
 
 __all__ = [
     "User",
     "Product",
     "Inventory",
+    "InventoryLot",
     "Transaction",
+    "StockTransfer",
     "Sale",
     "SaleLineItem",
     "Customer",
     "Supplier",
     "Store",
     "AuditLog",
+    "SyncCounter",
+    "ProductTombstone",
+    "ReorderSuggestion",
+    "DailySalesRollup",
+    "InventoryValuationSnapshot",
+    "CustomerSegment",
+    "OutboxEvent",
+    "OutboxStatus",
+    "LoyaltyLedgerEntry",
 ]
@@ -0,0 +1,46 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, Date, String, Index
+from datetime import datetime
+from .base import Base
+
+
+class DailySalesRollup(Base):
+    """Per-store daily sales totals, rebuilt by the worker for closed days"""
+    __tablename__ = "daily_sales_rollups"
+
+    store_id = Column(Integer, ForeignKey("stores.store_id"), primary_key=True)
+    sale_date = Column(Date, primary_key=True)
+    total_sales = Column(Float, nullable=False, default=0)
+    transaction_count = Column(Integer, nullable=False, default=0)
+    rebuilt_at = Column(DateTime, default=datetime.utcnow)
+
+
+class InventoryValuationSnapshot(Base):
+    """Stock value of a store at cost, captured nightly"""
+    __tablename__ = "inventory_valuation_snapshots"
+
+    store_id = Column(Integer, ForeignKey("stores.store_id"), primary_key=True)
+    snapshot_date = Column(Date, primary_key=True)
+    total_items = Column(Integer, nullable=False)
+    total_quantity = Column(Float, nullable=False)
+    total_value = Column(Float, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class CustomerSegment(Base):
+    """Recency/frequency/monetary scores and segment per customer, recomputed in batch"""
+    __tablename__ = "customer_segments"
+
+    customer_id = Column(Integer, ForeignKey("customers.customer_id"), primary_key=True)
+    segment = Column(String(30), nullable=False)
+    recency_days = Column(Integer, nullable=False)
+    frequency = Column(Integer, nullable=False)
+    monetary = Column(Float, nullable=False)
+    r_score = Column(Integer, nullable=False)  # 1-5 quintile scores, 5 is best
+    f_score = Column(Integer, nullable=False)
+    m_score = Column(Integer, nullable=False)
+    computed_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Insights pages through one segment by spend
+        Index('ix_customer_segments_segment_monetary', 'segment', 'monetary', 'customer_id'),
+    )
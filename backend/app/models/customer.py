@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .base import Base
@@ -14,6 +14,15 @@ class Customer(Base):
     loyalty_points = Column(Float, default=0)
     total_spent = Column(Float, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
+    last_purchase_at = Column(DateTime, nullable=True)  # as of the last loyalty fold in ledger mode
 
     # Relationships
     sales = relationship("Sale", back_populates="customer")
+
+    __table_args__ = (
+        # Serves phone LIKE 'prefix%' on PostgreSQL whatever the database collation;
+        # other databases use the in-memory index in services.customer_search
+        Index(
+            'ix_customers_phone_pattern', 'phone', postgresql_ops={'phone': 'varchar_pattern_ops'}
+        ).ddl_if(dialect='postgresql'),
+    )
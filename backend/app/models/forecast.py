@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime
+from datetime import datetime
+from .base import Base
+
+
+class ReorderSuggestion(Base):
+    """Latest demand forecast and reorder point per (store, product), rewritten by each forecasting run"""
+    __tablename__ = "reorder_suggestions"
+
+    store_id = Column(Integer, ForeignKey("stores.store_id"), primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.product_id"), primary_key=True)
+    moving_average = Column(Float, nullable=False)
+    smoothed_demand = Column(Float, nullable=False)
+    demand_std = Column(Float, nullable=False)
+    safety_stock = Column(Float, nullable=False)
+    reorder_point = Column(Float, nullable=False)
+    current_quantity = Column(Float, nullable=False)
+    suggested_order_quantity = Column(Float, nullable=False)
+    generated_at = Column(DateTime, default=datetime.utcnow)
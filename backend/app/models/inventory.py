@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, Date, UniqueConstraint
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, Date, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .base import Base
@@ -22,4 +22,42 @@ class Inventory(Base):
     # Unique constraint to prevent duplicate inventory records
     __table_args__ = (
         UniqueConstraint('product_id', 'store_id', name='uix_product_store'),
+        # Partial index holding only rows at or below their reorder level. The
+        # database keeps it current on every quantity change, so low-stock reads
+        # cost O(result) instead of a scan. Queries must use the same predicate
+        # (see services.inventory.LOW_STOCK) for the planner to pick it; it is
+        # written against a constant so PostgreSQL can estimate it from the
+        # inventory_stock_margin expression statistics (migration 0015).
+        Index(
+            'ix_inventory_low_stock', 'store_id', 'inventory_id',
+            postgresql_where=(quantity - reorder_level <= 0),
+            sqlite_where=(quantity - reorder_level <= 0),
+        ),
+    )
+
+
+class InventoryLot(Base):
+    """
+    A received batch of a product at a store, with its own expiry date.
+
+    Inventory.quantity stays the store total; lots break down the part of
+    it that carries expiry dates. Sales draw lots down first-expiry-first-out.
+    """
+    __tablename__ = "inventory_lots"
+
+    lot_id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.product_id"), nullable=False)
+    store_id = Column(Integer, ForeignKey("stores.store_id"), nullable=False)
+    quantity = Column(Float, nullable=False, default=0)
+    expiry_date = Column(Date, nullable=False)
+    received_at = Column(DateTime, default=datetime.utcnow)
+
+    product = relationship("Product")
+
+    __table_args__ = (
+        # Expiry-risk reads walk these in expiry order, per store or overall
+        Index('ix_inventory_lots_store_expiry', 'store_id', 'expiry_date'),
+        Index('ix_inventory_lots_expiry', 'expiry_date'),
+        # FEFO consumption: a product's lots at a store, soonest expiry first
+        Index('ix_inventory_lots_fefo', 'store_id', 'product_id', 'expiry_date'),
     )
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, Index
+from datetime import datetime
+from .base import Base
+
+
+class LoyaltyLedgerEntry(Base):
+    """
+    Append-only record of loyalty accrual. Entries are periodically folded
+    into Customer.total_spent / loyalty_points; the "loyalty_folded"
+    sync counters on the default database hold the highest entry_id already
+    folded from each shard's ledger.
+    """
+    __tablename__ = "loyalty_ledger"
+
+    entry_id = Column(Integer, primary_key=True)
+    customer_id = Column(Integer, ForeignKey("customers.customer_id"), nullable=False)
+    sale_id = Column(Integer, ForeignKey("sales.sale_id"), nullable=True, unique=True)  # at most one accrual per sale
+    amount = Column(Float, nullable=False, default=0)
+    points = Column(Float, nullable=False, default=0)
+    sale_date = Column(DateTime, nullable=True)  # when the sale happened; created_at is when it was delivered
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Pending (unfolded) delta of one customer: entry_id > watermark
+        Index('ix_loyalty_ledger_customer_entry', 'customer_id', 'entry_id'),
+    )
@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, Index, Enum as SQLEnum
+from datetime import datetime
+import enum
+from .base import Base
+
+
+class OutboxStatus(str, enum.Enum):
+    PENDING = "pending"
+    DONE = "done"
+    DEAD = "dead"  # gave up after OUTBOX_MAX_ATTEMPTS
+
+
+class OutboxEvent(Base):
+    """
+    Side effect recorded in the same transaction as the write that caused it,
+    and carried out afterwards by the outbox dispatcher.
+    """
+    __tablename__ = "outbox_events"
+
+    event_id = Column(Integer, primary_key=True)
+    event_type = Column(String(50), nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(SQLEnum(OutboxStatus), nullable=False, default=OutboxStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    available_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # pushed back on retry
+    processed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # The dispatcher only ever looks at pending events
+        Index(
+            'ix_outbox_events_pending', 'available_at', 'event_id',
+            postgresql_where=(status == OutboxStatus.PENDING),
+            sqlite_where=(status == OutboxStatus.PENDING),
+        ),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Text
+from sqlalchemy import Column, Integer, BigInteger, String, Float, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from .base import Base
 
@@ -18,9 +18,16 @@ class Product(Base):
     supplier_id = Column(Integer, ForeignKey("suppliers.supplier_id"), nullable=True)
     image_url = Column(String(500), nullable=True)
     unit_of_measure = Column(String(50), default="pieces")
+    # Catalog version of the last change to this row (including price); see /products/changes
+    change_version = Column(BigInteger, nullable=False, default=0, server_default="0")
 
     # Relationships
     supplier = relationship("Supplier", back_populates="products")
     inventory = relationship("Inventory", back_populates="product")
     transactions = relationship("Transaction", back_populates="product")
     sale_line_items = relationship("SaleLineItem", back_populates="product")
+
+    # Keyset for delta sync: changes are read in (change_version, product_id) order
+    __table_args__ = (
+        Index("ix_products_change_version", "change_version", "product_id"),
+    )
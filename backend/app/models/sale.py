@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Enum as SQLEnum
+from sqlalchemy import Column, Integer, BigInteger, Float, ForeignKey, DateTime, UniqueConstraint, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -23,10 +23,10 @@ class Sale(Base):
     tax_amount = Column(Float, default=0)
     final_amount = Column(Float, nullable=False)
     payment_method = Column(SQLEnum(PaymentMethod), nullable=False)
-    date = Column(DateTime, default=datetime.utcnow, index=True)
+    date = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)  # partition key on PostgreSQL
     user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
     store_id = Column(Integer, ForeignKey("stores.store_id"), nullable=False)
-    receipt_number = Column(String(50), unique=True, nullable=False, index=True)
+    receipt_seq = Column(BigInteger, nullable=False)  # per store, see services.receipts
 
     # Relationships
     customer = relationship("Customer", back_populates="sales")
@@ -34,6 +34,18 @@ class Sale(Base):
     store = relationship("Store", back_populates="sales")
     line_items = relationship("SaleLineItem", back_populates="sale", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # On partitioned PostgreSQL tables the constraint also includes date, so the
+        # database only enforces it within a month; across months receipt numbers
+        # are unique because the allocator (services.receipts) never reissues one
+        UniqueConstraint('store_id', 'receipt_seq', name='uq_sales_store_receipt_seq'),
+    )
+
+    @property
+    def receipt_number(self) -> str:
+        """Printed form, e.g. R003-00001234"""
+        return f"R{self.store_id:03d}-{self.receipt_seq:08d}"
+
 
 class SaleLineItem(Base):
     __tablename__ = "sale_line_items"
@@ -45,6 +57,8 @@ class SaleLineItem(Base):
     unit_price = Column(Float, nullable=False)
     discount = Column(Float, default=0)
     total = Column(Float, nullable=False)
+    # Copy of the sale's date: the partition key on PostgreSQL
+    sale_date = Column(DateTime, nullable=False)
 
     # Relationships
     sale = relationship("Sale", back_populates="line_items")
@@ -0,0 +1,114 @@
+"""
+Store-sharded database routing
+
+SHARD_MAP assigns stores to databases by URL; stores not listed stay on
+DATABASE_URL (the default shard). Every shard carries the full schema:
+
+- store-scoped rows (sales, inventory and lots, transfers, rollups,
+  outbox events, ...) live only on their store's shard,
+- reference tables (users, stores, products, customers) are written on the
+  default database and replicated to every shard.
+
+Requests scoped to one store use that store's shard (see
+middleware.auth.get_store_db); all-store reads run on every shard
+concurrently through fan_out and merge the results.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, TypeVar
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+from app.config import settings
+from app.models.base import SessionLocal, engine
+
+T = TypeVar("T")
+
+_sessionmakers: Dict[str, sessionmaker] = {settings.DATABASE_URL: SessionLocal}
+_engines: Dict[str, Engine] = {settings.DATABASE_URL: engine}
+_lock = threading.Lock()
+
+
+def is_sharded() -> bool:
+    return any(url != settings.DATABASE_URL for url in settings.SHARD_MAP.values())
+
+
+def shard_url(store_id: Optional[int]) -> str:
+    """Database URL holding a store's rows (the default database for None)"""
+    if store_id is None:
+        return settings.DATABASE_URL
+    return settings.SHARD_MAP.get(store_id, settings.DATABASE_URL)
+
+
+def shard_urls() -> List[str]:
+    """Every shard, the default database first"""
+    return list(dict.fromkeys([settings.DATABASE_URL, *settings.SHARD_MAP.values()]))
+
+
+def session_for_url(url: Optional[str] = None) -> Session:
+    url = url or settings.DATABASE_URL
+    factory = _sessionmakers.get(url)
+    if factory is None:
+        with _lock:
+            if url not in _sessionmakers:
+                _engines[url] = create_engine(url, pool_pre_ping=True, echo=settings.DEBUG)
+                _sessionmakers[url] = sessionmaker(autocommit=False, autoflush=False, bind=_engines[url])
+            factory = _sessionmakers[url]
+    return factory()
+
+
+def session_for_store(store_id: Optional[int]) -> Session:
+    return session_for_url(shard_url(store_id))
+
+
+@contextmanager
+def store_session(db: Session, store_id: Optional[int]) -> Iterator[Session]:
+    """`db` if it is already on the store's shard, else a session on that shard for the block"""
+    url = shard_url(store_id)
+    if _engines.get(url) is db.get_bind():
+        yield db
+        return
+    shard_db = session_for_url(url)
+    try:
+        yield shard_db
+    finally:
+        shard_db.close()
+
+
+def session_url(db: Session) -> str:
+    """URL of the shard a session is bound to"""
+    bind = db.get_bind()
+    return next(url for url, shard_engine in _engines.items() if shard_engine is bind)
+
+
+def same_shard(*store_ids: int) -> bool:
+    return len({shard_url(store_id) for store_id in store_ids}) == 1
+
+
+def fan_out(fn: Callable[[Session], T]) -> List[T]:
+    """
+    Run fn(session) on every shard concurrently, each with its own session,
+    and return the results in shard_urls() order.
+
+    fn commits its own writes; sessions are rolled back and closed after.
+    """
+    def run(url: str) -> T:
+        db = session_for_url(url)
+        try:
+            return fn(db)
+        finally:
+            db.rollback()
+            db.close()
+
+    urls = shard_urls()
+    if len(urls) == 1:
+        return [run(urls[0])]
+    with ThreadPoolExecutor(max_workers=min(len(urls), settings.SHARD_FANOUT_WORKERS)) as pool:
+        return list(pool.map(run, urls))
+
+
+def dispose_engines(close: bool = True) -> None:
+    """Drop pooled connections of every shard (close=False in forked children)"""
+    for shard_engine in list(_engines.values()):
+        shard_engine.dispose(close=close)
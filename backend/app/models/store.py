@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .base import Base
@@ -10,8 +10,14 @@ class Store(Base):
     store_id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
     location = Column(String(255), nullable=True)
-    manager_id = Column(Integer, ForeignKey("users.user_id"), nullable=True)
+    manager_id = Column(
+        Integer,
+        ForeignKey("users.user_id", use_alter=True, name="fk_stores_manager_id_users"),
+        nullable=True,
+    )
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Bumped whenever any inventory row of the store changes; drives inventory ETags
+    inventory_version = Column(BigInteger, nullable=False, default=0, server_default="0")
 
     # Relationships
     users = relationship("User", back_populates="store", foreign_keys="[User.store_id]")
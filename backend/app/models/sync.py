@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+from datetime import datetime
+from .base import Base
+
+
+class SyncCounter(Base):
+    """Named monotonic counters handing out change versions (e.g. "catalog")"""
+    __tablename__ = "sync_counters"
+
+    name = Column(String(50), primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+
+
+class ProductTombstone(Base):
+    """Records deleted products so delta sync clients can drop them"""
+    __tablename__ = "product_tombstones"
+
+    product_id = Column(Integer, primary_key=True)
+    change_version = Column(BigInteger, nullable=False, index=True)
+    deleted_at = Column(DateTime, default=datetime.utcnow)
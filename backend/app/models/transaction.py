@@ -22,8 +22,29 @@ class Transaction(Base):
     quantity = Column(Float, nullable=False)
     date = Column(DateTime, default=datetime.utcnow, index=True)
     user_id = Column(Integer, ForeignKey("users.user_id"), nullable=True)
+    store_id = Column(Integer, ForeignKey("stores.store_id"), nullable=True)
     notes = Column(Text, nullable=True)
-    reference_id = Column(Integer, nullable=True)  # Reference to sale_id or other transaction
+    reference_id = Column(Integer, nullable=True)  # Reference to sale_id, transfer_id or other transaction
 
     # Relationships
     product = relationship("Product", back_populates="transactions")
+
+
+class StockTransfer(Base):
+    """
+    A move of stock between two stores.
+
+    Each product moved is recorded in transactions as a TRANSFER pair: a
+    negative quantity at the source store and a positive one at the
+    destination, both with reference_id = transfer_id.
+    """
+    __tablename__ = "stock_transfers"
+
+    transfer_id = Column(Integer, primary_key=True, index=True)
+    from_store_id = Column(Integer, ForeignKey("stores.store_id"), nullable=False)
+    to_store_id = Column(Integer, ForeignKey("stores.store_id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.user_id"), nullable=True)
+    item_count = Column(Integer, nullable=False)
+    total_quantity = Column(Float, nullable=False)
+    notes = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -26,6 +26,6 @@ class User(Base):
     is_active = Column(Integer, default=1)
 
     # Relationships
-    store = relationship("Store", back_populates="users")
+    store = relationship("Store", back_populates="users", foreign_keys=[store_id])
     sales = relationship("Sale", back_populates="user")
     audit_logs = relationship("AuditLog", back_populates="user")
@@ -1,7 +1,7 @@
 from .user import UserCreate, UserResponse, UserLogin, Token
 from .product import ProductCreate, ProductUpdate, ProductResponse
 from .inventory import InventoryResponse, InventoryAdjustment
-from .sale import SaleCreate, SaleResponse, SaleLineItemCreate
+from .sale import SaleCreate, SaleResponse, SaleSummary, SaleLineItemCreate
 from .customer import CustomerCreate, CustomerResponse
 from .supplier import SupplierCreate, SupplierResponse
 
@@ -9,7 +9,7 @@ __all__ = [
     "UserCreate", "UserResponse", "UserLogin", "Token",
     "ProductCreate", "ProductUpdate", "ProductResponse",
     "InventoryResponse", "InventoryAdjustment",
-    "SaleCreate", "SaleResponse", "SaleLineItemCreate",
+    "SaleCreate", "SaleResponse", "SaleSummary", "SaleLineItemCreate",
     "CustomerCreate", "CustomerResponse",
     "SupplierCreate", "SupplierResponse",
 ]
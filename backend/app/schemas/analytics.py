@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import Any, Dict, Optional
+
+
+class AnalyticsJobCreate(BaseModel):
+    report: str
+    params: Dict[str, Any] = {}
+
+
+class AnalyticsJob(BaseModel):
+    job_id: str
+    status: str
+    report: Optional[str] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
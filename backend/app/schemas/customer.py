@@ -23,6 +23,7 @@ class CustomerResponse(CustomerBase):
     loyalty_points: float
     total_spent: float
     created_at: datetime
+    last_purchase_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
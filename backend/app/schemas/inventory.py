@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime, date
 
 
@@ -17,6 +17,38 @@ class InventoryAdjustment(BaseModel):
     quantity_change: float
     reason: str
     notes: Optional[str] = None
+    # Incoming stock with an expiry date is recorded as a lot
+    expiry_date: Optional[date] = None
+
+
+class StockTransferItem(BaseModel):
+    product_id: int
+    quantity: float
+
+
+class StockTransferCreate(BaseModel):
+    from_store_id: int
+    to_store_id: int
+    items: List[StockTransferItem]
+    notes: Optional[str] = None
+
+
+class StockTransferLine(StockTransferItem):
+    # Stock at each store after the transfer
+    from_quantity: float
+    to_quantity: float
+
+
+class StockTransferResponse(BaseModel):
+    transfer_id: int
+    from_store_id: int
+    to_store_id: int
+    user_id: Optional[int] = None
+    item_count: int
+    total_quantity: float
+    notes: Optional[str] = None
+    created_at: datetime
+    items: List[StockTransferLine]
 
 
 class InventoryResponse(InventoryBase):
@@ -31,3 +63,39 @@ class InventoryWithProduct(InventoryResponse):
     product_name: str
     product_sku: str
     product_price: float
+
+
+class InventoryLotResponse(BaseModel):
+    lot_id: int
+    product_id: int
+    store_id: int
+    quantity: float
+    expiry_date: date
+    received_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class InventoryLotWithProduct(InventoryLotResponse):
+    product_name: str
+    product_sku: str
+    product_price: float
+
+
+class ReorderSuggestionResponse(BaseModel):
+    store_id: int
+    product_id: int
+    product_name: str
+    product_sku: str
+    moving_average: float
+    smoothed_demand: float
+    demand_std: float
+    safety_stock: float
+    reorder_point: float
+    current_quantity: float
+    suggested_order_quantity: float
+    generated_at: datetime
+
+    class Config:
+        from_attributes = True
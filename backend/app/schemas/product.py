@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 
 class ProductBase(BaseModel):
@@ -33,6 +33,15 @@ class ProductUpdate(BaseModel):
 class ProductResponse(ProductBase):
     product_id: int
     qr_code: Optional[str]
+    change_version: int = 0
 
     class Config:
         from_attributes = True
+
+
+class CatalogChanges(BaseModel):
+    version: int  # pass back as `since` once has_more is false
+    upserts: List[ProductResponse]
+    deleted: List[int]
+    has_more: bool
+    cursor: Optional[str] = None  # pass back with the same `since` while has_more
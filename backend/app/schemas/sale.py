@@ -27,7 +27,7 @@ class SaleCreate(BaseModel):
     tax_rate: float = 0  # Tax rate as percentage
 
 
-class SaleResponse(BaseModel):
+class SaleBase(BaseModel):
     sale_id: int
     customer_id: Optional[int]
     total_amount: float
@@ -39,7 +39,15 @@ class SaleResponse(BaseModel):
     user_id: int
     store_id: int
     receipt_number: str
-    line_items: List[SaleLineItemResponse]
 
     class Config:
         from_attributes = True
+
+
+class SaleSummary(SaleBase):
+    """A sale without its line items (GET /sales?include=summary)"""
+    item_count: int
+
+
+class SaleResponse(SaleBase):
+    line_items: List[SaleLineItemResponse]
@@ -0,0 +1,51 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy import Date, DateTime, func, insert, literal, select
+from sqlalchemy.orm import Session
+from app.models.analytics import DailySalesRollup, InventoryValuationSnapshot
+from app.models.inventory import Inventory
+from app.models.product import Product
+from app.models.sale import Sale
+
+
+def rebuild_daily_sales_rollups(db: Session, start: date, end: date) -> None:
+    """Recompute per-store daily sales totals for days in [start, end)"""
+    db.query(DailySalesRollup).filter(
+        DailySalesRollup.sale_date >= start,
+        DailySalesRollup.sale_date < end
+    ).delete(synchronize_session=False)
+    
+    day = func.date(Sale.date)
+    db.execute(insert(DailySalesRollup).from_select(
+        ["store_id", "sale_date", "total_sales", "transaction_count", "rebuilt_at"],
+        select(
+            Sale.store_id, day, func.sum(Sale.final_amount), func.count(Sale.sale_id),
+            literal(datetime.utcnow(), DateTime)
+        ).where(
+            Sale.date >= datetime.combine(start, datetime.min.time()),
+            Sale.date < datetime.combine(end, datetime.min.time())
+        ).group_by(Sale.store_id, day)
+    ))
+
+
+def snapshot_inventory_valuation(db: Session, snapshot_date: date) -> None:
+    """Record every store's stock count and value at cost for a day (replacing a rerun)"""
+    db.query(InventoryValuationSnapshot).filter(
+        InventoryValuationSnapshot.snapshot_date == snapshot_date
+    ).delete(synchronize_session=False)
+    
+    db.execute(insert(InventoryValuationSnapshot).from_select(
+        ["store_id", "snapshot_date", "total_items", "total_quantity", "total_value", "created_at"],
+        select(
+            Inventory.store_id,
+            literal(snapshot_date, Date),
+            func.count(Inventory.inventory_id),
+            func.coalesce(func.sum(Inventory.quantity), 0),
+            func.coalesce(func.sum(Inventory.quantity * Product.cost), 0),
+            literal(datetime.utcnow(), DateTime)
+        ).join(Product, Inventory.product_id == Product.product_id).group_by(Inventory.store_id)
+    ))
+
+
+def closed_days_start() -> date:
+    """First day still read live; rollups are only trusted for days before it"""
+    return date.today() - timedelta(days=1)
@@ -0,0 +1,43 @@
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app.models.product import Product
+from app.models.sync import SyncCounter, ProductTombstone
+
+CATALOG_COUNTER = "catalog"
+
+
+def next_catalog_version(db: Session) -> int:
+    """
+    Allocate the next catalog change version.
+
+    The counter row stays locked until the caller commits, so catalog writes
+    commit in version order and a reader never sees version N+1 before N.
+    """
+    value = db.execute(
+        update(SyncCounter)
+        .where(SyncCounter.name == CATALOG_COUNTER)
+        .values(value=SyncCounter.value + 1)
+        .returning(SyncCounter.value)
+    ).scalar()
+    if value is None:
+        # Databases created with create_all have no seeded counter row
+        db.add(SyncCounter(name=CATALOG_COUNTER, value=1))
+        db.flush()
+        value = 1
+    return value
+
+
+def current_catalog_version(db: Session) -> int:
+    """Highest committed catalog version"""
+    value = db.query(SyncCounter.value).filter(SyncCounter.name == CATALOG_COUNTER).scalar()
+    return value or 0
+
+
+def touch_product(db: Session, product: Product) -> None:
+    """Stamp a created or updated product with a new catalog version"""
+    product.change_version = next_catalog_version(db)
+
+
+def tombstone_product(db: Session, product_id: int) -> None:
+    """Record a product deletion for delta sync clients"""
+    db.merge(ProductTombstone(product_id=product_id, change_version=next_catalog_version(db)))
@@ -0,0 +1,92 @@
+"""
+Customer lookup by phone prefix (checkout typeahead)
+
+On PostgreSQL the prefix match runs on the varchar_pattern_ops index.
+Elsewhere each worker keeps a sorted in-memory array of phones and bisects
+it; the array is topped up with customers created since it was last used
+(phones cannot be changed once a customer exists).
+
+Very broad prefixes are capped at CUSTOMER_SEARCH_CANDIDATES matches before
+ranking, which keeps the lookup bounded however many customers share it.
+That also lets the "spend" ranking include loyalty accruals not folded yet.
+"""
+import bisect
+import threading
+from typing import List
+from sqlalchemy import desc, func
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.customer import Customer
+from app.services.loyalty import pending_deltas
+
+RANKINGS = {
+    "recent": (desc(func.coalesce(Customer.last_purchase_at, Customer.created_at)), Customer.customer_id),
+    "spend": (desc(Customer.total_spent), Customer.customer_id),
+}
+
+
+class PhonePrefixIndex:
+    def __init__(self):
+        self._phones: List[str] = []
+        self._ids: List[int] = []
+        self._max_id = 0
+        self._lock = threading.Lock()
+
+    def _refresh(self, db: Session) -> None:
+        new = db.query(Customer.customer_id, Customer.phone).filter(
+            Customer.customer_id > self._max_id
+        ).order_by(Customer.customer_id).all()
+        if not new:
+            return
+        if len(new) > len(self._phones) // 10:
+            rows = sorted(zip(self._phones + [p for _, p in new], self._ids + [i for i, _ in new]))
+            self._phones = [phone for phone, _ in rows]
+            self._ids = [customer_id for _, customer_id in rows]
+        else:
+            for customer_id, phone in new:
+                position = bisect.bisect_left(self._phones, phone)
+                self._phones.insert(position, phone)
+                self._ids.insert(position, customer_id)
+        self._max_id = new[-1].customer_id
+
+    def match(self, db: Session, prefix: str, limit: int) -> List[int]:
+        """Ids of up to `limit` customers whose phone starts with `prefix`"""
+        with self._lock:
+            self._refresh(db)
+            start = bisect.bisect_left(self._phones, prefix)
+            end = min(start + limit, len(self._phones))
+            matches = []
+            for position in range(start, end):
+                if not self._phones[position].startswith(prefix):
+                    break
+                matches.append(self._ids[position])
+            return matches
+
+
+phone_index = PhonePrefixIndex()
+
+
+def search_by_phone_prefix(db: Session, prefix: str, limit: int, rank: str) -> List[Customer]:
+    """Customers whose phone starts with `prefix`, best `rank`ed first"""
+    candidates = settings.CUSTOMER_SEARCH_CANDIDATES
+    query = db.query(Customer)
+    if db.get_bind().dialect.name == "postgresql":
+        escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        matching = db.query(Customer.customer_id).filter(
+            Customer.phone.like(f"{escaped}%", escape="\\")
+        ).limit(candidates).subquery()
+        query = query.join(matching, Customer.customer_id == matching.c.customer_id)
+    else:
+        ids = phone_index.match(db, prefix, candidates)
+        if not ids:
+            return []
+        query = query.filter(Customer.customer_id.in_(ids))
+    if rank == "spend":
+        # Folded order first, then re-ranked with the pending deltas (candidates are already bounded)
+        customers = query.order_by(*RANKINGS[rank]).all()
+        pending = pending_deltas(db, (customer.customer_id for customer in customers))
+        customers.sort(key=lambda customer: (
+            -((customer.total_spent or 0) + pending.get(customer.customer_id, (0, 0))[0]), customer.customer_id
+        ))
+        return customers[:limit]
+    return query.order_by(*RANKINGS[rank]).limit(limit).all()
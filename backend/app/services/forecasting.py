@@ -0,0 +1,244 @@
+"""
+Demand forecasting and reorder suggestions
+
+For each store, daily unit sales of every stocked product over the last
+FORECAST_HISTORY_DAYS are loaded into a (products x days) NumPy matrix and
+all SKUs are forecast at once:
+
+- moving average over the last FORECAST_MOVING_AVERAGE_DAYS,
+- simple exponential smoothing (closed form: a weighted dot product),
+- safety stock = z * daily demand std * sqrt(lead time),
+- reorder point = smoothed demand * lead time + safety stock.
+
+Results replace the store's rows in reorder_suggestions in bulk and can
+optionally be applied to Inventory.reorder_level. Multi-store runs spread
+stores across a process pool.
+
+Usage (from backend/):
+    python -m app.services.forecasting [--store 1 --store 2] [--apply]
+"""
+import argparse
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+import numpy as np
+from sqlalchemy import bindparam, func, insert, text, update
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.base import SessionLocal
+from app.models.shards import dispose_engines, session_for_store
+from app.models.forecast import ReorderSuggestion
+from app.models.inventory import Inventory
+from app.models.sale import Sale, SaleLineItem
+from app.models.store import Store
+from app.services.inventory import bump_inventory_version
+from app.services.partitions import SALE_LINE_ITEM_JOIN
+from app.utils.serialization import pg_array_literal
+
+
+@dataclass
+class ForecastParams:
+    history_days: int = settings.FORECAST_HISTORY_DAYS
+    moving_average_days: int = settings.FORECAST_MOVING_AVERAGE_DAYS
+    alpha: float = settings.FORECAST_SMOOTHING_ALPHA
+    lead_time_days: int = settings.FORECAST_LEAD_TIME_DAYS
+    service_level_z: float = settings.FORECAST_SERVICE_LEVEL_Z
+
+
+def load_demand(db: Session, store_id: int, params: ForecastParams, end: date):
+    """
+    Stocked products of a store and their daily unit sales.
+
+    Returns (product_ids, quantities, demand) where demand[i, d] is the units
+    of product_ids[i] sold on day d of the window ending the day before `end`.
+    """
+    stock = db.query(Inventory.product_id, Inventory.quantity).filter(
+        Inventory.store_id == store_id
+    ).order_by(Inventory.product_id).all()
+    product_ids = np.array([row.product_id for row in stock], dtype=np.int64)
+    quantities = np.array([row.quantity for row in stock], dtype=np.float64)
+    demand = np.zeros((len(product_ids), params.history_days), dtype=np.float64)
+    if not len(product_ids):
+        return product_ids, quantities, demand
+
+    start = end - timedelta(days=params.history_days)
+    day = func.date(Sale.date)
+    rows = db.query(
+        SaleLineItem.product_id, day, func.sum(SaleLineItem.quantity)
+    ).join(Sale, SALE_LINE_ITEM_JOIN).filter(
+        Sale.store_id == store_id,
+        Sale.date >= datetime.combine(start, datetime.min.time()),
+        Sale.date < datetime.combine(end, datetime.min.time()),
+        # Repeated on the line items' own partition key so they prune too
+        SaleLineItem.sale_date >= datetime.combine(start, datetime.min.time()),
+        SaleLineItem.sale_date < datetime.combine(end, datetime.min.time())
+    ).group_by(SaleLineItem.product_id, day).all()
+    if not rows:
+        return product_ids, quantities, demand
+
+    sold_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    # func.date returns a date on PostgreSQL and an ISO string on SQLite
+    days = np.fromiter(
+        ((date.fromisoformat(str(row[1])[:10]) - start).days for row in rows), dtype=np.int64, count=len(rows)
+    )
+    units = np.fromiter((row[2] for row in rows), dtype=np.float64, count=len(rows))
+
+    # Sales of products no longer stocked at the store are dropped
+    index = np.searchsorted(product_ids, sold_ids)
+    index[index == len(product_ids)] = 0
+    keep = product_ids[index] == sold_ids
+    np.add.at(demand, (index[keep], days[keep]), units[keep])
+    return product_ids, quantities, demand
+
+
+def forecast(demand: np.ndarray, quantities: np.ndarray, params: ForecastParams) -> Dict[str, np.ndarray]:
+    """Forecast every row of the demand matrix at once"""
+    history = demand.shape[1]
+    window = min(params.moving_average_days, history)
+    moving_average = demand[:, -window:].mean(axis=1)
+
+    # Exponential smoothing level after the last day, seeded with the first day:
+    # alpha * sum((1 - alpha)^k * x[t-k]) + (1 - alpha)^n * x[0]
+    decay = 1 - params.alpha
+    weights = params.alpha * decay ** np.arange(history - 1, -1, -1)
+    smoothed = demand @ weights + decay ** history * demand[:, 0]
+
+    demand_std = demand.std(axis=1, ddof=1) if history > 1 else np.zeros(len(demand))
+    safety_stock = params.service_level_z * demand_std * math.sqrt(params.lead_time_days)
+    reorder_point = smoothed * params.lead_time_days + safety_stock
+    # Order up to one more lead time of demand above the reorder point
+    order_up_to = reorder_point + smoothed * params.lead_time_days
+    suggested = np.where(quantities <= reorder_point, np.ceil(np.maximum(order_up_to - quantities, 0)), 0)
+
+    return {
+        "moving_average": moving_average,
+        "smoothed_demand": smoothed,
+        "demand_std": demand_std,
+        "safety_stock": safety_stock,
+        "reorder_point": reorder_point,
+        "current_quantity": quantities,
+        "suggested_order_quantity": suggested,
+    }
+
+
+def _write_results(db: Session, store_id: int, product_ids: np.ndarray, results: Dict[str, np.ndarray],
+                   apply: bool) -> None:
+    """Replace the store's suggestions (and optionally reorder levels) in bulk"""
+    generated_at = datetime.utcnow()
+    columns = {name: np.round(values, 3).tolist() for name, values in results.items()}
+    ids = product_ids.tolist()
+
+    if db.get_bind().dialect.name == "postgresql":
+        # One statement over column arrays rather than an executemany per row.
+        # Upserting in place and then dropping stale rows avoids re-inserting
+        # over the dead tuples a delete-then-insert would leave behind.
+        names = ", ".join(columns)
+        arrays = ", ".join(f"CAST(:{name} AS double precision[])" for name in columns)
+        updates = ", ".join(f"{name} = excluded.{name}" for name in [*columns, "generated_at"])
+        db.execute(text(
+            f"INSERT INTO reorder_suggestions (store_id, product_id, generated_at, {names}) "
+            f"SELECT :store_id, product_id, :generated_at, {names} "
+            f"FROM unnest(CAST(:product_ids AS integer[]), {arrays}) AS t(product_id, {names}) "
+            f"ON CONFLICT (store_id, product_id) DO UPDATE SET {updates}"
+        ), {"store_id": store_id, "generated_at": generated_at, "product_ids": pg_array_literal(ids),
+            **{name: pg_array_literal(values) for name, values in columns.items()}})
+        db.query(ReorderSuggestion).filter(
+            ReorderSuggestion.store_id == store_id,
+            ReorderSuggestion.generated_at < generated_at
+        ).delete(synchronize_session=False)
+        if apply:
+            db.execute(text(
+                "UPDATE inventory SET reorder_level = t.reorder_level "
+                "FROM unnest(CAST(:product_ids AS integer[]), CAST(:levels AS double precision[])) "
+                "AS t(product_id, reorder_level) "
+                "WHERE inventory.store_id = :store_id AND inventory.product_id = t.product_id"
+            ), {"store_id": store_id, "product_ids": pg_array_literal(ids),
+                "levels": pg_array_literal(np.round(results["reorder_point"], 1).tolist())})
+    else:
+        db.query(ReorderSuggestion).filter(ReorderSuggestion.store_id == store_id).delete(
+            synchronize_session=False
+        )
+        if not ids:
+            return
+        db.execute(insert(ReorderSuggestion), [
+            {"store_id": store_id, "product_id": product_id, "generated_at": generated_at,
+             **{name: values[i] for name, values in columns.items()}}
+            for i, product_id in enumerate(ids)
+        ])
+        if apply:
+            db.connection().execute(
+                update(Inventory.__table__).where(
+                    Inventory.store_id == store_id,
+                    Inventory.product_id == bindparam("b_product_id")
+                ).values(reorder_level=bindparam("b_reorder_level")),
+                [{"b_product_id": product_id, "b_reorder_level": round(level, 1)}
+                 for product_id, level in zip(ids, columns["reorder_point"])]
+            )
+    if apply:
+        bump_inventory_version(db, store_id)
+
+
+def forecast_store(store_id: int, params: Optional[ForecastParams] = None, apply: bool = False) -> dict:
+    """Forecast one store and replace its reorder suggestions in one transaction"""
+    params = params or ForecastParams()
+    db = session_for_store(store_id)
+    try:
+        product_ids, quantities, demand = load_demand(db, store_id, params, date.today())
+        results = forecast(demand, quantities, params)
+        _write_results(db, store_id, product_ids, results, apply)
+        db.commit()
+        return {
+            "store_id": store_id,
+            "products": len(product_ids),
+            "to_reorder": int(np.count_nonzero(results["suggested_order_quantity"])),
+        }
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _init_worker():
+    # Connections inherited from the parent process must not be reused
+    dispose_engines(close=False)
+
+
+def run_forecasts(
+    store_ids: Optional[List[int]] = None,
+    params: Optional[ForecastParams] = None,
+    apply: bool = False,
+    workers: Optional[int] = None,
+) -> List[dict]:
+    """Forecast the given stores (default: all), one store per pool process"""
+    if store_ids is None:
+        db = SessionLocal()
+        try:
+            store_ids = [store_id for (store_id,) in db.query(Store.store_id).order_by(Store.store_id)]
+        finally:
+            db.close()
+    if len(store_ids) <= 1:
+        return [forecast_store(store_id, params, apply) for store_id in store_ids]
+
+    workers = workers or settings.FORECAST_WORKERS or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=min(workers, len(store_ids)), initializer=_init_worker) as pool:
+        futures = [pool.submit(forecast_store, store_id, params, apply) for store_id in store_ids]
+        return [future.result() for future in futures]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute demand forecasts and reorder suggestions")
+    parser.add_argument("--store", type=int, action="append", dest="stores", help="Store id (repeatable)")
+    parser.add_argument("--apply", action="store_true", help="Also set Inventory.reorder_level to the reorder point")
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    for result in run_forecasts(args.stores, apply=args.apply, workers=args.workers):
+        print(result)
+
+
+if __name__ == "__main__":
+    main()
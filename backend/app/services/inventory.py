@@ -0,0 +1,176 @@
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import bindparam, func, insert, select, text, update
+from sqlalchemy.orm import Session
+from app.models.store import Store
+from app.models.inventory import Inventory, InventoryLot
+from app.utils.serialization import pg_array_literal
+
+# Must match the ix_inventory_low_stock partial index predicate exactly
+LOW_STOCK = Inventory.quantity - Inventory.reorder_level <= 0
+
+
+def bump_inventory_version(db: Session, store_id: int) -> None:
+    """
+    Mark a store's inventory as changed.
+
+    Call it in the same transaction as the inventory write, as late as
+    possible before commit, so the store row lock is held only briefly.
+    """
+    db.query(Store).filter(Store.store_id == store_id).update(
+        {Store.inventory_version: Store.inventory_version + 1},
+        synchronize_session=False
+    )
+
+
+def get_inventory_version(db: Session, store_id: Optional[int] = None) -> int:
+    """Current inventory version of one store, or of all stores combined"""
+    if store_id is None:
+        return db.query(func.coalesce(func.sum(Store.inventory_version), 0)).scalar()
+    version = db.query(Store.inventory_version).filter(Store.store_id == store_id).scalar()
+    return version or 0
+
+
+def receive_lot(db: Session, inventory: Inventory, quantity: float, expiry_date: date) -> InventoryLot:
+    """Record incoming stock as a lot; the caller adds it to inventory.quantity"""
+    lot = InventoryLot(
+        product_id=inventory.product_id,
+        store_id=inventory.store_id,
+        quantity=quantity,
+        expiry_date=expiry_date
+    )
+    db.add(lot)
+    if inventory.expiry_date is None or expiry_date < inventory.expiry_date:
+        inventory.expiry_date = expiry_date
+    return lot
+
+
+def consume_lots(db: Session, inventory: Inventory, quantity: float) -> None:
+    """
+    Draw stock down first-expiry-first-out.
+
+    Takes `quantity` from the product's lots at the store in expiry order,
+    deleting emptied lots; anything beyond the lotted stock comes out of
+    untracked stock. Keeps inventory.expiry_date on the earliest remaining lot.
+    """
+    lots = db.query(InventoryLot).filter(
+        InventoryLot.store_id == inventory.store_id,
+        InventoryLot.product_id == inventory.product_id
+    ).order_by(InventoryLot.expiry_date, InventoryLot.lot_id).with_for_update().all()
+    
+    remaining = quantity
+    for lot in lots:
+        if remaining <= 0:
+            break
+        taken = min(lot.quantity, remaining)
+        lot.quantity -= taken
+        remaining -= taken
+        if lot.quantity <= 0:
+            db.delete(lot)
+    
+    if lots:
+        left = [lot for lot in lots if lot.quantity > 0]
+        inventory.expiry_date = left[0].expiry_date if left else None
+
+
+def move_lots(db: Session, from_store_id: int, to_store_id: int,
+              quantities: Dict[int, float]) -> Dict[int, Tuple[Optional[date], Optional[date]]]:
+    """
+    Move lotted stock of many products between stores first-expiry-first-out.
+
+    Lots taken at the source arrive at the destination with their expiry
+    dates; anything beyond the lotted stock moves as untracked stock. Lots
+    of all products are read in one query and written back in bulk.
+    Returns, for products that had lots at the source, (earliest expiry
+    left at the source, earliest expiry moved).
+    """
+    lots = db.query(
+        InventoryLot.lot_id, InventoryLot.product_id, InventoryLot.quantity, InventoryLot.expiry_date
+    ).filter(
+        InventoryLot.store_id == from_store_id,
+        InventoryLot.product_id.in_(quantities)
+    ).order_by(
+        InventoryLot.product_id, InventoryLot.expiry_date, InventoryLot.lot_id
+    ).with_for_update().all()
+    
+    remaining = dict(quantities)
+    emptied, reduced, moved = [], [], []
+    expiries: Dict[int, Tuple[Optional[date], Optional[date]]] = {}
+    for lot in lots:
+        left_expiry, moved_expiry = expiries.get(lot.product_id, (None, None))
+        taken = min(lot.quantity, remaining[lot.product_id])
+        remaining[lot.product_id] -= taken
+        if taken > 0:
+            moved.append({"product_id": lot.product_id, "store_id": to_store_id,
+                          "quantity": taken, "expiry_date": lot.expiry_date})
+            moved_expiry = moved_expiry or lot.expiry_date
+        if taken >= lot.quantity:
+            emptied.append(lot.lot_id)
+        else:
+            if taken > 0:
+                reduced.append({"b_lot_id": lot.lot_id, "b_quantity": lot.quantity - taken})
+            left_expiry = left_expiry or lot.expiry_date
+        expiries[lot.product_id] = (left_expiry, moved_expiry)
+    
+    if emptied:
+        db.query(InventoryLot).filter(InventoryLot.lot_id.in_(emptied)).delete(synchronize_session=False)
+    if reduced:
+        db.connection().execute(
+            update(InventoryLot.__table__).where(
+                InventoryLot.lot_id == bindparam("b_lot_id")
+            ).values(quantity=bindparam("b_quantity")),
+            reduced
+        )
+    if moved:
+        db.execute(insert(InventoryLot), moved)
+    return expiries
+
+
+def apply_stock_changes(db: Session, changes: Sequence[Tuple[int, float, Optional[date]]]) -> None:
+    """
+    Add quantity deltas to many inventory rows and set their expiry dates.
+
+    `changes` holds (inventory_id, delta, expiry_date) and is applied in one
+    statement on PostgreSQL. Callers lock the rows first.
+    """
+    now = datetime.utcnow()
+    if db.get_bind().dialect.name == "postgresql":
+        ids, deltas, expiries = zip(*changes)
+        db.execute(text(
+            "UPDATE inventory SET quantity = inventory.quantity + t.delta, "
+            "expiry_date = t.expiry_date, last_updated = :now "
+            "FROM unnest(CAST(:ids AS integer[]), CAST(:deltas AS double precision[]), "
+            "CAST(:expiries AS date[])) AS t(inventory_id, delta, expiry_date) "
+            "WHERE inventory.inventory_id = t.inventory_id"
+        ), {"now": now, "ids": pg_array_literal(ids), "deltas": pg_array_literal(deltas),
+            "expiries": pg_array_literal(expiries)})
+    else:
+        db.connection().execute(
+            update(Inventory.__table__).where(
+                Inventory.inventory_id == bindparam("b_inventory_id")
+            ).values(
+                quantity=Inventory.quantity + bindparam("b_delta"),
+                expiry_date=bindparam("b_expiry_date"),
+                last_updated=now
+            ),
+            [{"b_inventory_id": inventory_id, "b_delta": delta, "b_expiry_date": expiry_date}
+             for inventory_id, delta, expiry_date in changes]
+        )
+
+
+def seed_lots_from_inventory(db, store_ids: Optional[List[int]] = None) -> None:
+    """
+    Create one lot per inventory row that has stock and an expiry date.
+
+    For bulk loaders that write Inventory rows directly; `db` may be a
+    Session or a Connection.
+    """
+    rows = select(
+        Inventory.product_id, Inventory.store_id, Inventory.quantity,
+        Inventory.expiry_date, Inventory.last_updated
+    ).where(Inventory.expiry_date.isnot(None), Inventory.quantity > 0)
+    if store_ids is not None:
+        rows = rows.where(Inventory.store_id.in_(store_ids))
+    db.execute(insert(InventoryLot).from_select(
+        ["product_id", "store_id", "quantity", "expiry_date", "received_at"], rows
+    ))
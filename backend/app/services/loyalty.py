@@ -0,0 +1,172 @@
+"""
+Customer loyalty accrual
+
+In "ledger" mode (default) a sale appends a LoyaltyLedgerEntry and never
+touches the customer row, so concurrent sales to one account don't contend.
+`fold_ledger()` periodically adds the new entries to the Customer totals in
+one set-based update; reads add the not-yet-folded delta on top.
+In "atomic" mode the customer row is incremented in SQL instead.
+
+Sales on a shard append to that shard's ledger, in the same transaction
+that marks their outbox event done. Customers live on the default
+database, which also keeps one fold watermark per shard (folded_counter).
+"""
+import hashlib
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import bindparam, case, func, select, text, update
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.customer import Customer
+from app.models.loyalty import LoyaltyLedgerEntry
+from app.models.shards import fan_out, is_sharded, session_url
+from app.models.sync import SyncCounter
+from app.schemas.customer import CustomerResponse
+
+FOLDED_COUNTER = "loyalty_folded"
+
+
+def points_for(amount: float) -> int:
+    """1 point per $10 spent"""
+    return int(amount / 10)
+
+
+def apply_sale(db: Session, payload: dict) -> None:
+    """Outbox handler for sale.completed: credit the customer's spend and points"""
+    if not payload.get("customer_id"):
+        return
+    amount = payload["final_amount"]
+    # Events are delivered after the sale, possibly much later on retries
+    sale_date = datetime.fromisoformat(payload["sale_date"]) if payload.get("sale_date") else datetime.utcnow()
+    # Customer rows can only be written on the default database; shards always use their ledger
+    if settings.LOYALTY_ACCRUAL_MODE == "atomic" and session_url(db) == settings.DATABASE_URL:
+        db.execute(
+            update(Customer)
+            .where(Customer.customer_id == payload["customer_id"])
+            .values(
+                total_spent=func.coalesce(Customer.total_spent, 0) + amount,
+                loyalty_points=func.coalesce(Customer.loyalty_points, 0) + points_for(amount),
+                last_purchase_at=sale_date
+            )
+        )
+    else:
+        db.add(LoyaltyLedgerEntry(
+            customer_id=payload["customer_id"],
+            sale_id=payload.get("sale_id"),
+            amount=amount,
+            points=points_for(amount),
+            sale_date=sale_date
+        ))
+
+
+def folded_counter(url: str) -> str:
+    """Sync counter, on the default database, holding the highest entry_id folded from a shard's ledger"""
+    if url == settings.DATABASE_URL:
+        return FOLDED_COUNTER
+    return f"{FOLDED_COUNTER}:{hashlib.sha1(url.encode()).hexdigest()[:12]}"
+
+
+def folded_through(db: Session, counter: str = FOLDED_COUNTER) -> int:
+    """Highest ledger entry_id already included in Customer totals"""
+    value = db.query(SyncCounter.value).filter(SyncCounter.name == counter).scalar()
+    return value or 0
+
+
+def fold_ledger(db: Session, ledger_db: Optional[Session] = None) -> int:
+    """
+    Add unfolded entries of a shard's ledger (default: db's own) to Customer
+    totals on `db`, the default database; returns the number of customers
+    updated. The caller commits `db` before ending `ledger_db`'s transaction.
+    """
+    ledger_db = ledger_db or db
+    if ledger_db.get_bind().dialect.name == "postgresql":
+        # Waits for in-flight accruals to commit, so no lower entry_id can appear after the watermark moves
+        ledger_db.execute(text("LOCK TABLE loyalty_ledger IN SHARE MODE"))
+    counter = folded_counter(session_url(ledger_db))
+    start = folded_through(db, counter)
+    end = ledger_db.query(func.max(LoyaltyLedgerEntry.entry_id)).scalar()
+    if not end or end <= start:
+        return 0
+    
+    deltas = select(
+        LoyaltyLedgerEntry.customer_id,
+        func.sum(LoyaltyLedgerEntry.amount).label("amount"),
+        func.sum(LoyaltyLedgerEntry.points).label("points"),
+        func.max(func.coalesce(LoyaltyLedgerEntry.sale_date, LoyaltyLedgerEntry.created_at)).label("last_purchase_at")
+    ).where(
+        LoyaltyLedgerEntry.entry_id > start,
+        LoyaltyLedgerEntry.entry_id <= end
+    ).group_by(LoyaltyLedgerEntry.customer_id)
+    if ledger_db is db:
+        deltas = deltas.subquery()
+        updated = db.execute(
+            _credit(deltas.c.amount, deltas.c.points, deltas.c.last_purchase_at)
+            .where(Customer.customer_id == deltas.c.customer_id)
+        ).rowcount
+    else:
+        # Customers are on another database: bring the per-customer deltas over in one executemany
+        rows = [
+            {"delta_customer": customer_id, "delta_amount": amount, "delta_points": points, "delta_last": last}
+            for customer_id, amount, points, last in ledger_db.execute(deltas)
+        ]
+        db.connection().execute(
+            _credit(bindparam("delta_amount"), bindparam("delta_points"), bindparam("delta_last"))
+            .where(Customer.customer_id == bindparam("delta_customer")),
+            rows
+        )
+        updated = len(rows)
+    
+    if not db.query(SyncCounter).filter(SyncCounter.name == counter).update({SyncCounter.value: end}):
+        db.add(SyncCounter(name=counter, value=end))
+    return updated
+
+
+def _credit(amount, points, last_purchase_at):
+    """UPDATE of Customer adding amount and points, keeping the later last_purchase_at"""
+    return update(Customer).values(
+        total_spent=func.coalesce(Customer.total_spent, 0) + amount,
+        loyalty_points=func.coalesce(Customer.loyalty_points, 0) + points,
+        # Shards are folded one after another, so a later fold may carry older purchases
+        last_purchase_at=case((Customer.last_purchase_at > last_purchase_at, Customer.last_purchase_at),
+                              else_=last_purchase_at)
+    )
+
+
+def pending_deltas(db: Session, customer_ids: Iterable[int]) -> Dict[int, Tuple[float, float]]:
+    """Unfolded (amount, points) per customer, over every shard's ledger"""
+    customer_ids = list(customer_ids)
+    if not customer_ids:
+        return {}
+    watermarks = dict(db.query(SyncCounter.name, SyncCounter.value).filter(
+        SyncCounter.name.startswith(FOLDED_COUNTER)
+    ).all())
+    
+    def shard_deltas(session: Session) -> List[tuple]:
+        return session.query(
+            LoyaltyLedgerEntry.customer_id,
+            func.sum(LoyaltyLedgerEntry.amount),
+            func.sum(LoyaltyLedgerEntry.points)
+        ).filter(
+            LoyaltyLedgerEntry.customer_id.in_(customer_ids),
+            LoyaltyLedgerEntry.entry_id > (watermarks.get(folded_counter(session_url(session))) or 0)
+        ).group_by(LoyaltyLedgerEntry.customer_id).all()
+    
+    deltas: Dict[int, Tuple[float, float]] = {}
+    for rows in (fan_out(shard_deltas) if is_sharded() else [shard_deltas(db)]):
+        for customer_id, amount, points in rows:
+            total_amount, total_points = deltas.get(customer_id, (0, 0))
+            deltas[customer_id] = (total_amount + amount, total_points + points)
+    return deltas
+
+
+def with_pending(db: Session, customers: List[Customer]) -> List[CustomerResponse]:
+    """Customer responses whose totals include accruals not folded yet"""
+    deltas = pending_deltas(db, (customer.customer_id for customer in customers))
+    responses = []
+    for customer in customers:
+        response = CustomerResponse.model_validate(customer)
+        amount, points = deltas.get(customer.customer_id, (0, 0))
+        response.total_spent = (response.total_spent or 0) + amount
+        response.loyalty_points = (response.loyalty_points or 0) + points
+        responses.append(response)
+    return responses
@@ -0,0 +1,90 @@
+"""
+Transactional outbox
+
+Write paths call `enqueue()` inside their own transaction, so a side effect
+is recorded if and only if the write commits. `dispatch_pending()` carries
+the events out afterwards, each in its own transaction, retrying failures
+with exponential backoff until OUTBOX_MAX_ATTEMPTS.
+
+Dispatch runs right after the response (see create_sale) and as a periodic
+Celery sweep that picks up retries and anything a crashed process left behind.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.shards import session_for_url
+from app.models.outbox import OutboxEvent, OutboxStatus
+from app.services import loyalty
+
+logger = logging.getLogger(__name__)
+
+SALE_COMPLETED = "sale.completed"
+
+# event_type -> handler(db, payload); handlers run inside the event's transaction
+HANDLERS: Dict[str, Callable[[Session, dict], None]] = {
+    SALE_COMPLETED: loyalty.apply_sale,
+}
+
+
+def enqueue(db: Session, event_type: str, payload: dict) -> None:
+    """Record a side effect in the caller's transaction"""
+    db.add(OutboxEvent(event_type=event_type, payload=payload))
+
+
+def _dispatch_one(db: Session, event_id: int) -> bool:
+    now = datetime.utcnow()
+    # Claim the event; a concurrent dispatcher that got there first leaves nothing to update
+    claimed = db.query(OutboxEvent).filter(
+        OutboxEvent.event_id == event_id,
+        OutboxEvent.status == OutboxStatus.PENDING
+    ).update(
+        {OutboxEvent.status: OutboxStatus.DONE, OutboxEvent.processed_at: now},
+        synchronize_session=False
+    )
+    if not claimed:
+        db.rollback()
+        return False
+
+    event = db.get(OutboxEvent, event_id)
+    try:
+        HANDLERS[event.event_type](db, event.payload)
+        db.commit()
+        return True
+    except Exception as e:
+        db.rollback()
+        event = db.get(OutboxEvent, event_id)
+        event.attempts += 1
+        event.last_error = f"{type(e).__name__}: {e}"
+        if event.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            event.status = OutboxStatus.DEAD
+            logger.error("Outbox event %s (%s) failed permanently: %s", event_id, event.event_type, e)
+        else:
+            event.available_at = now + timedelta(seconds=min(2 ** event.attempts, 3600))
+        db.commit()
+        return False
+
+
+def dispatch_pending(limit: int = None, url: Optional[str] = None) -> int:
+    """Carry out due events of one shard (default: the main database) in order; returns how many succeeded"""
+    db = session_for_url(url)
+    try:
+        due = db.query(OutboxEvent.event_id).filter(
+            OutboxEvent.status == OutboxStatus.PENDING,
+            OutboxEvent.available_at <= datetime.utcnow()
+        ).order_by(OutboxEvent.available_at, OutboxEvent.event_id).limit(
+            limit or settings.OUTBOX_BATCH_SIZE
+        ).all()
+        db.rollback()
+        return sum(_dispatch_one(db, event_id) for (event_id,) in due)
+    finally:
+        db.close()
+
+
+def purge_processed(db: Session, older_than: datetime) -> int:
+    """Delete events that were handled before `older_than`"""
+    return db.query(OutboxEvent).filter(
+        OutboxEvent.status == OutboxStatus.DONE,
+        OutboxEvent.processed_at < older_than
+    ).delete(synchronize_session=False)
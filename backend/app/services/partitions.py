@@ -0,0 +1,175 @@
+"""
+Monthly partitions of sales and sale_line_items (PostgreSQL)
+
+Migration 0013 turns both tables into range-partitioned parents, sales on
+`date` and sale_line_items on `sale_date` (a copy of its sale's date), with
+one partition per calendar month named <table>_yYYYYmMM. This module keeps
+that layout going:
+
+- ensure_partitions creates the partitions for the coming months, so
+  inserts always have a partition to land in,
+- archive_partitions detaches months older than SALES_RETENTION_MONTHS
+  (line items first, as they reference sales, dropping that foreign key)
+  and moves them to the archive schema, optionally on a cheaper tablespace. Archived months no
+  longer take part in queries, vacuum or index maintenance of the live
+  tables; daily_sales_rollups keeps their totals.
+
+Queries prune to the relevant months when they bound `Sale.date` and, for
+line items, `SaleLineItem.sale_date` (see bound_sale_dates). Everything
+here is a no-op on other databases, where the tables are not partitioned.
+
+Usage (from backend/):
+    python -m app.services.partitions [--no-archive]
+"""
+import argparse
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import and_, text
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.shards import session_for_url, shard_urls
+from app.models.sale import Sale, SaleLineItem
+
+# Partitioned table -> partition key column
+PARTITIONED_TABLES = {"sales": "date", "sale_line_items": "sale_date"}
+SALE_LINE_ITEMS_SALE_FKEY = "sale_line_items_sale_fkey"
+
+# Join line items to their sale on the partition keys too, so both sides
+# prune and matching months can be joined partition by partition
+SALE_LINE_ITEM_JOIN = and_(SaleLineItem.sale_id == Sale.sale_id, SaleLineItem.sale_date == Sale.date)
+
+
+def bound_sale_dates(query, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                     line_items: bool = False):
+    """Filter a sales query to [start, end], on line items' sale_date as well when joined"""
+    if start:
+        query = query.filter(Sale.date >= start)
+        if line_items:
+            query = query.filter(SaleLineItem.sale_date >= start)
+    if end:
+        query = query.filter(Sale.date <= end)
+        if line_items:
+            query = query.filter(SaleLineItem.sale_date <= end)
+    return query
+
+
+def month_start(day: date, offset: int = 0) -> date:
+    """First day of the month `offset` months after `day`'s"""
+    months = day.year * 12 + day.month - 1 + offset
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+
+def is_partitioned(db) -> bool:
+    bind = db.get_bind() if isinstance(db, Session) else db
+    if bind.dialect.name != "postgresql":
+        return False
+    return db.execute(text(
+        "SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass('sales')"
+    )).scalar() or False
+
+
+def attached_partitions(db, table: str) -> List[Tuple[str, date]]:
+    """(partition, month) for every partition attached to `table`, oldest first"""
+    names = db.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "JOIN pg_namespace ns ON ns.oid = child.relnamespace "
+        "WHERE pg_inherits.inhparent = to_regclass(:table) AND ns.nspname = current_schema()"
+    ), {"table": table}).scalars()
+    partitions = []
+    for name in names:
+        suffix = name.rsplit("_y", 1)[-1]
+        year, _, month = suffix.partition("m")
+        if year.isdigit() and month.isdigit():
+            partitions.append((name, date(int(year), int(month), 1)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def ensure_partitions(db, months_ahead: Optional[int] = None, today: Optional[date] = None,
+                      start: Optional[date] = None) -> List[str]:
+    """
+    Create any missing monthly partitions from this month (or `start`'s)
+    through `months_ahead` months from now.
+
+    `db` may be a Session or a Connection; bulk loaders pass `start` to
+    cover the history they are about to write.
+    """
+    if not is_partitioned(db):
+        return []
+    months_ahead = settings.SALES_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    today = today or date.today()
+    first = month_start(min(start, today) if start else today)
+    last = month_start(today, months_ahead)
+    created = []
+    for table in PARTITIONED_TABLES:
+        existing = {month for _, month in attached_partitions(db, table)}
+        month = first
+        while month <= last:
+            if month not in existing:
+                name = partition_name(table, month)
+                db.execute(text(
+                    f"CREATE TABLE {name} PARTITION OF {table} "
+                    f"FOR VALUES FROM ('{month}') TO ('{month_start(month, 1)}')"
+                ))
+                created.append(name)
+            month = month_start(month, 1)
+    return created
+
+
+def archive_partitions(db: Session, retention_months: Optional[int] = None,
+                       today: Optional[date] = None) -> List[str]:
+    """Detach partitions of months before the retention window into the archive schema"""
+    retention_months = settings.SALES_RETENTION_MONTHS if retention_months is None else retention_months
+    if not retention_months or not is_partitioned(db):
+        return []
+    cutoff = month_start(today or date.today(), -retention_months)
+    schema = settings.SALES_ARCHIVE_SCHEMA
+    db.execute(text(f"CREATE SCHEMA IF NOT EXISTS {schema}"))
+
+    archived = []
+    # Line items reference sales, so their month has to leave first
+    for table in ("sale_line_items", "sales"):
+        for name, month in attached_partitions(db, table):
+            if month >= cutoff:
+                break
+            db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            if table == "sale_line_items":
+                # A detached month keeps its key to sales, which its sales month is about to leave
+                db.execute(text(f"ALTER TABLE {name} DROP CONSTRAINT IF EXISTS {SALE_LINE_ITEMS_SALE_FKEY}"))
+            db.execute(text(f"ALTER TABLE {name} SET SCHEMA {schema}"))
+            if settings.SALES_ARCHIVE_TABLESPACE:
+                db.execute(text(f"ALTER TABLE {schema}.{name} SET TABLESPACE {settings.SALES_ARCHIVE_TABLESPACE}"))
+            archived.append(f"{schema}.{name}")
+    return archived
+
+
+def maintain_partitions(archive: bool = True) -> dict:
+    """Create upcoming partitions and archive expired ones, one transaction per shard"""
+    result = {"created": [], "archived": []}
+    for url in shard_urls():
+        db = session_for_url(url)
+        try:
+            result["created"] += ensure_partitions(db)
+            result["archived"] += archive_partitions(db) if archive else []
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create upcoming sales partitions and archive old ones")
+    parser.add_argument("--no-archive", action="store_true", help="Only create upcoming partitions")
+    args = parser.parse_args()
+    print(maintain_partitions(archive=not args.no_archive))
+
+
+if __name__ == "__main__":
+    main()
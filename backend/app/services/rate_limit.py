@@ -0,0 +1,151 @@
+"""
+Token-bucket admission control for expensive route classes
+
+Every route class in RATE_LIMITS has a bucket per user ("rate" tokens per
+second, holding at most "burst") and optionally one shared by all users
+("global_rate" / "global_burst"). A request takes one token from each of its
+buckets, or none if any is empty, in which case it is rejected with the time
+until a token is available.
+
+With RATE_LIMIT_REDIS the buckets live in Redis, updated atomically by one
+Lua script so every worker shares them. Otherwise, and whenever Redis can't
+be reached, each worker keeps its own buckets in memory.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "rate-limit:"
+# How long to stay on local buckets after a Redis error before trying again
+REDIS_RETRY_SECONDS = 30
+# Local buckets kept before idle (refilled) ones are dropped
+MAX_LOCAL_BUCKETS = 10000
+
+# KEYS: bucket keys; ARGV: rate, burst for each key. Returns the seconds to
+# wait as a string ("0" when admitted), since Lua numbers are cast to integers.
+TAKE_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local wait, levels = 0, {}
+for i, key in ipairs(KEYS) do
+    local rate, burst = tonumber(ARGV[2 * i - 1]), tonumber(ARGV[2 * i])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local elapsed = math.max(0, now - (tonumber(state[2]) or now))
+    levels[i] = math.min(burst, tokens + elapsed * rate)
+    if levels[i] < 1 then
+        wait = math.max(wait, (1 - levels[i]) / rate)
+    end
+end
+if wait > 0 then
+    return tostring(wait)
+end
+for i, key in ipairs(KEYS) do
+    local rate, burst = tonumber(ARGV[2 * i - 1]), tonumber(ARGV[2 * i])
+    redis.call('HSET', key, 'tokens', levels[i] - 1, 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(burst / rate * 1000) + 1000)
+end
+return '0'
+"""
+
+Bucket = Tuple[str, float, float]  # key, rate, burst
+
+
+class RateLimiter:
+    def __init__(self, use_redis: bool):
+        self.use_redis = use_redis
+        self._redis = None
+        self._script = None
+        self._redis_down_until = 0.0
+        self._local: Dict[str, List[float]] = {}  # key -> [tokens, updated, full again at] (monotonic)
+        self._lock = threading.Lock()
+
+    def buckets(self, route_class: str, client: str) -> List[Bucket]:
+        limits = settings.RATE_LIMITS.get(route_class) or {}
+        buckets = []
+        if limits.get("rate"):
+            buckets.append((f"{KEY_PREFIX}{route_class}:{client}", limits["rate"], limits.get("burst", 1)))
+        if limits.get("global_rate"):
+            buckets.append((f"{KEY_PREFIX}{route_class}", limits["global_rate"], limits.get("global_burst", 1)))
+        return buckets
+
+    def take(self, route_class: str, client: str) -> float:
+        """Take a token for `client` in `route_class`; 0 if admitted, else seconds until one is available"""
+        buckets = self.buckets(route_class, client)
+        if not buckets:
+            return 0.0
+        if self.use_redis and time.monotonic() >= self._redis_down_until:
+            try:
+                return self._take_redis(buckets)
+            except Exception as exc:
+                self._redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+                logger.warning("Rate limiting on local buckets for %ss, Redis failed: %s", REDIS_RETRY_SECONDS, exc)
+        return self._take_local(buckets)
+
+    def _take_redis(self, buckets: List[Bucket]) -> float:
+        if self._script is None:
+            import redis
+            # Short timeouts: a slow Redis must not hold up the requests it admits
+            self._redis = redis.Redis.from_url(settings.REDIS_URL, socket_timeout=0.2, socket_connect_timeout=0.2)
+            self._script = self._redis.register_script(TAKE_SCRIPT)
+        args = [value for _, rate, burst in buckets for value in (rate, burst)]
+        return float(self._script(keys=[key for key, _, _ in buckets], args=args))
+
+    def _take_local(self, buckets: List[Bucket]) -> float:
+        now = time.monotonic()
+        with self._lock:
+            if len(self._local) > MAX_LOCAL_BUCKETS:
+                # A missing bucket starts full, so refilled ones can go
+                self._local = {key: state for key, state in self._local.items() if state[2] > now}
+            levels = []
+            wait = 0.0
+            for key, rate, burst in buckets:
+                tokens, updated, _ = self._local.get(key, (burst, now, now))
+                level = min(burst, tokens + (now - updated) * rate)
+                levels.append(level)
+                if level < 1:
+                    wait = max(wait, (1 - level) / rate)
+            if wait:
+                return wait
+            for (key, rate, burst), level in zip(buckets, levels):
+                self._local[key] = [level - 1, now, now + (burst - level + 1) / rate]
+            return 0.0
+
+
+limiter = RateLimiter(use_redis=settings.RATE_LIMIT_REDIS)
+
+
+class ConcurrencyLimiter:
+    """
+    Requests of a route class in flight in this worker, capped by its
+    "concurrency" limit. Requests entering under the same key count once
+    (identical requests that single_flight lets share one computation).
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, Counter] = {}
+        self._lock = threading.Lock()
+
+    def enter(self, route_class: str, request_key: str) -> bool:
+        cap = (settings.RATE_LIMITS.get(route_class) or {}).get("concurrency")
+        with self._lock:
+            running = self._in_flight.setdefault(route_class, Counter())
+            if cap and request_key not in running and len(running) >= cap:
+                return False
+            running[request_key] += 1
+            return True
+
+    def exit(self, route_class: str, request_key: str) -> None:
+        with self._lock:
+            running = self._in_flight[route_class]
+            running[request_key] -= 1
+            if not running[request_key]:
+                del running[request_key]
+
+
+in_flight = ConcurrencyLimiter()
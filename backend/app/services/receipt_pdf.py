@@ -0,0 +1,216 @@
+"""
+PDF receipts for reprints
+
+Sales are loaded once into plain dicts (see load_receipts) so rendering
+needs no database access and can run in other processes:
+
+- a single receipt is rendered in the request,
+- bulk reprints are rendered across a shared process pool and streamed out
+  as one zip archive while later receipts are still rendering.
+
+Store headers are laid out (wrapped and measured) once per store and cached;
+each PDF then draws the header from a form XObject built from that layout.
+"""
+import io
+import multiprocessing
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Optional, Tuple
+from reportlab.lib.units import mm
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+from sqlalchemy.orm import Session, selectinload
+from app.config import settings
+from app.models.product import Product
+from app.models.sale import Sale
+from app.models.store import Store
+from app.models.user import User
+
+PAGE_WIDTH = 80 * mm  # thermal roll
+MARGIN = 4 * mm
+LINE_HEIGHT = 3.6 * mm
+FONT = "Courier"
+FONT_BOLD = "Courier-Bold"
+FONT_SIZE = 8
+
+# (font, size, text) per header line
+HeaderLayout = Tuple[Tuple[str, float, str], ...]
+
+
+def load_receipts(db: Session, sale_query) -> List[dict]:
+    """Everything needed to print the sales selected by `sale_query`, as picklable dicts"""
+    sales = sale_query.options(selectinload(Sale.line_items)).all()
+    if not sales:
+        return []
+    product_ids = {item.product_id for sale in sales for item in sale.line_items}
+    products = dict(db.query(Product.product_id, Product.name).filter(Product.product_id.in_(product_ids)))
+    stores = {
+        store.store_id: store
+        for store in db.query(Store).filter(Store.store_id.in_({sale.store_id for sale in sales}))
+    }
+    cashiers = dict(db.query(User.user_id, User.username).filter(User.user_id.in_({sale.user_id for sale in sales})))
+
+    return [
+        {
+            "receipt_number": sale.receipt_number,
+            "date": sale.date,
+            "store_name": stores[sale.store_id].name,
+            "store_location": stores[sale.store_id].location or "",
+            "cashier": cashiers.get(sale.user_id, ""),
+            "payment_method": sale.payment_method.value.upper(),
+            "total_amount": sale.total_amount,
+            "discount_amount": sale.discount_amount or 0,
+            "tax_amount": sale.tax_amount or 0,
+            "final_amount": sale.final_amount,
+            "lines": [
+                (products.get(item.product_id, f"Product {item.product_id}"), item.quantity, item.unit_price,
+                 item.discount or 0, item.total)
+                for item in sale.line_items
+            ],
+        }
+        for sale in sales
+    ]
+
+
+@lru_cache(maxsize=512)
+def header_layout(store_name: str, store_location: str) -> HeaderLayout:
+    """Wrap a store's header text to the roll width (cached per store)"""
+    width = PAGE_WIDTH - 2 * MARGIN
+    lines = [(FONT_BOLD, FONT_SIZE + 3, text) for text in simpleSplit(store_name, FONT_BOLD, FONT_SIZE + 3, width)]
+    lines += [(FONT, FONT_SIZE, text) for text in simpleSplit(store_location, FONT, FONT_SIZE, width)]
+    return tuple(lines)
+
+
+def _draw_header(pdf: canvas.Canvas, layout: HeaderLayout, top: float) -> None:
+    pdf.beginForm("header")
+    y = top
+    for font, size, text in layout:
+        y -= size * 1.3
+        pdf.setFont(font, size)
+        pdf.drawCentredString(PAGE_WIDTH / 2, y, text)
+    pdf.endForm()
+    pdf.doForm("header")
+
+
+def _fit(text: str, width: float) -> str:
+    """Truncate text to fit `width` in the body font"""
+    if stringWidth(text, FONT, FONT_SIZE) <= width:
+        return text
+    while text and stringWidth(text + "...", FONT, FONT_SIZE) > width:
+        text = text[:-1]
+    return text + "..."
+
+
+def render_receipt(receipt: dict) -> bytes:
+    """One receipt as a single-page PDF sized to its content"""
+    layout = header_layout(receipt["store_name"], receipt["store_location"])
+    header_height = sum(size * 1.3 for _, size, _ in layout)
+    body_lines = 6 + 2 * len(receipt["lines"]) + 6
+    height = 2 * MARGIN + header_height + body_lines * LINE_HEIGHT
+
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=(PAGE_WIDTH, height), pageCompression=1)
+    pdf.setTitle(f"Receipt {receipt['receipt_number']}")
+    top = height - MARGIN
+    _draw_header(pdf, layout, top)
+
+    left, right = MARGIN, PAGE_WIDTH - MARGIN
+    y = top - header_height - LINE_HEIGHT
+
+    def row(label: str, value: str = "", font: str = FONT) -> None:
+        nonlocal y
+        pdf.setFont(font, FONT_SIZE)
+        pdf.drawString(left, y, label)
+        if value:
+            pdf.drawRightString(right, y, value)
+        y -= LINE_HEIGHT
+
+    def rule() -> None:
+        nonlocal y
+        pdf.line(left, y + LINE_HEIGHT / 2, right, y + LINE_HEIGHT / 2)
+        y -= LINE_HEIGHT / 2
+
+    row("Receipt", receipt["receipt_number"], FONT_BOLD)
+    row("Date", receipt["date"].strftime("%Y-%m-%d %H:%M"))
+    row("Cashier", receipt["cashier"])
+    rule()
+    for name, quantity, unit_price, discount, total in receipt["lines"]:
+        row(_fit(name, right - left))
+        detail = f"  {quantity:g} x {unit_price:.2f}" + (f" -{discount:.2f}" if discount else "")
+        row(detail, f"{total:.2f}")
+    rule()
+    row("Subtotal", f"{receipt['total_amount']:.2f}")
+    if receipt["discount_amount"]:
+        row("Discount", f"-{receipt['discount_amount']:.2f}")
+    if receipt["tax_amount"]:
+        row("Tax", f"{receipt['tax_amount']:.2f}")
+    row("TOTAL", f"{receipt['final_amount']:.2f}", FONT_BOLD)
+    row("Paid by", receipt["payment_method"])
+    y -= LINE_HEIGHT / 2
+    pdf.setFont(FONT, FONT_SIZE)
+    pdf.drawCentredString(PAGE_WIDTH / 2, y, "Thank you for shopping with us")
+
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Process pool shared by bulk reprints, started on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned rather than forked: the web process runs threads
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.RECEIPT_PDF_WORKERS or None,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+class _ChunkWriter(io.RawIOBase):
+    """Write-only, unseekable file that hands written bytes to the zip stream"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+
+def stream_receipts_zip(receipts: Iterable[dict]) -> Iterator[bytes]:
+    """Render receipts in the process pool and yield a zip archive of them as it is built"""
+    receipts = list(receipts)
+    names = [f"{receipt['receipt_number']}.pdf" for receipt in receipts]
+    pdfs = _get_pool().map(render_receipt, receipts, chunksize=settings.RECEIPT_PDF_CHUNK_SIZE)
+
+    sink = _ChunkWriter()
+    # PDF streams are already compressed, so entries are stored as-is
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:
+        for name, pdf in zip(names, pdfs):
+            archive.writestr(name, pdf)
+            yield sink.drain()
+    yield sink.drain()
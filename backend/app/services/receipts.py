@@ -0,0 +1,91 @@
+"""
+Per-store receipt numbers handed out from pre-allocated blocks
+
+Each store has a monotonic counter in sync_counters ("receipt:<store_id>").
+A process reserves RECEIPT_BLOCK_SIZE numbers at a time in its own short
+transaction and then numbers sales from memory, so checkout does not touch
+the counter row per sale. Numbers are unique per store and increase within a
+process; across processes they interleave by block, and numbers left in a
+block when a process exits are never used.
+"""
+import os
+import threading
+from typing import Dict, Tuple
+from sqlalchemy import func, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.sale import Sale
+from app.models.sync import SyncCounter
+
+
+def receipt_counter(store_id: int) -> str:
+    return f"receipt:{store_id}"
+
+
+def parse_receipt_number(receipt_number: str) -> Tuple[int, int]:
+    """
+    (store_id, receipt_seq) of a printed receipt number such as R003-00001234
+    (see Sale.receipt_number); raises ValueError if malformed
+    """
+    store, _, seq = receipt_number.strip().upper().removeprefix("R").partition("-")
+    return int(store), int(seq)
+
+
+def reserve_block(db: Session, store_id: int, size: int) -> Tuple[int, int]:
+    """
+    Reserve `size` receipt numbers for a store, returning [first, end).
+
+    Runs in a session of its own that commits immediately, so the counter
+    row is locked only for this statement and a reservation survives a
+    rollback of the sale that triggered it.
+    """
+    name = receipt_counter(store_id)
+    with Session(bind=db.get_bind()) as counter_db:
+        for _ in range(2):
+            end = counter_db.execute(
+                update(SyncCounter)
+                .where(SyncCounter.name == name)
+                .values(value=SyncCounter.value + size)
+                .returning(SyncCounter.value)
+            ).scalar()
+            if end is not None:
+                counter_db.commit()
+                return end - size + 1, end + 1
+            # First sale of the store since the counter existed: start after
+            # any receipts already stored (e.g. bulk-loaded sales)
+            start = counter_db.query(func.coalesce(func.max(Sale.receipt_seq), 0)).filter(
+                Sale.store_id == store_id
+            ).scalar()
+            counter_db.add(SyncCounter(name=name, value=start + size))
+            try:
+                counter_db.commit()
+                return start + 1, start + size + 1
+            except IntegrityError:
+                # Another process created the counter first; reserve from it
+                counter_db.rollback()
+    raise RuntimeError(f"Could not reserve receipt numbers for store {store_id}")
+
+
+class ReceiptAllocator:
+    def __init__(self, block_size: int):
+        self.block_size = block_size
+        self._blocks: Dict[int, Tuple[int, int]] = {}  # store_id -> [next, end)
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def next(self, db: Session, store_id: int) -> int:
+        """Next receipt sequence number for a store"""
+        with self._lock:
+            if self._pid != os.getpid():
+                # A forked worker must not reuse its parent's blocks
+                self._blocks.clear()
+                self._pid = os.getpid()
+            next_seq, end = self._blocks.get(store_id, (0, 0))
+            if next_seq >= end:
+                next_seq, end = reserve_block(db, store_id, self.block_size)
+            self._blocks[store_id] = (next_seq + 1, end)
+            return next_seq
+
+
+allocator = ReceiptAllocator(block_size=settings.RECEIPT_BLOCK_SIZE)
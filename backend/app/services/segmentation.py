@@ -0,0 +1,141 @@
+"""
+Batch RFM (recency, frequency, monetary) customer segmentation
+
+Sales over the last SEGMENTATION_HISTORY_DAYS are aggregated per customer in
+one grouped query; scoring runs on NumPy arrays for all customers at once:
+
+- each measure gets a 1-5 quintile score (ties share a score; a recent
+  purchase scores high),
+- the recency score and the mean of the frequency and monetary scores map
+  to a named segment through SEGMENT_MAP.
+
+The results replace customer_segments in bulk, which the customer insights
+endpoint filters and pages by segment.
+
+Usage (from backend/):
+    python -m app.services.segmentation
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+import numpy as np
+from sqlalchemy import func, insert, text
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.analytics import CustomerSegment
+from app.models.base import SessionLocal
+from app.models.sale import Sale
+from app.utils.serialization import pg_array_literal
+
+# (segment, recency scores, frequency/monetary scores), first match wins
+SEGMENT_MAP = [
+    ("champions", (5,), (4, 5)),
+    ("loyal", (3, 4, 5), (4, 5)),
+    ("potential_loyalist", (4, 5), (2, 3)),
+    ("new", (5,), (1,)),
+    ("promising", (4,), (1,)),
+    ("need_attention", (3,), (3,)),
+    ("about_to_sleep", (3,), (1, 2)),
+    ("cant_lose", (1, 2), (5,)),
+    ("at_risk", (1, 2), (3, 4)),
+    ("hibernating", (1, 2), (1, 2)),
+]
+SEGMENTS = [name for name, _, _ in SEGMENT_MAP]
+
+
+def quintile_scores(values: np.ndarray) -> np.ndarray:
+    """Score values 1-5 by quintile of their rank; equal values get the same score"""
+    if not len(values):
+        return np.zeros(0, dtype=np.int64)
+    rank = np.searchsorted(np.sort(values), values, side="left")
+    return np.minimum(rank * 5 // len(values) + 1, 5)
+
+
+def score(recency_days: np.ndarray, frequency: np.ndarray, monetary: np.ndarray) -> Dict[str, np.ndarray]:
+    """RFM scores and segment names for every customer at once"""
+    r_score = quintile_scores(-recency_days)
+    f_score = quintile_scores(frequency)
+    m_score = quintile_scores(monetary)
+    fm_score = np.ceil((f_score + m_score) / 2).astype(np.int64)
+    conditions = [np.isin(r_score, r) & np.isin(fm_score, fm) for _, r, fm in SEGMENT_MAP]
+    segment = np.select(conditions, SEGMENTS, default="hibernating")
+    return {"r_score": r_score, "f_score": f_score, "m_score": m_score, "segment": segment}
+
+
+def segment_customers(db: Session, as_of: Optional[datetime] = None) -> int:
+    """Recompute every purchasing customer's segment; returns the number of customers scored"""
+    as_of = as_of or datetime.utcnow()
+    query = db.query(
+        Sale.customer_id, func.count(Sale.sale_id), func.sum(Sale.final_amount), func.max(Sale.date)
+    ).filter(Sale.customer_id.isnot(None), Sale.date <= as_of)
+    if settings.SEGMENTATION_HISTORY_DAYS:
+        query = query.filter(Sale.date >= as_of - timedelta(days=settings.SEGMENTATION_HISTORY_DAYS))
+    rows = query.group_by(Sale.customer_id).all()
+    
+    count = len(rows)
+    customer_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=count)
+    frequency = np.fromiter((row[1] for row in rows), dtype=np.int64, count=count)
+    monetary = np.round(np.fromiter((row[2] or 0 for row in rows), dtype=np.float64, count=count), 2)
+    # max() of a DateTime comes back as a string on SQLite
+    last_purchase = np.array(
+        [row[3] if isinstance(row[3], datetime) else datetime.fromisoformat(row[3]) for row in rows],
+        dtype="datetime64[s]"
+    )
+    recency_days = (np.datetime64(as_of, "s") - last_purchase).astype("timedelta64[D]").astype(np.int64)
+    results = score(recency_days, frequency, monetary)
+    
+    columns = {
+        "customer_id": customer_ids.tolist(),
+        "segment": results["segment"].tolist(),
+        "recency_days": recency_days.tolist(),
+        "frequency": frequency.tolist(),
+        "monetary": monetary.tolist(),
+        "r_score": results["r_score"].tolist(),
+        "f_score": results["f_score"].tolist(),
+        "m_score": results["m_score"].tolist(),
+    }
+    _write_segments(db, columns, datetime.utcnow())
+    return count
+
+
+def _write_segments(db: Session, columns: Dict[str, list], computed_at: datetime) -> None:
+    """Replace customer_segments with the new scores"""
+    if db.get_bind().dialect.name == "postgresql":
+        # Same shape as the forecasting write: one upsert over column arrays,
+        # then drop customers who no longer have sales in the window
+        types = {"customer_id": "integer", "segment": "varchar", "monetary": "double precision"}
+        names = ", ".join(columns)
+        arrays = ", ".join(f"CAST(:{name} AS {types.get(name, 'integer')}[])" for name in columns)
+        updates = ", ".join(f"{name} = excluded.{name}" for name in [*columns, "computed_at"] if name != "customer_id")
+        db.execute(text(
+            f"INSERT INTO customer_segments ({names}, computed_at) "
+            f"SELECT {names}, :computed_at FROM unnest({arrays}) AS t({names}) "
+            f"ON CONFLICT (customer_id) DO UPDATE SET {updates}"
+        ), {"computed_at": computed_at, **{name: pg_array_literal(values) for name, values in columns.items()}})
+        db.query(CustomerSegment).filter(CustomerSegment.computed_at < computed_at).delete(
+            synchronize_session=False
+        )
+    else:
+        db.query(CustomerSegment).delete(synchronize_session=False)
+        if not columns["customer_id"]:
+            return
+        db.execute(insert(CustomerSegment), [
+            {"computed_at": computed_at, **{name: values[i] for name, values in columns.items()}}
+            for i in range(len(columns["customer_id"]))
+        ])
+
+
+def main():
+    db = SessionLocal()
+    try:
+        scored = segment_customers(db)
+        db.commit()
+        print(f"Segmented {scored} customers")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Single-flight coalescing of identical concurrent read requests
+
+When a store opens, dashboards and terminals ask for the same report or
+catalog page at the same moment. Routes decorated with `single_flight` run
+once per key (route, query parameters and scope, e.g. the report's store)
+at a time: requests arriving while a call is running wait for it and
+return its result instead of repeating the query.
+
+The result is encoded once to JSON-compatible data (through the route's
+response model when given) so waiters never touch the leader's ORM objects.
+Within a worker waiters share it in memory. With SINGLE_FLIGHT_REDIS the
+leader also holds a Redis lock and publishes its result under a short-lived
+key, so identical requests on other workers wait for it too; if Redis is
+unreachable each worker coalesces on its own.
+"""
+import functools
+import hashlib
+import logging
+import threading
+import time
+import uuid
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Callable, Dict, Optional
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "single-flight:"
+RESULT_TTL_MS = 5000  # waiters on other workers pick the result up within this
+POLL_SECONDS = 0.05
+REDIS_RETRY_SECONDS = 30
+KEY_TYPES = (str, int, float, bool, date, datetime, Enum, type(None))
+
+# Delete the lock only if this leader still holds it
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    def __init__(self, use_redis: bool):
+        self.use_redis = use_redis
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self._redis = None
+        self._release = None
+        self._redis_down_until = 0.0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """fn() once for all concurrent callers with the same key"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            if call.done.wait(settings.SINGLE_FLIGHT_WAIT_SECONDS):
+                if call.error is not None:
+                    raise call.error
+                return call.result
+            return fn()
+
+        try:
+            call.result = self._lead(key, fn)
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def _lead(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run fn as this worker's leader, waiting instead for another worker's run of it if there is one"""
+        client = self._client()
+        if client is None:
+            return fn()
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        lock_key, result_key = f"{KEY_PREFIX}lock:{digest}", f"{KEY_PREFIX}result:{digest}"
+        token = uuid.uuid4().hex
+        try:
+            locked = client.set(lock_key, token, nx=True, px=int(settings.SINGLE_FLIGHT_WAIT_SECONDS * 1000))
+            if locked:
+                client.delete(result_key)
+            else:
+                found, result = self._wait_redis(client, lock_key, result_key)
+                if found:
+                    return result
+        except Exception as exc:
+            self._redis_failed(exc)
+            return fn()
+
+        if not locked:
+            return fn()
+        try:
+            result = fn()
+            self._redis_call(client.set, result_key, orjson.dumps(result), px=RESULT_TTL_MS)
+            return result
+        finally:
+            # Without a published result, waiters on other workers run it themselves once the lock goes
+            self._redis_call(self._release, keys=[lock_key], args=[token])
+
+    def _redis_call(self, method, *args, **kwargs) -> None:
+        try:
+            method(*args, **kwargs)
+        except Exception as exc:
+            self._redis_failed(exc)
+
+    def _wait_redis(self, client, lock_key: str, result_key: str):
+        """(True, result) once another worker publishes it; (False, None) if its lock goes away without one"""
+        deadline = time.monotonic() + settings.SINGLE_FLIGHT_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            value = client.get(result_key)
+            if value is not None:
+                return True, orjson.loads(value)
+            if not client.exists(lock_key):
+                return False, None
+            time.sleep(POLL_SECONDS)
+        return False, None
+
+    def _client(self):
+        if not self.use_redis or time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            import redis
+            self._redis = redis.Redis.from_url(settings.REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5)
+            self._release = self._redis.register_script(RELEASE_SCRIPT)
+        return self._redis
+
+    def _redis_failed(self, exc: Exception) -> None:
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+        logger.warning("Coalescing within this worker only for %ss, Redis failed: %s", REDIS_RETRY_SECONDS, exc)
+
+
+flights = SingleFlight(use_redis=settings.SINGLE_FLIGHT_REDIS)
+
+
+def single_flight(response_model: Any = None, scope: Optional[Callable[[Dict[str, Any]], Any]] = None):
+    """
+    Coalesce concurrent identical calls of a route function.
+
+    The key is the function, its plain (str/number/date/enum) arguments and
+    scope(kwargs) -- whatever else, beyond the parameters, decides the result,
+    such as the store a report is limited to. Place it below @router.get.
+    """
+    adapter = TypeAdapter(response_model) if response_model is not None else None
+
+    def encode(result: Any) -> Any:
+        if adapter is None:
+            return jsonable_encoder(result)
+        return adapter.dump_python(adapter.validate_python(result, from_attributes=True), mode="json")
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(**kwargs):
+            if not settings.SINGLE_FLIGHT_ENABLED:
+                return fn(**kwargs)
+            params = {name: value for name, value in kwargs.items() if isinstance(value, KEY_TYPES)}
+            key = orjson.dumps(
+                [fn.__module__, fn.__qualname__, params, scope(kwargs) if scope else None],
+                default=str, option=orjson.OPT_SORT_KEYS
+            ).decode()
+            return flights.do(key, lambda: encode(fn(**kwargs)))
+        return wrapper
+    return decorator
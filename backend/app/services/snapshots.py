@@ -0,0 +1,323 @@
+"""
+Columnar (Parquet) snapshots of closed days for historical analytics
+
+A nightly job writes each closed day of sales and line items, and the
+day's inventory positions, under SNAPSHOT_DIR as hive-partitioned Parquet:
+
+    <SNAPSHOT_DIR>/sales/sale_date=2026-10-18/part-0.parquet
+    <SNAPSHOT_DIR>/sale_line_items/sale_date=2026-10-18/part-0.parquet
+    <SNAPSHOT_DIR>/inventory/snapshot_date=2026-10-19/part-0.parquet
+
+Line items carry their sale's store_id so store-scoped reports need no
+join. Rows are sorted by store so row-group statistics skip other stores.
+Each shard writes its own part-<n> file per day, and rerunning a day
+replaces them atomically.
+
+With ANALYTICS_USE_SNAPSHOTS, the analytics endpoints read the part of a
+range older than the hot window (ANALYTICS_HOT_DAYS) from these files, as
+far as the exported days run without a gap from the range's start,
+touching only the partitions and columns they need, and query the
+database for the rest (see cold_end).
+
+Usage (from backend/):
+    python -m app.services.snapshots [--days 3]
+    python -m app.services.snapshots --start 2025-01-01 --end 2026-10-01  # Backfill
+"""
+import argparse
+import os
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.shards import session_for_url, shard_urls
+from app.models.inventory import Inventory
+from app.models.product import Product
+from app.models.sale import Sale, SaleLineItem
+from app.services.analytics import closed_days_start
+from app.services.partitions import SALE_LINE_ITEM_JOIN
+
+SALES_SCHEMA = pa.schema([
+    ("sale_id", pa.int64()),
+    ("store_id", pa.int32()),
+    ("customer_id", pa.int64()),
+    ("user_id", pa.int32()),
+    ("date", pa.timestamp("us")),
+    ("payment_method", pa.string()),
+    ("total_amount", pa.float64()),
+    ("discount_amount", pa.float64()),
+    ("tax_amount", pa.float64()),
+    ("final_amount", pa.float64()),
+])
+LINE_ITEMS_SCHEMA = pa.schema([
+    ("line_item_id", pa.int64()),
+    ("sale_id", pa.int64()),
+    ("store_id", pa.int32()),
+    ("product_id", pa.int32()),
+    ("quantity", pa.float64()),
+    ("unit_price", pa.float64()),
+    ("discount", pa.float64()),
+    ("total", pa.float64()),
+])
+INVENTORY_SCHEMA = pa.schema([
+    ("store_id", pa.int32()),
+    ("product_id", pa.int32()),
+    ("quantity", pa.float64()),
+    ("reorder_level", pa.float64()),
+    ("cost", pa.float64()),
+    ("value", pa.float64()),
+])
+
+# dataset -> (partition column, row schema)
+DATASETS = {
+    "sales": ("sale_date", SALES_SCHEMA),
+    "sale_line_items": ("sale_date", LINE_ITEMS_SCHEMA),
+    "inventory": ("snapshot_date", INVENTORY_SCHEMA),
+}
+
+
+def _write_partition(dataset: str, day: date, rows: List[tuple], part: int = 0) -> str:
+    """Replace one day's file of a dataset (one file per shard) with `rows` (tuples in schema order)"""
+    column, schema = DATASETS[dataset]
+    directory = os.path.join(settings.SNAPSHOT_DIR, dataset, f"{column}={day.isoformat()}")
+    os.makedirs(directory, exist_ok=True)
+    columns = list(zip(*rows)) or [()] * len(schema)
+    table = pa.Table.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema
+    )
+    path = os.path.join(directory, f"part-{part}.parquet")
+    # Dot-prefixed files are ignored by dataset discovery until renamed into place
+    temp_path = os.path.join(directory, f".part-{part}.parquet.tmp")
+    pq.write_table(table, temp_path, compression="zstd")
+    os.replace(temp_path, path)
+    return path
+
+
+def export_day(db: Session, day: date, part: int = 0) -> Dict[str, int]:
+    """Write one closed day of sales and line items"""
+    start = datetime.combine(day, datetime.min.time())
+    end = start + timedelta(days=1)
+    sales = db.query(
+        Sale.sale_id, Sale.store_id, Sale.customer_id, Sale.user_id, Sale.date, Sale.payment_method,
+        Sale.total_amount, Sale.discount_amount, Sale.tax_amount, Sale.final_amount
+    ).filter(Sale.date >= start, Sale.date < end).order_by(Sale.store_id, Sale.sale_id).all()
+    line_items = db.query(
+        SaleLineItem.line_item_id, SaleLineItem.sale_id, Sale.store_id, SaleLineItem.product_id,
+        SaleLineItem.quantity, SaleLineItem.unit_price, SaleLineItem.discount, SaleLineItem.total
+    ).join(Sale, SALE_LINE_ITEM_JOIN).filter(
+        Sale.date >= start, Sale.date < end,
+        SaleLineItem.sale_date >= start, SaleLineItem.sale_date < end
+    ).order_by(Sale.store_id, SaleLineItem.line_item_id).all()
+
+    _write_partition("sales", day, [
+        (*row[:5], row.payment_method.value, *row[6:]) for row in sales
+    ], part)
+    _write_partition("sale_line_items", day, [tuple(row) for row in line_items], part)
+    return {"sales": len(sales), "line_items": len(line_items)}
+
+
+def export_inventory(db: Session, day: date, part: int = 0) -> int:
+    """Write every store's stock positions, valued at cost, as of now under `day`"""
+    rows = db.query(
+        Inventory.store_id, Inventory.product_id, Inventory.quantity, Inventory.reorder_level,
+        Product.cost, Inventory.quantity * Product.cost
+    ).join(Product, Inventory.product_id == Product.product_id).order_by(
+        Inventory.store_id, Inventory.product_id
+    ).all()
+    _write_partition("inventory", day, [tuple(row) for row in rows], part)
+    return len(rows)
+
+
+def export_snapshots(db: Session, start: date, end: date, part: int = 0) -> Dict[str, int]:
+    """Export one shard's closed days in [start, end) and today's inventory positions as file `part`"""
+    end = min(end, closed_days_start())
+    first_sale = db.query(func.min(Sale.date)).scalar()
+    if first_sale:
+        start = max(start, first_sale.date())
+    totals = {"days": 0, "sales": 0, "line_items": 0}
+    day = start
+    while day < end:
+        for name, count in export_day(db, day, part).items():
+            totals[name] += count
+        totals["days"] += 1
+        day += timedelta(days=1)
+    totals["inventory"] = export_inventory(db, date.today(), part)
+    return totals
+
+
+def exported_days(dataset: str = "sales") -> List[date]:
+    """Days with a file in a dataset, oldest first"""
+    column, _ = DATASETS[dataset]
+    root = os.path.join(settings.SNAPSHOT_DIR, dataset)
+    if not os.path.isdir(root):
+        return []
+    days = []
+    for name in os.listdir(root):
+        key, _, value = name.partition("=")
+        if key == column and any(file.endswith(".parquet") for file in os.listdir(os.path.join(root, name))):
+            days.append(date.fromisoformat(value))
+    return sorted(days)
+
+
+def cold_boundary(start: date) -> Optional[datetime]:
+    """
+    Midnight ending the snapshot run that covers `start`, or None when
+    snapshots are off, `start` is in the hot window or its day was never
+    exported.
+
+    The run is the exported days following on from `start` without a gap,
+    cut at the start of the hot window; a day the export job missed ends
+    it, so that day and everything after it come from the database.
+    """
+    if not settings.ANALYTICS_USE_SNAPSHOTS:
+        return None
+    exported = set(exported_days())
+    hot_start = date.today() - timedelta(days=settings.ANALYTICS_HOT_DAYS)
+    day = start
+    while day < hot_start and day in exported:
+        day += timedelta(days=1)
+    if day == start:
+        return None
+    return datetime.combine(day, datetime.min.time())
+
+
+def cold_end(start: Optional[datetime], end: Optional[datetime]) -> Optional[datetime]:
+    """
+    Where the snapshot part of a report range [start, end] (end inclusive,
+    open if None) stops, or None if no part of it can come from snapshots.
+
+    Callers read [start, cold_end) from snapshots and query the database
+    from cold_end on, unless cold_end is already past `end`. A range with no
+    start is read from the database: the snapshots can't show that they
+    reach back to the first sale.
+    """
+    if start is None:
+        return None
+    boundary = cold_boundary(start.date())
+    if boundary is None:
+        return None
+    if end is not None and end < boundary:
+        return end + timedelta(microseconds=1)
+    return boundary
+
+
+def _dataset(name: str) -> ds.Dataset:
+    column, schema = DATASETS[name]
+    return ds.dataset(
+        os.path.join(settings.SNAPSHOT_DIR, name),
+        format="parquet",
+        schema=schema.append(pa.field(column, pa.date32())),
+        partitioning=ds.partitioning(pa.schema([(column, pa.date32())]), flavor="hive"),
+    )
+
+
+def _filter(start: Optional[datetime], end: datetime, store_id: Optional[int], timestamp: Optional[str] = "date"):
+    """Rows in [start, end) (and of a store): sale_date prunes partitions, `timestamp` cuts within a day"""
+    expression = ds.field("sale_date") <= (end - timedelta(microseconds=1)).date()
+    if start:
+        expression &= ds.field("sale_date") >= start.date()
+    if timestamp:
+        expression &= ds.field(timestamp) < pa.scalar(end, pa.timestamp("us"))
+        if start:
+            expression &= ds.field(timestamp) >= pa.scalar(start, pa.timestamp("us"))
+    if store_id:
+        expression &= ds.field("store_id") == store_id
+    return expression
+
+
+def _sale_ids_in(start: Optional[datetime], end: datetime, store_id: Optional[int]) -> Optional[pa.Array]:
+    """Sale ids within a range that does not fall on day boundaries, else None"""
+    midnight = datetime.min.time()
+    if (start is None or start.time() == midnight) and end.time() == midnight:
+        return None
+    table = _dataset("sales").to_table(columns=["sale_id"], filter=_filter(start, end, store_id))
+    return table.column("sale_id")
+
+
+def sales_totals(start: Optional[datetime], end: datetime, store_id: Optional[int] = None) -> Tuple[float, int, float]:
+    """(final amount, transactions, discount) of sales in [start, end)"""
+    table = _dataset("sales").to_table(
+        columns=["final_amount", "discount_amount"], filter=_filter(start, end, store_id)
+    )
+    return (
+        pc.sum(table.column("final_amount")).as_py() or 0.0,
+        table.num_rows,
+        pc.sum(table.column("discount_amount")).as_py() or 0.0,
+    )
+
+
+def daily_sales(start: Optional[datetime], end: datetime, store_id: Optional[int] = None) -> Dict[str, list]:
+    """{day: [total sales, transactions]} for sales in [start, end)"""
+    table = _dataset("sales").to_table(
+        columns=["sale_date", "final_amount", "sale_id"], filter=_filter(start, end, store_id)
+    )
+    grouped = table.group_by("sale_date").aggregate([("final_amount", "sum"), ("sale_id", "count")])
+    return {
+        str(day): [total, count]
+        for day, total, count in zip(
+            grouped.column("sale_date").to_pylist(),
+            grouped.column("final_amount_sum").to_pylist(),
+            grouped.column("sale_id_count").to_pylist(),
+        )
+    }
+
+
+def product_totals(start: Optional[datetime], end: datetime,
+                   store_id: Optional[int] = None) -> Dict[int, Tuple[float, float]]:
+    """{product_id: (quantity, revenue)} over line items of sales in [start, end)"""
+    # Line items only know their day, so a range starting or ending mid-day
+    # is narrowed through the matching sale ids
+    sale_ids = _sale_ids_in(start, end, store_id)
+    expression = _filter(start, end, store_id, timestamp=None)
+    if sale_ids is not None:
+        expression &= ds.field("sale_id").isin(sale_ids)
+    table = _dataset("sale_line_items").to_table(columns=["product_id", "quantity", "total"], filter=expression)
+    grouped = table.group_by("product_id").aggregate([("quantity", "sum"), ("total", "sum")])
+    return {
+        product_id: (quantity, revenue)
+        for product_id, quantity, revenue in zip(
+            grouped.column("product_id").to_pylist(),
+            grouped.column("quantity_sum").to_pylist(),
+            grouped.column("total_sum").to_pylist(),
+        )
+    }
+
+
+def export_range(start: date, end: date) -> Dict[str, int]:
+    """Export closed days in [start, end) from every shard, each shard to its own file per day"""
+    totals: Dict[str, int] = {}
+    for part, url in enumerate(shard_urls()):
+        db = session_for_url(url)
+        try:
+            for name, count in export_snapshots(db, start, end, part).items():
+                totals[name] = totals.get(name, 0) + count
+        finally:
+            db.close()
+    return totals
+
+
+def export_recent(days: int = 3) -> Dict[str, int]:
+    """Export the last `days` closed days (reruns replace them)"""
+    end = closed_days_start()
+    return export_range(end - timedelta(days=days), end)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export closed days of sales and inventory to Parquet")
+    parser.add_argument("--days", type=int, default=3, help="Closed days to export, counting back from yesterday")
+    parser.add_argument("--start", type=date.fromisoformat, help="First day to export (backfill)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Day after the last one to export")
+    args = parser.parse_args()
+
+    if args.start:
+        print(export_range(args.start, args.end or closed_days_start()))
+    else:
+        print(export_recent(args.days))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Per-store stock change broadcasting for live Dashboard/Inventory screens
+
+Write paths call `publish()` after their commit. Subscribers (one per open
+SSE connection) receive batched frames: changes arriving within
+STOCK_EVENTS_COALESCE_MS are merged per product, latest quantity wins, so a
+burst of checkouts becomes a single frame.
+
+Within a worker events are fanned out in memory. With STOCK_EVENTS_REDIS
+enabled they go through a Redis pub/sub channel per store instead, so screens
+connected to any worker or pod see changes made by every other one.
+"""
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, asdict
+from typing import AsyncIterator, Dict, List, Optional, Set
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "stock-events:"
+
+
+@dataclass
+class StockChange:
+    product_id: int
+    quantity: float
+    reorder_level: float
+    low_stock: bool
+    crossed: Optional[str] = None  # "low" when it fell to/below reorder level, "restocked" when it rose above
+
+
+def stock_change(product_id: int, before: float, after: float, reorder_level: float) -> StockChange:
+    """Describe a quantity change, flagging reorder-level crossings"""
+    was_low, is_low = before <= reorder_level, after <= reorder_level
+    crossed = None
+    if is_low and not was_low:
+        crossed = "low"
+    elif was_low and not is_low:
+        crossed = "restocked"
+    return StockChange(product_id, after, reorder_level, is_low, crossed)
+
+
+class StockEventBroker:
+    def __init__(self, coalesce_seconds: float, use_redis: bool):
+        self.coalesce_seconds = coalesce_seconds
+        self.use_redis = use_redis
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._redis = None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Bind to the running event loop (called from the app lifespan)"""
+        self._loop = asyncio.get_running_loop()
+        if self.use_redis:
+            import redis
+            self._redis = redis.Redis.from_url(settings.REDIS_URL)
+            self._listener = asyncio.create_task(self._listen_redis())
+
+    async def stop(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+        self._loop = None
+
+    def publish(self, store_id: int, changes: List[StockChange]) -> None:
+        """
+        Broadcast committed stock changes for a store.
+
+        Safe to call from sync route handlers running in the threadpool.
+        Failures are logged and swallowed: a missed frame must never fail
+        the write that produced it.
+        """
+        if not changes:
+            return
+        payload = [asdict(change) for change in changes]
+        try:
+            if self._redis is not None:
+                self._redis.publish(f"{CHANNEL_PREFIX}{store_id}", json.dumps(payload))
+            elif self._loop is not None:
+                self._loop.call_soon_threadsafe(self._dispatch, store_id, payload)
+        except Exception:
+            logger.exception("Failed to publish stock events for store %s", store_id)
+
+    def _dispatch(self, store_id: int, payload: List[dict]) -> None:
+        for queue in self._subscribers.get(store_id, ()):
+            queue.put_nowait(payload)
+
+    async def _listen_redis(self) -> None:
+        import redis.asyncio as aioredis
+
+        client = aioredis.Redis.from_url(settings.REDIS_URL)
+        pubsub = client.pubsub()
+        await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+        try:
+            async for message in pubsub.listen():
+                if message["type"] != "pmessage":
+                    continue
+                store_id = int(message["channel"].decode().rsplit(":", 1)[1])
+                self._dispatch(store_id, json.loads(message["data"]))
+        finally:
+            await pubsub.close()
+            await client.close()
+
+    async def subscribe(self, store_id: int) -> AsyncIterator[List[dict]]:
+        """Yield coalesced batches of changes for a store until the caller stops"""
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(store_id, set()).add(queue)
+        try:
+            while True:
+                merged: Dict[int, dict] = {}
+                batch = await queue.get()
+                await asyncio.sleep(self.coalesce_seconds)
+                while True:
+                    for change in batch:
+                        previous = merged.get(change["product_id"])
+                        # Keep a crossing seen earlier in the burst unless a later one replaces it
+                        if previous and previous["crossed"] and not change["crossed"]:
+                            change = {**change, "crossed": previous["crossed"]}
+                        merged[change["product_id"]] = change
+                    if queue.empty():
+                        break
+                    batch = queue.get_nowait()
+                yield list(merged.values())
+        finally:
+            self._subscribers[store_id].discard(queue)
+            if not self._subscribers[store_id]:
+                del self._subscribers[store_id]
+
+
+broker = StockEventBroker(
+    coalesce_seconds=settings.STOCK_EVENTS_COALESCE_MS / 1000,
+    use_redis=settings.STOCK_EVENTS_REDIS,
+)
@@ -0,0 +1,73 @@
+"""
+Celery application for heavy analytics and nightly jobs
+
+Run a worker and the beat scheduler (from backend/):
+    celery -A app.tasks worker --loglevel=info
+    celery -A app.tasks beat --loglevel=info
+"""
+from celery import Celery
+from celery.schedules import crontab
+from app.config import settings
+
+celery_app = Celery(
+    "shopping_mart",
+    broker=settings.CELERY_BROKER_URL or settings.REDIS_URL,
+    backend=settings.CELERY_RESULT_BACKEND or settings.REDIS_URL,
+    include=["app.tasks.jobs"],
+)
+
+celery_app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    timezone="UTC",
+    enable_utc=True,
+    # Keep task args with results so job polling can check who started a job
+    result_extended=True,
+    result_expires=settings.CELERY_RESULT_EXPIRES,
+    task_track_started=True,
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+    task_always_eager=settings.CELERY_TASK_ALWAYS_EAGER,
+    task_store_eager_result=True,
+    beat_schedule={
+        "rebuild-daily-sales-rollups": {
+            "task": "analytics.rebuild_daily_sales_rollups",
+            "schedule": crontab(minute=30, hour=0),
+            "kwargs": {"days": 3},
+        },
+        "snapshot-inventory-valuation": {
+            "task": "inventory.snapshot_valuation",
+            "schedule": crontab(minute=5, hour=0),
+        },
+        "export-analytics-snapshots": {
+            "task": "analytics.export_snapshots",
+            "schedule": crontab(minute=40, hour=0),
+            "kwargs": {"days": 3},
+        },
+        "segment-customers": {
+            "task": "analytics.segment_customers",
+            "schedule": crontab(minute=45, hour=0),
+        },
+        "maintain-sales-partitions": {
+            "task": "sales.maintain_partitions",
+            "schedule": crontab(minute=10, hour=1),
+        },
+        "dispatch-outbox": {
+            "task": "outbox.dispatch",
+            "schedule": float(settings.OUTBOX_POLL_SECONDS),
+        },
+        "fold-loyalty-ledger": {
+            "task": "loyalty.fold",
+            "schedule": float(settings.LOYALTY_FOLD_SECONDS),
+        },
+        "purge-outbox": {
+            "task": "outbox.purge",
+            "schedule": crontab(minute=15, hour=3),
+        },
+        "forecast-reorder-suggestions": {
+            "task": "inventory.forecast_all_stores",
+            "schedule": crontab(minute=0, hour=2),
+        },
+    },
+)
@@ -0,0 +1,150 @@
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional
+from celery import group
+from fastapi.encoders import jsonable_encoder
+from app.config import settings
+from app.models.base import SessionLocal
+from app.models.shards import fan_out, session_for_store, session_for_url, shard_urls
+from app.models.store import Store
+from app.models.user import User
+from app.services import analytics, forecasting, loyalty, outbox, partitions, segmentation, snapshots
+from app.tasks.celery_app import celery_app
+
+
+@celery_app.task(name="analytics.rebuild_daily_sales_rollups")
+def rebuild_daily_sales_rollups(days: int = 3) -> str:
+    """Rebuild rollups for the last `days` closed days (pass a large value to backfill)"""
+    end = analytics.closed_days_start()
+    start = end - timedelta(days=days)
+    
+    def rebuild(db):
+        analytics.rebuild_daily_sales_rollups(db, start, end)
+        db.commit()
+    
+    fan_out(rebuild)
+    return f"{start}..{end}"
+
+
+@celery_app.task(name="analytics.export_snapshots")
+def export_snapshots(days: int = 3) -> dict:
+    """Write the last `days` closed days and today's stock to Parquet (pass a large value to backfill)"""
+    return snapshots.export_recent(days)
+
+
+@celery_app.task(name="inventory.snapshot_valuation")
+def snapshot_inventory_valuation(snapshot_date: Optional[str] = None) -> str:
+    """Capture stock value per store for a day (default today)"""
+    day = date.fromisoformat(snapshot_date) if snapshot_date else date.today()
+    
+    def snapshot(db):
+        analytics.snapshot_inventory_valuation(db, day)
+        db.commit()
+    
+    fan_out(snapshot)
+    return str(day)
+
+
+@celery_app.task(name="analytics.segment_customers")
+def segment_customers() -> int:
+    """Recompute RFM scores and segments for all customers"""
+    db = SessionLocal()
+    try:
+        scored = segmentation.segment_customers(db)
+        db.commit()
+        return scored
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+@celery_app.task(name="sales.maintain_partitions")
+def maintain_sales_partitions() -> dict:
+    """Create upcoming monthly sales partitions and archive expired ones"""
+    return partitions.maintain_partitions()
+
+
+@celery_app.task(name="inventory.forecast_store")
+def forecast_store(store_id: int, apply: bool = False) -> dict:
+    return forecasting.forecast_store(store_id, apply=apply)
+
+
+@celery_app.task(name="inventory.forecast_all_stores")
+def forecast_all_stores(apply: Optional[bool] = None) -> int:
+    """
+    Fan forecasting out as one task per store.
+
+    Worker processes cannot host the forecasting process pool, so stores are
+    spread across the worker pool instead.
+    """
+    apply = settings.FORECAST_APPLY_REORDER_LEVELS if apply is None else apply
+    db = SessionLocal()
+    try:
+        store_ids = [store_id for (store_id,) in db.query(Store.store_id).order_by(Store.store_id)]
+    finally:
+        db.close()
+    group(forecast_store.s(store_id, apply) for store_id in store_ids).apply_async()
+    return len(store_ids)
+
+
+@celery_app.task(name="outbox.dispatch")
+def dispatch_outbox() -> int:
+    """Sweep every shard for due outbox events (retries, and anything not drained after its request)"""
+    return sum(outbox.dispatch_pending(url=url) for url in shard_urls())
+
+
+@celery_app.task(name="outbox.purge")
+def purge_outbox() -> int:
+    older_than = datetime.utcnow() - timedelta(days=settings.OUTBOX_RETENTION_DAYS)
+    
+    def purge(db):
+        deleted = outbox.purge_processed(db, older_than)
+        db.commit()
+        return deleted
+    
+    return sum(fan_out(purge))
+
+
+@celery_app.task(name="loyalty.fold")
+def fold_loyalty_ledger() -> int:
+    """Fold new loyalty ledger entries of every shard into customer totals (on the default database)"""
+    db = SessionLocal()
+    try:
+        updated = 0
+        for url in shard_urls():
+            ledger_db = db if url == settings.DATABASE_URL else session_for_url(url)
+            try:
+                updated += loyalty.fold_ledger(db, ledger_db)
+                db.commit()
+            finally:
+                if ledger_db is not db:
+                    ledger_db.rollback()
+                    ledger_db.close()
+        return updated
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+@celery_app.task(name="analytics.generate_report")
+def generate_report(report: str, params: Dict[str, Any], user_id: int) -> Any:
+    """Run an analytics report on behalf of a user; the result is kept in the result backend"""
+    from app.api.v1.analytics.routes import REPORTS, report_arguments
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.user_id == user_id).first()
+        if user is None:
+            raise ValueError(f"User {user_id} not found")
+        handler, _ = REPORTS[report]
+        # Reports read the shard of the user's store, as they do in a request
+        store_db = session_for_store(user.store_id)
+        try:
+            return jsonable_encoder(handler(**report_arguments(handler, params), db=store_db, current_user=user))
+        finally:
+            store_db.close()
+    finally:
+        db.close()
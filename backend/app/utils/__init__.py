@@ -1,5 +1,6 @@
 from .auth import verify_password, get_password_hash, create_access_token, create_refresh_token, verify_token
 from .qr_code import generate_qr_code_data, create_qr_code_image, decode_qr_code
+from .serialization import rows_to_json
 
 __all__ = [
     "verify_password",
@@ -10,4 +11,5 @@ __all__ = [
     "generate_qr_code_data",
     "create_qr_code_image",
     "decode_qr_code",
+    "rows_to_json",
 ]
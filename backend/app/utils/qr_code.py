@@ -1,4 +1,3 @@
-import qrcode
 from io import BytesIO
 import base64
 from typing import Optional
@@ -22,6 +21,9 @@ def generate_qr_code_data(product_id: int, product_name: str, sku: str) -> str:
 
 def create_qr_code_image(data: str) -> str:
     """Generate QR code image and return as base64 string"""
+    # qrcode pulls in PIL; import it on first use to keep app startup light
+    import qrcode
+
     qr = qrcode.QRCode(
         version=1,
         error_correction=qrcode.constants.ERROR_CORRECT_L,
@@ -0,0 +1,26 @@
+from typing import Iterable, Optional, Dict, Sequence
+import orjson
+from fastapi import Response
+
+
+def rows_to_json(rows: Iterable, headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Encode SQLAlchemy result rows straight to a JSON response.
+
+    Skips building a Pydantic model per row and FastAPI's response_model
+    re-validation; orjson handles the date/datetime columns natively. Use it
+    for large list endpoints whose rows already have the response shape.
+    """
+    content = orjson.dumps([row._asdict() for row in rows])
+    return Response(content=content, media_type="application/json", headers=headers)
+
+
+def pg_array_literal(values: Sequence) -> str:
+    """
+    Render numbers, dates (or plain identifiers) and None as a PostgreSQL
+    array literal.
+
+    Bind it with CAST(:param AS <type>[]): the server parses a literal far
+    faster than the ARRAY[...] expression psycopg2 renders for a list.
+    """
+    return "{" + ",".join("NULL" if value is None else str(value) for value in values) + "}"
@@ -0,0 +1,14 @@
+"""
+Performance benchmarks, run from the backend directory, e.g.
+
+    python -m benchmarks.startup
+    python -m benchmarks.run --reset --products 5000 --months 6
+
+Settings are read when app.config is first imported, so the benchmark
+defaults (a local SQLite file, SQL echo off) are applied here before any
+benchmark module imports the app. Export DATABASE_URL to use PostgreSQL.
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./benchmark.db")
+os.environ.setdefault("DEBUG", "false")
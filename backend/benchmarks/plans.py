@@ -0,0 +1,222 @@
+"""
+Query-plan regression checks
+
+Drives each scenario's endpoint in process against a seeded PostgreSQL
+database, captures the SQL it runs and EXPLAINs every statement with the
+same parameters (EXPLAIN (FORMAT JSON), no ANALYZE). A scenario fails when
+a plan sequentially scans a large table (more than --large-rows estimated
+rows, partitions counted on their own) or, given --compare, when its total
+estimated cost grew past --threshold times the baseline.
+
+Usage (from backend/, DATABASE_URL pointing at the seeded database):
+    python -m benchmarks.plans --output benchmarks/results/plans.json
+    python -m benchmarks.plans --compare benchmarks/results/plans.json   # Exit 1 on regressions
+"""
+import argparse
+import re
+import sys
+from typing import Dict, List, Optional, Tuple
+from fastapi.testclient import TestClient
+from sqlalchemy import event, func, text
+from benchmarks.report import save_results, load_results
+from app.config import settings
+from app.main import app
+from app.models.base import SessionLocal, engine
+from app.models.product import Product
+from app.models.sale import Sale
+from app.models.user import User, UserRole
+from app.utils.auth import create_access_token
+
+API = "/api/v1"
+
+# name -> (path, who); "admin" reads every store, "store" is a non-admin of the busiest store.
+# Paths may contain {barcode}.
+SCENARIOS: Dict[str, Tuple[str, str]] = {
+    "sales_summary_all": (f"{API}/analytics/sales-summary", "admin"),
+    "sales_summary_store": (f"{API}/analytics/sales-summary", "store"),
+    "top_products_all": (f"{API}/analytics/top-products?limit=10", "admin"),
+    "top_products_store": (f"{API}/analytics/top-products?limit=10", "store"),
+    "low_stock": (f"{API}/inventory/low-stock", "store"),
+    "barcode_lookup": (f"{API}/products/barcode/{{barcode}}", "store"),
+    "sales_listing": (f"{API}/sales?limit=50", "store"),
+    "sales_listing_summary": (f"{API}/sales?limit=50&include=summary", "store"),
+}
+
+# Tables a scenario may scan in full. Reports over every store, or over all
+# of a store's history (top products without dates), read most rows of the
+# partitions they cover; low stock hashes products to join a store's rows
+# (losing ix_inventory_low_stock shows up as a scan of inventory instead).
+ALLOWED_SEQ_SCANS: Dict[str, List[str]] = {
+    "sales_summary_all": ["sales"],
+    "top_products_all": ["sales", "sale_line_items"],
+    "top_products_store": ["sales", "sale_line_items"],
+    "low_stock": ["products"],
+}
+
+PARTITION_SUFFIX = re.compile(r"_y\d{4}m\d{2}$")
+
+
+class StatementRecorder:
+    """Collects the SELECT statements the engine runs while recording"""
+
+    def __init__(self):
+        self.statements: List[Tuple[str, object]] = []
+        self.recording = False
+        event.listen(engine, "before_cursor_execute", self.record)
+
+    def record(self, conn, cursor, statement, parameters, context, executemany):
+        if self.recording and not executemany and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            self.statements.append((statement, parameters))
+
+
+def plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def explain(conn, statement: str, parameters) -> dict:
+    return conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()[0]["Plan"]
+
+
+def table_rows(conn) -> Dict[str, float]:
+    """Estimated rows of every table and partition, from the planner's statistics"""
+    return dict(conn.execute(text(
+        "SELECT relname, reltuples FROM pg_class WHERE relkind IN ('r', 'p', 'm') "
+        "AND relnamespace = to_regnamespace(current_schema())"
+    )).all())
+
+
+def check_statement(plan: dict, rows: Dict[str, float], large_rows: int, allowed: List[str]) -> List[str]:
+    problems = []
+    for node in plan_nodes(plan):
+        relation = node.get("Relation Name")
+        if node["Node Type"] != "Seq Scan" or not relation:
+            continue
+        if PARTITION_SUFFIX.sub("", relation) in allowed:
+            continue
+        estimated = rows.get(relation, 0)
+        if estimated > large_rows:
+            problems.append(f"Seq Scan on {relation} (~{int(estimated)} rows)")
+    return problems
+
+
+def fixtures() -> Tuple[Dict[str, Dict[str, str]], str]:
+    """Bearer headers for an admin and a non-admin of the busiest store, and a barcode to look up"""
+    db = SessionLocal()
+    try:
+        admin = db.query(User).filter(User.role == UserRole.ADMIN, User.is_active == 1).order_by(User.user_id).first()
+        busiest = db.query(Sale.store_id).group_by(Sale.store_id).order_by(
+            Sale.store_id.is_(None), func.count().desc()
+        ).limit(1).scalar()
+        store_user = db.query(User).filter(
+            User.role != UserRole.ADMIN, User.is_active == 1, User.store_id == busiest
+        ).order_by(User.role, User.user_id).first() or db.query(User).filter(
+            User.role != UserRole.ADMIN, User.is_active == 1, User.store_id.isnot(None)
+        ).order_by(User.user_id).first()
+        if admin is None or store_user is None:
+            raise SystemExit("Seed the database first: an admin and a store user are needed")
+        barcode = db.query(Product.barcode).filter(Product.barcode.isnot(None)).order_by(
+            Product.product_id.desc()
+        ).limit(1).scalar()
+        headers = {
+            who: {"Authorization": f"Bearer {create_access_token({'sub': str(user.user_id)})}"}
+            for who, user in (("admin", admin), ("store", store_user))
+        }
+        return headers, barcode or "0"
+    finally:
+        db.close()
+
+
+def run_scenarios(names: List[str], large_rows: int) -> Dict[str, dict]:
+    # Measure the queries themselves, not admission control or coalescing
+    settings.RATE_LIMIT_ENABLED = False
+    settings.SINGLE_FLIGHT_ENABLED = False
+    headers, barcode = fixtures()
+    recorder = StatementRecorder()
+    client = TestClient(app)
+    results = {}
+    with engine.connect() as conn:
+        rows = table_rows(conn)
+        for name in names:
+            path, who = SCENARIOS[name]
+            recorder.statements = []
+            recorder.recording = True
+            try:
+                response = client.get(path.format(barcode=barcode), headers=headers[who])
+            finally:
+                recorder.recording = False
+            statements = []
+            for statement, parameters in recorder.statements:
+                plan = explain(conn, statement, parameters)
+                statements.append({
+                    "sql": " ".join(statement.split())[:200],
+                    "cost": plan["Total Cost"],
+                    "problems": check_statement(plan, rows, large_rows, ALLOWED_SEQ_SCANS.get(name, [])),
+                })
+            results[name] = {
+                "status": response.status_code,
+                "total_cost": round(sum(s["cost"] for s in statements), 2),
+                "statements": statements,
+            }
+    return results
+
+
+def compare_plans(current: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """One message per scenario whose total estimated cost grew past `threshold` times the baseline"""
+    regressions = []
+    for name, result in current.items():
+        base = baseline.get(name)
+        if base and base["total_cost"] > 0 and result["total_cost"] > base["total_cost"] * threshold:
+            regressions.append(
+                f"{name}: cost {result['total_cost']:.0f} vs baseline {base['total_cost']:.0f} "
+                f"(x{result['total_cost'] / base['total_cost']:.2f})"
+            )
+    return regressions
+
+
+def print_plans(results: Dict[str, dict]) -> None:
+    header = f"{'scenario':<26}{'status':>7}{'stmts':>7}{'cost':>14}  problems"
+    print(header)
+    print("-" * len(header))
+    for name, result in results.items():
+        problems = [problem for s in result["statements"] for problem in s["problems"]]
+        print(f"{name:<26}{result['status']:>7}{len(result['statements']):>7}{result['total_cost']:>14.2f}  "
+              f"{'; '.join(problems) or '-'}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="EXPLAIN each scenario's queries and check for plan regressions")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--large-rows", type=int, default=10000,
+                        help="Tables with more estimated rows must not be sequentially scanned")
+    parser.add_argument("--output", help="Save the plans' costs as a JSON baseline")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="Cost ratio over baseline that counts as a regression")
+    args = parser.parse_args(argv)
+
+    if engine.dialect.name != "postgresql":
+        print("Query plans are checked on PostgreSQL only; set DATABASE_URL to the seeded database")
+        return 2
+
+    scenarios = run_scenarios(args.scenarios, args.large_rows)
+    print_plans(scenarios)
+    failures = [
+        f"{name}: {problem}" for name, result in scenarios.items()
+        for statement in result["statements"] for problem in statement["problems"]
+    ]
+    failures += [f"{name}: status {result['status']}" for name, result in scenarios.items() if result["status"] >= 400]
+
+    if args.output:
+        save_results({"meta": {"large_rows": args.large_rows}, "scenarios": scenarios}, args.output)
+    if args.compare:
+        failures += compare_plans(scenarios, load_results(args.compare)["scenarios"], args.threshold)
+
+    for message in failures:
+        print(f"REGRESSION {message}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Helpers for summarising benchmark timings and comparing runs against a baseline
+"""
+import json
+import os
+import subprocess
+from datetime import datetime
+from typing import Dict, List
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def summarize(latencies_ms: List[float], elapsed_s: float, errors: int = 0) -> Dict[str, float]:
+    """Summarise one scenario's request latencies"""
+    count = len(latencies_ms)
+    return {
+        "requests": count,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies_ms, 50), 3),
+        "p99_ms": round(percentile(latencies_ms, 99), 3),
+        "mean_ms": round(sum(latencies_ms) / count, 3) if count else 0.0,
+        "throughput_rps": round(count / elapsed_s, 2) if elapsed_s > 0 else 0.0,
+    }
+
+
+def git_revision() -> str:
+    """Short hash of the current commit, or 'unknown' outside a checkout"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def save_results(results: dict, path: str) -> None:
+    """Write results as JSON, stamped with the commit and time they came from"""
+    results.setdefault("meta", {}).update({
+        "commit": git_revision(),
+        "recorded_at": datetime.utcnow().isoformat(timespec="seconds"),
+    })
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def load_results(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare_results(current: dict, baseline: dict, threshold: float = 1.2) -> List[str]:
+    """
+    Compare scenario latencies against a baseline.
+
+    Returns one message per scenario whose p50 or p99 grew by more than
+    `threshold` times the baseline value.
+    """
+    regressions = []
+    for name, stats in current.get("scenarios", {}).items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        for metric in ("p50_ms", "p99_ms"):
+            if base[metric] > 0 and stats[metric] > base[metric] * threshold:
+                regressions.append(
+                    f"{name}: {metric} {stats[metric]:.2f} vs baseline {base[metric]:.2f} "
+                    f"(x{stats[metric] / base[metric]:.2f})"
+                )
+    return regressions
+
+
+def print_table(scenarios: Dict[str, dict]) -> None:
+    header = f"{'scenario':<28}{'reqs':>7}{'errors':>8}{'p50 ms':>10}{'p99 ms':>10}{'req/s':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, stats in scenarios.items():
+        print(
+            f"{name:<28}{stats['requests']:>7}{stats['errors']:>8}"
+            f"{stats['p50_ms']:>10.2f}{stats['p99_ms']:>10.2f}{stats['throughput_rps']:>10.1f}"
+        )
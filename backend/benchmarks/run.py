@@ -0,0 +1,174 @@
+"""
+End-to-end API benchmark
+
+Seeds (optionally) a local database, then drives the FastAPI app in process
+through httpx and reports p50/p99 latency and throughput per scenario.
+Results can be saved as a JSON baseline and later runs compared against it.
+
+Usage (from backend/):
+    python -m benchmarks.run --reset --products 5000 --months 6 --output benchmarks/results/base.json
+    python -m benchmarks.run --compare benchmarks/results/base.json
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+import httpx
+from benchmarks import seed as seeding
+from benchmarks.report import summarize, save_results, load_results, compare_results, print_table
+from app.main import app
+from app.models.base import SessionLocal
+from app.models.inventory import Inventory
+from app.models.product import Product
+
+API = "/api/v1"
+
+# name -> (method, path, role); paths may contain {barcode}
+SCENARIOS: Dict[str, Tuple[str, str, str]] = {
+    "checkout": ("POST", f"{API}/sales", "cashier"),
+    "barcode_lookup": ("GET", f"{API}/products/barcode/{{barcode}}", "cashier"),
+    "inventory_list": ("GET", f"{API}/inventory", "cashier"),
+    "analytics_sales_summary": ("GET", f"{API}/analytics/sales-summary", "admin"),
+    "analytics_top_products": ("GET", f"{API}/analytics/top-products", "admin"),
+    "analytics_inventory_metrics": ("GET", f"{API}/analytics/inventory-metrics", "admin"),
+    "analytics_daily_sales": ("GET", f"{API}/analytics/daily-sales", "admin"),
+    "analytics_customer_insights": ("GET", f"{API}/analytics/customer-insights", "admin"),
+}
+
+
+def load_fixtures(store_id: int = 1) -> Tuple[List[str], List[Tuple[int, float]]]:
+    """Barcodes to look up and well-stocked (product_id, price) pairs to sell"""
+    db = SessionLocal()
+    try:
+        barcodes = [b for (b,) in db.query(Product.barcode).filter(Product.barcode.isnot(None)).limit(5000)]
+        stocked = db.query(Product.product_id, Product.price).join(
+            Inventory, Inventory.product_id == Product.product_id
+        ).filter(
+            Inventory.store_id == store_id,
+            Inventory.quantity >= 1000
+        ).limit(5000).all()
+        return barcodes, [(p.product_id, p.price) for p in stocked]
+    finally:
+        db.close()
+
+
+async def login(client: httpx.AsyncClient, username: str) -> Dict[str, str]:
+    response = await client.post(f"{API}/auth/login", json={
+        "username": username, "password": seeding.BENCH_PASSWORD
+    })
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    send: Callable,
+    requests: int,
+    concurrency: int,
+) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            response = await send(client)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+def build_sender(name: str, headers: Dict[str, str], barcodes, stocked, rng: random.Random):
+    method, path, _ = SCENARIOS[name]
+
+    if name == "checkout":
+        async def send(client):
+            items = rng.sample(stocked, min(len(stocked), rng.randint(1, 5)))
+            return await client.post(path, headers=headers, json={
+                "payment_method": "cash",
+                "line_items": [
+                    {"product_id": pid, "quantity": 1, "unit_price": price} for pid, price in items
+                ],
+            })
+    elif name == "barcode_lookup":
+        async def send(client):
+            return await client.get(path.format(barcode=rng.choice(barcodes)), headers=headers)
+    else:
+        async def send(client):
+            return await client.request(method, path, headers=headers)
+    return send
+
+
+async def run_all(names: List[str], requests: int, concurrency: int, rng_seed: int) -> Dict[str, dict]:
+    barcodes, stocked = load_fixtures()
+    rng = random.Random(rng_seed)
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            tokens = {
+                "admin": await login(client, "bench_admin"),
+                "cashier": await login(client, "bench_cashier_1"),
+            }
+            results = {}
+            for name in names:
+                headers = tokens[SCENARIOS[name][2]]
+                send = build_sender(name, headers, barcodes, stocked, rng)
+                await send(client)  # warm-up
+                results[name] = await run_scenario(client, send, requests, concurrency)
+            return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the end-to-end API benchmark")
+    seeding.add_arguments(parser)
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse the data already in the database")
+    parser.add_argument("--scenarios", nargs="*", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--output", help="Save results as JSON to this path")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="Flag scenarios whose p50/p99 exceed baseline by this factor")
+    args = parser.parse_args(argv)
+
+    if not args.skip_seed:
+        if args.reset:
+            seeding.reset_schema()
+        else:
+            from init_db import run_migrations
+            run_migrations()
+        seeding.seed(seeding.config_from_args(args))
+
+    scenarios = asyncio.run(run_all(args.scenarios, args.requests, args.concurrency, args.seed))
+    results = {
+        "meta": {
+            "dataset": seeding.dataset_summary(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "scenarios": scenarios,
+    }
+    print_table(scenarios)
+
+    if args.output:
+        save_results(results, args.output)
+
+    if args.compare:
+        regressions = compare_results(results, load_results(args.compare), args.threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+"""
+Seed a benchmark database with a configurable volume of data
+
+Tables are filled with Core bulk inserts (executemany) in batches; the data is
+deterministic for a given --seed so runs on different commits are comparable.
+
+Usage (from backend/):
+    DATABASE_URL=sqlite:///./benchmark.db python -m benchmarks.seed --products 5000 --stores 3 --months 6
+"""
+import argparse
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta, date
+from sqlalchemy import insert, func, text
+from app.models.base import SessionLocal, engine
+from app.models.user import User, UserRole
+from app.models.store import Store
+from app.models.product import Product
+from app.models.inventory import Inventory
+from app.models.customer import Customer
+from app.models.sale import Sale, SaleLineItem, PaymentMethod
+from app.services.inventory import seed_lots_from_inventory
+from app.services.partitions import ensure_partitions
+from app.utils.auth import get_password_hash
+
+BATCH_SIZE = 5000
+BENCH_PASSWORD = "bench123"
+CATEGORIES = ["Beverages", "Snacks", "Dairy", "Bakery", "Fruits", "Household", "Frozen", "Personal Care"]
+
+
+@dataclass
+class SeedConfig:
+    products: int = 2000
+    stores: int = 2
+    months: int = 3
+    sales_per_day: int = 40
+    customers: int = 2000
+    seed: int = 42
+
+
+def _bulk_insert(db, model, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.execute(insert(model), rows[start:start + BATCH_SIZE])
+
+
+def _reset_sequences(db, tables):
+    """Explicit primary keys bypass PostgreSQL sequences; move them past the seeded ids"""
+    if engine.dialect.name != "postgresql":
+        return
+    for table, column in tables:
+        db.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', '{column}'), "
+            f"COALESCE((SELECT MAX({column}) FROM {table}), 1))"
+        ))
+
+
+def reset_schema():
+    """Drop and recreate every table through the Alembic migrations"""
+    from init_db import alembic_config, run_migrations
+    from alembic import command
+
+    command.downgrade(alembic_config(), "base")
+    run_migrations()
+
+
+def seed(config: SeedConfig) -> dict:
+    """Populate the database and return a description of what was created"""
+    rng = random.Random(config.seed)
+    db = SessionLocal()
+    try:
+        if db.query(Product).first():
+            raise RuntimeError("Benchmark database is not empty; rerun with --reset")
+
+        # Stores and users (one admin, one cashier per store)
+        stores = [{"store_id": i, "name": f"Bench Store {i}", "location": f"Site {i}"}
+                  for i in range(1, config.stores + 1)]
+        _bulk_insert(db, Store, stores)
+
+        password_hash = get_password_hash(BENCH_PASSWORD)
+        users = [{
+            "user_id": 1, "username": "bench_admin", "email": "bench_admin@example.com",
+            "password_hash": password_hash, "role": UserRole.ADMIN, "store_id": 1, "is_active": 1,
+        }]
+        for store in stores:
+            users.append({
+                "user_id": store["store_id"] + 1,
+                "username": f"bench_cashier_{store['store_id']}",
+                "email": f"bench_cashier_{store['store_id']}@example.com",
+                "password_hash": password_hash,
+                "role": UserRole.CASHIER,
+                "store_id": store["store_id"],
+                "is_active": 1,
+            })
+        _bulk_insert(db, User, users)
+
+        # Catalog
+        products = []
+        for pid in range(1, config.products + 1):
+            cost = round(rng.uniform(0.5, 40), 2)
+            products.append({
+                "product_id": pid,
+                "name": f"Bench Product {pid}",
+                "sku": f"BENCH-{pid:07d}",
+                "barcode": f"{2000000000000 + pid}",
+                "price": round(cost * rng.uniform(1.1, 1.8), 2),
+                "cost": cost,
+                "category": rng.choice(CATEGORIES),
+                "unit_of_measure": "pieces",
+            })
+        _bulk_insert(db, Product, products)
+
+        # Stock levels; a slice of items sits under its reorder level and some expire soon
+        today = date.today()
+        inventory = []
+        for store in stores:
+            for product in products:
+                low = rng.random() < 0.05
+                inventory.append({
+                    "product_id": product["product_id"],
+                    "store_id": store["store_id"],
+                    "quantity": rng.randint(0, 9) if low else rng.randint(50_000, 100_000),
+                    "reorder_level": 10,
+                    "expiry_date": today + timedelta(days=rng.randint(1, 365)) if rng.random() < 0.2 else None,
+                    "last_updated": datetime.utcnow(),
+                })
+        _bulk_insert(db, Inventory, inventory)
+        seed_lots_from_inventory(db)
+
+        customers = [{
+            "customer_id": cid,
+            "name": f"Customer {cid}",
+            "phone": f"555{cid:07d}",
+            "loyalty_points": 0,
+            "total_spent": 0,
+            "created_at": datetime.utcnow(),
+        } for cid in range(1, config.customers + 1)]
+        _bulk_insert(db, Customer, customers)
+
+        # Sales history
+        days = config.months * 30
+        start = datetime.utcnow() - timedelta(days=days)
+        ensure_partitions(db, start=start.date())
+        methods = list(PaymentMethod)
+        sales, line_items = [], []
+        sale_id = line_item_id = 0
+        for store in stores:
+            cashier_id = store["store_id"] + 1
+            for day in range(days):
+                for _ in range(config.sales_per_day):
+                    sale_id += 1
+                    total = 0.0
+                    first_line = len(line_items)
+                    for product in rng.sample(products, rng.randint(1, 5)):
+                        line_item_id += 1
+                        quantity = rng.randint(1, 3)
+                        line_total = round(quantity * product["price"], 2)
+                        total += line_total
+                        line_items.append({
+                            "line_item_id": line_item_id,
+                            "sale_id": sale_id,
+                            "product_id": product["product_id"],
+                            "quantity": quantity,
+                            "unit_price": product["price"],
+                            "discount": 0,
+                            "total": line_total,
+                        })
+                    sales.append({
+                        "sale_id": sale_id,
+                        "customer_id": rng.randint(1, config.customers) if config.customers and rng.random() < 0.4 else None,
+                        "total_amount": round(total, 2),
+                        "discount_amount": 0,
+                        "tax_amount": 0,
+                        "final_amount": round(total, 2),
+                        "payment_method": rng.choice(methods),
+                        "date": start + timedelta(days=day, seconds=rng.randint(8 * 3600, 22 * 3600)),
+                        "user_id": cashier_id,
+                        "store_id": store["store_id"],
+                        "receipt_seq": sale_id,  # unique within the store as well
+                    })
+                    for line in line_items[first_line:]:
+                        line["sale_date"] = sales[-1]["date"]
+                if len(line_items) >= BATCH_SIZE * 4:
+                    _bulk_insert(db, Sale, sales)
+                    _bulk_insert(db, SaleLineItem, line_items)
+                    sales, line_items = [], []
+        _bulk_insert(db, Sale, sales)
+        _bulk_insert(db, SaleLineItem, line_items)
+
+        _reset_sequences(db, [
+            ("stores", "store_id"), ("users", "user_id"), ("products", "product_id"),
+            ("customers", "customer_id"), ("sales", "sale_id"), ("sale_line_items", "line_item_id"),
+        ])
+        db.commit()
+
+        return {
+            "products": config.products,
+            "stores": config.stores,
+            "months": config.months,
+            "sales": sale_id,
+            "line_items": line_item_id,
+            "customers": config.customers,
+            "seed": config.seed,
+        }
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def dataset_summary() -> dict:
+    """Describe an already-seeded database"""
+    db = SessionLocal()
+    try:
+        return {
+            "products": db.query(func.count(Product.product_id)).scalar(),
+            "stores": db.query(func.count(Store.store_id)).scalar(),
+            "sales": db.query(func.count(Sale.sale_id)).scalar(),
+            "line_items": db.query(func.count(SaleLineItem.line_item_id)).scalar(),
+            "customers": db.query(func.count(Customer.customer_id)).scalar(),
+        }
+    finally:
+        db.close()
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = SeedConfig()
+    parser.add_argument("--products", type=int, default=defaults.products)
+    parser.add_argument("--stores", type=int, default=defaults.stores)
+    parser.add_argument("--months", type=int, default=defaults.months)
+    parser.add_argument("--sales-per-day", type=int, default=defaults.sales_per_day, help="Per store")
+    parser.add_argument("--customers", type=int, default=defaults.customers)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate the schema first")
+
+
+def config_from_args(args) -> SeedConfig:
+    return SeedConfig(
+        products=args.products,
+        stores=args.stores,
+        months=args.months,
+        sales_per_day=args.sales_per_day,
+        customers=args.customers,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed a benchmark database")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    if args.reset:
+        reset_schema()
+    else:
+        from init_db import run_migrations
+        run_migrations()
+
+    print(seed(config_from_args(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Serialization benchmark for large inventory list responses
+
+Compares, on the same synthetic rows, the old per-row path (build an
+InventoryWithProduct per row, let FastAPI re-validate the list through
+response_model and encode it with the stdlib json module) against
+rows_to_json, which encodes the query rows with orjson directly.
+
+Usage (from backend/):
+    python -m benchmarks.serialization --rows 50000
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from typing import List
+from pydantic import TypeAdapter
+from app.schemas.inventory import InventoryWithProduct
+from app.utils.serialization import rows_to_json
+from benchmarks.report import save_results
+
+Row = namedtuple("Row", [
+    "inventory_id", "product_id", "store_id", "quantity", "reorder_level", "expiry_date",
+    "last_updated", "product_name", "product_sku", "product_price",
+])
+
+
+def make_rows(count: int, seed: int = 42) -> List[Row]:
+    """Rows shaped like the inventory query's result (namedtuple, like Row._asdict)"""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    return [
+        Row(i, i, 1, float(rng.randint(0, 500)), 10.0,
+            date.today() + timedelta(days=rng.randint(1, 90)) if rng.random() < 0.2 else None,
+            now, f"Product {i}", f"SKU-{i:07d}", round(rng.uniform(0.5, 50), 2))
+        for i in range(1, count + 1)
+    ]
+
+
+def pydantic_path(rows: List[Row], adapter: TypeAdapter) -> bytes:
+    """What the endpoints did before: model per row, response_model validation, json.dumps"""
+    items = [InventoryWithProduct(**row._asdict()) for row in rows]
+    # FastAPI dumps returned models to dicts, then validates them against response_model
+    validated = adapter.validate_python([item.model_dump() for item in items])
+    content = adapter.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(rows: List[Row]) -> bytes:
+    return rows_to_json(rows).body
+
+
+def time_it(fn, repeats: int) -> List[float]:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare list response serialization paths")
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="Save results as JSON to this path")
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    adapter = TypeAdapter(List[InventoryWithProduct])
+
+    # Both paths must produce the same document
+    assert json.loads(pydantic_path(rows[:100], adapter)) == json.loads(fast_path(rows[:100]))
+
+    results = {"meta": {"rows": args.rows, "repeats": args.repeats}, "paths": {}}
+    for name, fn in (("pydantic_response_model", lambda: pydantic_path(rows, adapter)),
+                     ("orjson_rows", lambda: fast_path(rows))):
+        timings = time_it(fn, args.repeats)
+        results["paths"][name] = {
+            "median_ms": round(statistics.median(timings), 2),
+            "min_ms": round(min(timings), 2),
+        }
+        print(f"{name:<26}{results['paths'][name]['median_ms']:>10.1f} ms (median of {args.repeats})")
+
+    speedup = results["paths"]["pydantic_response_model"]["median_ms"] / results["paths"]["orjson_rows"]["median_ms"]
+    results["speedup"] = round(speedup, 1)
+    print(f"speedup: x{speedup:.1f}")
+
+    if args.output:
+        save_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
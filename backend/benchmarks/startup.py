@@ -0,0 +1,81 @@
+"""
+Startup-time benchmark
+
+Measures, in fresh interpreter processes, how long `import app.main` takes and
+how long the first request needs once the app is imported (lifespan startup +
+GET /health). Cold starts matter when the HPA adds pods under load, so this
+also reports whether heavy optional modules leaked into the import graph.
+
+Usage (from backend/):
+    python -m benchmarks.startup --runs 5 --output benchmarks/results/startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from benchmarks.report import save_results
+
+# Executed in a child interpreter so every run pays the full import cost.
+PROBE = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import app.main
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app.main.app) as client:
+    t2 = time.perf_counter()
+    status = client.get("/health").status_code
+    t3 = time.perf_counter()
+heavy = [m for m in ("qrcode", "PIL", "reportlab", "numpy", "pyarrow") if m in sys.modules]
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "lifespan_ms": (t2 - t1) * 1000,
+    "first_request_ms": (t3 - t2) * 1000,
+    "status": status,
+    "heavy_modules": heavy,
+}))
+"""
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_probe(env: dict) -> dict:
+    """Run one cold-start probe and return its timings"""
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=BACKEND_DIR,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import and first-request latency")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    # benchmarks/__init__ has already pointed DATABASE_URL at a local file
+    env = dict(os.environ)
+    runs = [run_probe(env) for _ in range(args.runs)]
+    results = {"runs": args.runs, "heavy_modules": runs[-1]["heavy_modules"]}
+    for key in ("import_ms", "lifespan_ms", "first_request_ms"):
+        values = [run[key] for run in runs]
+        results[key] = {
+            "median": round(statistics.median(values), 2),
+            "min": round(min(values), 2),
+            "max": round(max(values), 2),
+        }
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        save_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+"""
+Generate a large, realistic multi-store dataset for load testing
+
+Builds on init_db.py (schema migrations + default users) and then appends
+stores, products, stock, customers and months of sales. Everything is derived
+from --seed, so the same arguments always produce the same database.
+
+Sales follow a yearly season and a weekly cycle, and product popularity is
+Zipf-skewed so a small head of SKUs dominates volume, as in a real store.
+Rows are streamed to the database with COPY on PostgreSQL and with batched
+executemany on other databases.
+
+Example (~10M line items):
+    python generate_data.py --stores 20 --products 300000 --customers 500000 \\
+        --days 365 --sales-per-day 400
+"""
+import argparse
+import csv
+import enum
+import io
+import math
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, date, timedelta
+from typing import Iterable, List, Sequence
+from sqlalchemy import func, text
+from app.models.base import SessionLocal, engine
+from app.models.user import User, UserRole
+from app.models.store import Store
+from app.models.product import Product
+from app.models.inventory import Inventory
+from app.models.customer import Customer
+from app.models.sale import Sale, SaleLineItem, PaymentMethod
+from app.services.inventory import seed_lots_from_inventory
+from app.services.partitions import ensure_partitions
+from app.utils.auth import get_password_hash
+from init_db import init_db
+
+CATEGORIES = {
+    # category: (share of catalog, perishable shelf life in days or None, price range)
+    "Beverages": (0.14, None, (0.5, 6)),
+    "Snacks": (0.14, None, (0.8, 8)),
+    "Dairy": (0.08, 21, (0.9, 9)),
+    "Bakery": (0.06, 7, (1.0, 7)),
+    "Fruits": (0.07, 14, (0.4, 6)),
+    "Vegetables": (0.07, 10, (0.3, 5)),
+    "Frozen": (0.08, 180, (2.0, 15)),
+    "Household": (0.14, None, (1.5, 25)),
+    "Personal Care": (0.12, None, (1.5, 30)),
+    "Electronics": (0.10, None, (5.0, 250)),
+}
+PAYMENT_WEIGHTS = [(PaymentMethod.CARD, 45), (PaymentMethod.CASH, 25), (PaymentMethod.UPI, 20),
+                   (PaymentMethod.WALLET, 9), (PaymentMethod.CHECK, 1)]
+
+
+@dataclass
+class GeneratorConfig:
+    stores: int = 5
+    products: int = 50_000
+    customers: int = 100_000
+    days: int = 180
+    sales_per_day: int = 300  # average per store
+    zipf_exponent: float = 1.1
+    seed: int = 42
+    batch_size: int = 50_000
+    password: str = "cashier123"
+
+
+class BulkLoader:
+    """Streams rows into a table with COPY (PostgreSQL) or batched executemany"""
+
+    def __init__(self, connection, batch_size: int):
+        self.connection = connection
+        self.batch_size = batch_size
+        self.use_copy = connection.dialect.name == "postgresql"
+        self.rows_written = 0
+
+    def skip_fk_checks(self) -> bool:
+        """
+        Skip per-row foreign key triggers for this transaction (PostgreSQL).
+
+        The generated rows are consistent by construction, and the RI triggers
+        cost roughly ten times the COPY itself. Needs superuser; without it
+        the load simply runs with the checks.
+        """
+        if not self.use_copy:
+            return False
+        savepoint = self.connection.begin_nested()
+        try:
+            self.connection.execute(text("SET LOCAL session_replication_role = replica"))
+            savepoint.commit()
+            return True
+        except Exception:
+            savepoint.rollback()
+            return False
+
+    def load(self, table, columns: Sequence[str], rows: Iterable[tuple]) -> None:
+        batch: List[tuple] = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self._flush(table, columns, batch)
+                batch = []
+        if batch:
+            self._flush(table, columns, batch)
+
+    def _flush(self, table, columns, batch):
+        if self.use_copy:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in batch:
+                writer.writerow(["" if v is None else v.name if isinstance(v, enum.Enum) else v for v in row])
+            buffer.seek(0)
+            cursor = self.connection.connection.cursor()
+            cursor.copy_expert(
+                f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+        else:
+            self.connection.execute(table.insert(), [dict(zip(columns, row)) for row in batch])
+        self.rows_written += len(batch)
+
+
+def zipf_cum_weights(n: int, exponent: float) -> List[float]:
+    """Cumulative Zipf weights over ranks 1..n, for random.choices"""
+    total, cumulative = 0.0, []
+    for rank in range(1, n + 1):
+        total += 1.0 / rank ** exponent
+        cumulative.append(total)
+    return cumulative
+
+
+def seasonal_factor(day: date) -> float:
+    """Relative sales volume for a day: yearly wave, weekends and December peak"""
+    yearly = 1.0 + 0.2 * math.sin(2 * math.pi * (day.timetuple().tm_yday - 80) / 365)
+    weekly = 1.3 if day.weekday() >= 5 else 1.0
+    holiday = 1.5 if day.month == 12 and day.day >= 10 else 1.0
+    return yearly * weekly * holiday
+
+
+def _max_id(db, column) -> int:
+    return db.query(func.max(column)).scalar() or 0
+
+
+def _reset_sequences(connection, tables):
+    if connection.dialect.name != "postgresql":
+        return
+    for table, column in tables:
+        connection.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', '{column}'), "
+            f"COALESCE((SELECT MAX({column}) FROM {table}), 1))"
+        ))
+
+
+def generate(config: GeneratorConfig) -> dict:
+    rng = random.Random(config.seed)
+    started = time.perf_counter()
+
+    db = SessionLocal()
+    try:
+        store_offset = _max_id(db, Store.store_id)
+        user_offset = _max_id(db, User.user_id)
+        product_offset = _max_id(db, Product.product_id)
+        customer_offset = _max_id(db, Customer.customer_id)
+        sale_offset = _max_id(db, Sale.sale_id)
+        line_offset = _max_id(db, SaleLineItem.line_item_id)
+    finally:
+        db.close()
+
+    today = date.today()
+    now = datetime.utcnow()
+    counts = {}
+
+    with engine.begin() as connection:
+        loader = BulkLoader(connection, config.batch_size)
+        # Monthly sales partitions (PostgreSQL) for the whole generated history
+        ensure_partitions(connection, start=today - timedelta(days=config.days))
+        if loader.skip_fk_checks():
+            print("  foreign key triggers disabled for the load")
+
+        # Stores, each with one cashier; store size scales its traffic
+        store_ids = [store_offset + i for i in range(1, config.stores + 1)]
+        store_factor = {sid: rng.uniform(0.5, 1.5) for sid in store_ids}
+        loader.load(Store.__table__, ("store_id", "name", "location", "created_at"), (
+            (sid, f"Store {sid}", f"District {rng.randint(1, 99)}", now) for sid in store_ids
+        ))
+        password_hash = get_password_hash(config.password)
+        cashier_for = {sid: user_offset + i for i, sid in enumerate(store_ids, start=1)}
+        loader.load(User.__table__, ("user_id", "username", "email", "password_hash", "role", "store_id",
+                                     "created_at", "is_active"), (
+            (uid, f"cashier_s{sid}", f"cashier_s{sid}@example.com", password_hash, UserRole.CASHIER,
+             sid, now, 1) for sid, uid in cashier_for.items()
+        ))
+
+        # Catalog; popularity rank is a random permutation of product ids
+        names = list(CATEGORIES)
+        shares = [CATEGORIES[c][0] for c in names]
+        product_ids = list(range(product_offset + 1, product_offset + config.products + 1))
+        categories, prices = {}, {}
+
+        def product_rows():
+            for pid in product_ids:
+                category = rng.choices(names, weights=shares)[0]
+                low, high = CATEGORIES[category][2]
+                cost = round(rng.uniform(low, high), 2)
+                price = round(cost * rng.uniform(1.15, 1.6), 2)
+                categories[pid], prices[pid] = category, price
+                yield (pid, f"{category} item {pid}", f"GEN-{pid:08d}", f"{4000000000000 + pid}",
+                       price, cost, category, "pieces")
+
+        loader.load(Product.__table__, ("product_id", "name", "sku", "barcode", "price", "cost",
+                                        "category", "unit_of_measure"), product_rows())
+        by_popularity = product_ids[:]
+        rng.shuffle(by_popularity)
+        product_weights = zipf_cum_weights(len(by_popularity), config.zipf_exponent)
+
+        # Stock per store, with expiry dates on perishables
+        def inventory_rows():
+            for sid in store_ids:
+                for pid in product_ids:
+                    shelf_life = CATEGORIES[categories[pid]][1]
+                    expiry = today + timedelta(days=rng.randint(1, shelf_life)) if shelf_life else None
+                    reorder = rng.choice((5, 10, 20, 50))
+                    yield (pid, sid, rng.randint(0, reorder * 20), reorder, expiry, now)
+
+        loader.load(Inventory.__table__, ("product_id", "store_id", "quantity", "reorder_level",
+                                          "expiry_date", "last_updated"), inventory_rows())
+        seed_lots_from_inventory(connection, store_ids)
+
+        # Customers, a Zipf-skewed few of whom shop far more often
+        customer_ids = list(range(customer_offset + 1, customer_offset + config.customers + 1))
+        loader.load(Customer.__table__, ("customer_id", "name", "phone", "email", "loyalty_points",
+                                         "total_spent", "created_at"), (
+            (cid, f"Customer {cid}", f"9{cid:09d}", None, 0, 0,
+             now - timedelta(days=rng.randint(0, config.days))) for cid in customer_ids
+        ))
+        customer_weights = zipf_cum_weights(len(customer_ids), 0.8) if customer_ids else []
+        methods = [m for m, _ in PAYMENT_WEIGHTS]
+        method_weights = [w for _, w in PAYMENT_WEIGHTS]
+
+        # Sales and line items, streamed day by day
+        sale_rows: List[tuple] = []
+        line_rows: List[tuple] = []
+        sale_id, line_id = sale_offset, line_offset
+        receipt_seqs = dict.fromkeys(store_ids, 0)  # the stores are new, so numbering starts at 1
+        first_day = today - timedelta(days=config.days)
+        for offset in range(config.days):
+            day = first_day + timedelta(days=offset)
+            season = seasonal_factor(day)
+            for sid in store_ids:
+                volume = max(1, int(rng.gauss(1.0, 0.1) * config.sales_per_day * season * store_factor[sid]))
+                sizes = [min(30, int(rng.expovariate(1 / 3.5)) + 1) for _ in range(volume)]
+                picks = rng.choices(by_popularity, cum_weights=product_weights, k=sum(sizes))
+                position = 0
+                for size in sizes:
+                    sale_id += 1
+                    receipt_seqs[sid] += 1
+                    total = 0.0
+                    lines = []
+                    for pid in picks[position:position + size]:
+                        line_id += 1
+                        quantity = 1 if rng.random() < 0.7 else rng.randint(2, 6)
+                        line_total = round(quantity * prices[pid], 2)
+                        total += line_total
+                        lines.append((line_id, sale_id, pid, quantity, prices[pid], 0, line_total))
+                    position += size
+                    customer = None
+                    if customer_ids and rng.random() < 0.35:
+                        customer = rng.choices(customer_ids, cum_weights=customer_weights)[0]
+                    total = round(total, 2)
+                    method = rng.choices(methods, weights=method_weights)[0]
+                    sold_at = datetime(day.year, day.month, day.day) + timedelta(seconds=rng.randint(8 * 3600, 22 * 3600))
+                    sale_rows.append((
+                        sale_id, customer, total, 0, 0, total, method, sold_at,
+                        cashier_for[sid], sid, receipt_seqs[sid],
+                    ))
+                    line_rows.extend(line + (sold_at,) for line in lines)
+            if len(line_rows) >= config.batch_size:
+                loader.load(Sale.__table__, ("sale_id", "customer_id", "total_amount", "discount_amount",
+                                             "tax_amount", "final_amount", "payment_method", "date",
+                                             "user_id", "store_id", "receipt_seq"), sale_rows)
+                loader.load(SaleLineItem.__table__, ("line_item_id", "sale_id", "product_id", "quantity",
+                                                     "unit_price", "discount", "total", "sale_date"), line_rows)
+                sale_rows, line_rows = [], []
+                print(f"  {day}: {sale_id - sale_offset:,} sales, {line_id - line_offset:,} line items "
+                      f"({time.perf_counter() - started:.0f}s)")
+
+        loader.load(Sale.__table__, ("sale_id", "customer_id", "total_amount", "discount_amount",
+                                     "tax_amount", "final_amount", "payment_method", "date",
+                                     "user_id", "store_id", "receipt_seq"), sale_rows)
+        loader.load(SaleLineItem.__table__, ("line_item_id", "sale_id", "product_id", "quantity",
+                                             "unit_price", "discount", "total", "sale_date"), line_rows)
+
+        _reset_sequences(connection, [
+            ("stores", "store_id"), ("users", "user_id"), ("products", "product_id"),
+            ("customers", "customer_id"), ("sales", "sale_id"), ("sale_line_items", "line_item_id"),
+            ("inventory", "inventory_id"),
+        ])
+
+        counts = {
+            "stores": len(store_ids),
+            "products": len(product_ids),
+            "customers": len(customer_ids),
+            "sales": sale_id - sale_offset,
+            "line_items": line_id - line_offset,
+            "rows_written": loader.rows_written,
+        }
+
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text("ANALYZE"))
+
+    counts["seconds"] = round(time.perf_counter() - started, 1)
+    return counts
+
+
+def main():
+    defaults = GeneratorConfig()
+    parser = argparse.ArgumentParser(description="Generate a large synthetic dataset")
+    parser.add_argument("--stores", type=int, default=defaults.stores)
+    parser.add_argument("--products", type=int, default=defaults.products)
+    parser.add_argument("--customers", type=int, default=defaults.customers)
+    parser.add_argument("--days", type=int, default=defaults.days, help="Days of sales history")
+    parser.add_argument("--sales-per-day", type=int, default=defaults.sales_per_day,
+                        help="Average sales per store per day")
+    parser.add_argument("--zipf", type=float, default=defaults.zipf_exponent,
+                        help="Product popularity skew (higher = more concentrated)")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--batch-size", type=int, default=defaults.batch_size)
+    args = parser.parse_args()
+
+    # Schema + default admin/manager/cashier accounts
+    init_db()
+
+    config = GeneratorConfig(
+        stores=args.stores,
+        products=args.products,
+        customers=args.customers,
+        days=args.days,
+        sales_per_day=args.sales_per_day,
+        zipf_exponent=args.zipf,
+        seed=args.seed,
+        batch_size=args.batch_size,
+    )
+    print(f"Generating dataset: {config}")
+    counts = generate(config)
+    print("Done:", ", ".join(f"{k}={v:,}" if isinstance(v, int) else f"{k}={v}" for k, v in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
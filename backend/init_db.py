@@ -2,8 +2,12 @@
 Initialize the database with sample data
 Run this script after starting the application to create initial users and data
 """
+import os
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
 from sqlalchemy.orm import Session
-from app.models.base import SessionLocal, engine, Base
+from app.models.base import SessionLocal, engine
 from app.models.user import User, UserRole
 from app.models.store import Store
 from app.models.product import Product
@@ -12,11 +16,34 @@ from app.models.inventory import Inventory
 from app.utils.auth import get_password_hash
 from app.utils.qr_code import generate_qr_code_data
 
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")
+
+
+def alembic_config() -> Config:
+    """Alembic configuration that works from any working directory"""
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", os.path.join(os.path.dirname(ALEMBIC_INI), "migrations"))
+    return config
+
+
+def run_migrations():
+    """Bring the schema up to the latest Alembic revision"""
+    config = alembic_config()
+
+    tables = inspect(engine).get_table_names()
+    if "users" in tables and "alembic_version" not in tables:
+        # Database was bootstrapped by the old create_all path; adopt it
+        # at the baseline revision instead of recreating existing tables.
+        command.stamp(config, "0001")
+
+    command.upgrade(config, "head")
+
+
 def init_db():
     """Initialize database with sample data"""
     
-    # Create all tables
-    Base.metadata.create_all(bind=engine)
+    # Apply schema migrations
+    run_migrations()
     
     db = SessionLocal()
     
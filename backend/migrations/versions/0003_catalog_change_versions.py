@@ -0,0 +1,48 @@
+"""catalog change versions
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    sync_counters = op.create_table('sync_counters',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table('product_tombstones',
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('change_version', sa.BigInteger(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('product_id')
+    )
+    op.create_index(op.f('ix_product_tombstones_change_version'), 'product_tombstones', ['change_version'], unique=False)
+    op.add_column('products', sa.Column('change_version', sa.BigInteger(), server_default='0', nullable=False))
+    op.create_index('ix_products_change_version', 'products', ['change_version', 'product_id'], unique=False)
+
+    # Existing products all become version 1, so a client syncing from 0 gets the full catalog
+    op.execute("UPDATE products SET change_version = 1")
+    op.bulk_insert(sync_counters, [{'name': 'catalog', 'value': 1}])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_change_version', table_name='products')
+    with op.batch_alter_table('products') as batch_op:
+        batch_op.drop_column('change_version')
+    op.drop_index(op.f('ix_product_tombstones_change_version'), table_name='product_tombstones')
+    op.drop_table('product_tombstones')
+    op.drop_table('sync_counters')
@@ -0,0 +1,31 @@
+"""inventory low stock partial index
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    predicate = sa.text('quantity <= reorder_level')
+    op.create_index(
+        'ix_inventory_low_stock', 'inventory', ['store_id', 'inventory_id'],
+        postgresql_where=predicate,
+        sqlite_where=predicate,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_inventory_low_stock', table_name='inventory')
@@ -0,0 +1,52 @@
+"""inventory lots
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'inventory_lots',
+        sa.Column('lot_id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('store_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Float(), nullable=False),
+        sa.Column('expiry_date', sa.Date(), nullable=False),
+        sa.Column('received_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['product_id'], ['products.product_id']),
+        sa.ForeignKeyConstraint(['store_id'], ['stores.store_id']),
+        sa.PrimaryKeyConstraint('lot_id')
+    )
+    op.create_index(op.f('ix_inventory_lots_lot_id'), 'inventory_lots', ['lot_id'], unique=False)
+    op.create_index('ix_inventory_lots_store_expiry', 'inventory_lots', ['store_id', 'expiry_date'], unique=False)
+    op.create_index('ix_inventory_lots_expiry', 'inventory_lots', ['expiry_date'], unique=False)
+    op.create_index('ix_inventory_lots_fefo', 'inventory_lots', ['store_id', 'product_id', 'expiry_date'], unique=False)
+
+    # Existing dated stock becomes a single lot per product and store
+    op.execute(
+        "INSERT INTO inventory_lots (product_id, store_id, quantity, expiry_date, received_at) "
+        "SELECT product_id, store_id, quantity, expiry_date, last_updated FROM inventory "
+        "WHERE expiry_date IS NOT NULL AND quantity > 0"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_inventory_lots_fefo', table_name='inventory_lots')
+    op.drop_index('ix_inventory_lots_expiry', table_name='inventory_lots')
+    op.drop_index('ix_inventory_lots_store_expiry', table_name='inventory_lots')
+    op.drop_index(op.f('ix_inventory_lots_lot_id'), table_name='inventory_lots')
+    op.drop_table('inventory_lots')
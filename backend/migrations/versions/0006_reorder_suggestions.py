@@ -0,0 +1,41 @@
+"""reorder suggestions
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'reorder_suggestions',
+        sa.Column('store_id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('moving_average', sa.Float(), nullable=False),
+        sa.Column('smoothed_demand', sa.Float(), nullable=False),
+        sa.Column('demand_std', sa.Float(), nullable=False),
+        sa.Column('safety_stock', sa.Float(), nullable=False),
+        sa.Column('reorder_point', sa.Float(), nullable=False),
+        sa.Column('current_quantity', sa.Float(), nullable=False),
+        sa.Column('suggested_order_quantity', sa.Float(), nullable=False),
+        sa.Column('generated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['product_id'], ['products.product_id']),
+        sa.ForeignKeyConstraint(['store_id'], ['stores.store_id']),
+        sa.PrimaryKeyConstraint('store_id', 'product_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('reorder_suggestions')
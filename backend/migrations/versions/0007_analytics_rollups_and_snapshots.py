@@ -0,0 +1,47 @@
+"""analytics rollups and valuation snapshots
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'daily_sales_rollups',
+        sa.Column('store_id', sa.Integer(), nullable=False),
+        sa.Column('sale_date', sa.Date(), nullable=False),
+        sa.Column('total_sales', sa.Float(), nullable=False),
+        sa.Column('transaction_count', sa.Integer(), nullable=False),
+        sa.Column('rebuilt_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['store_id'], ['stores.store_id']),
+        sa.PrimaryKeyConstraint('store_id', 'sale_date')
+    )
+    op.create_table(
+        'inventory_valuation_snapshots',
+        sa.Column('store_id', sa.Integer(), nullable=False),
+        sa.Column('snapshot_date', sa.Date(), nullable=False),
+        sa.Column('total_items', sa.Integer(), nullable=False),
+        sa.Column('total_quantity', sa.Float(), nullable=False),
+        sa.Column('total_value', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['store_id'], ['stores.store_id']),
+        sa.PrimaryKeyConstraint('store_id', 'snapshot_date')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('inventory_valuation_snapshots')
+    op.drop_table('daily_sales_rollups')
@@ -0,0 +1,41 @@
+"""loyalty ledger
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'loyalty_ledger',
+        sa.Column('entry_id', sa.Integer(), nullable=False),
+        sa.Column('customer_id', sa.Integer(), nullable=False),
+        sa.Column('sale_id', sa.Integer(), nullable=True),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('points', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['customer_id'], ['customers.customer_id']),
+        sa.ForeignKeyConstraint(['sale_id'], ['sales.sale_id']),
+        sa.PrimaryKeyConstraint('entry_id'),
+        sa.UniqueConstraint('sale_id')
+    )
+    op.create_index('ix_loyalty_ledger_customer_entry', 'loyalty_ledger', ['customer_id', 'entry_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_loyalty_ledger_customer_entry', table_name='loyalty_ledger')
+    op.drop_table('loyalty_ledger')
+    op.execute("DELETE FROM sync_counters WHERE name = 'loyalty_folded'")
@@ -0,0 +1,41 @@
+"""customer phone search
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('customers', sa.Column('last_purchase_at', sa.DateTime(), nullable=True))
+    # One grouped pass over sales rather than a correlated lookup per customer
+    op.execute(
+        "UPDATE customers SET last_purchase_at = latest.last_purchase_at "
+        "FROM (SELECT customer_id, MAX(date) AS last_purchase_at FROM sales "
+        "WHERE customer_id IS NOT NULL GROUP BY customer_id) AS latest "
+        "WHERE customers.customer_id = latest.customer_id"
+    )
+    if op.get_bind().dialect.name == 'postgresql':
+        op.create_index(
+            'ix_customers_phone_pattern', 'customers', ['phone'],
+            postgresql_ops={'phone': 'varchar_pattern_ops'}
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_customers_phone_pattern', table_name='customers')
+    with op.batch_alter_table('customers') as batch_op:
+        batch_op.drop_column('last_purchase_at')
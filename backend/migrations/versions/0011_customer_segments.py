@@ -0,0 +1,43 @@
+"""customer segments
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0011'
+down_revision: Union[str, None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'customer_segments',
+        sa.Column('customer_id', sa.Integer(), nullable=False),
+        sa.Column('segment', sa.String(length=30), nullable=False),
+        sa.Column('recency_days', sa.Integer(), nullable=False),
+        sa.Column('frequency', sa.Integer(), nullable=False),
+        sa.Column('monetary', sa.Float(), nullable=False),
+        sa.Column('r_score', sa.Integer(), nullable=False),
+        sa.Column('f_score', sa.Integer(), nullable=False),
+        sa.Column('m_score', sa.Integer(), nullable=False),
+        sa.Column('computed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['customer_id'], ['customers.customer_id']),
+        sa.PrimaryKeyConstraint('customer_id')
+    )
+    op.create_index(
+        'ix_customer_segments_segment_monetary', 'customer_segments', ['segment', 'monetary', 'customer_id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_customer_segments_segment_monetary', table_name='customer_segments')
+    op.drop_table('customer_segments')
@@ -0,0 +1,57 @@
+"""sale receipt sequences
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0012'
+down_revision: Union[str, None] = '0011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('sales', sa.Column('receipt_seq', sa.BigInteger(), nullable=True))
+    # Existing sales are numbered per store in sale_id order
+    op.execute(
+        "UPDATE sales SET receipt_seq = numbered.receipt_seq "
+        "FROM (SELECT sale_id, ROW_NUMBER() OVER (PARTITION BY store_id ORDER BY sale_id) AS receipt_seq "
+        "FROM sales) AS numbered "
+        "WHERE sales.sale_id = numbered.sale_id"
+    )
+    op.execute(
+        "INSERT INTO sync_counters (name, value) "
+        "SELECT 'receipt:' || store_id, MAX(receipt_seq) FROM sales GROUP BY store_id"
+    )
+    op.drop_index('ix_sales_receipt_number', table_name='sales')
+    with op.batch_alter_table('sales') as batch_op:
+        batch_op.alter_column('receipt_seq', existing_type=sa.BigInteger(), nullable=False)
+        batch_op.create_unique_constraint('uq_sales_store_receipt_seq', ['store_id', 'receipt_seq'])
+        batch_op.drop_column('receipt_number')
+
+
+def downgrade() -> None:
+    op.add_column('sales', sa.Column('receipt_number', sa.String(length=50), nullable=True))
+    if op.get_bind().dialect.name == 'postgresql':
+        # lpad truncates longer values, so pad only up to the minimum width
+        op.execute(
+            "UPDATE sales SET receipt_number = "
+            "'R' || lpad(store_id::text, greatest(3, length(store_id::text)), '0') || '-' || "
+            "lpad(receipt_seq::text, greatest(8, length(receipt_seq::text)), '0')"
+        )
+    else:
+        op.execute("UPDATE sales SET receipt_number = printf('R%03d-%08d', store_id, receipt_seq)")
+    op.execute("DELETE FROM sync_counters WHERE name LIKE 'receipt:%'")
+    with op.batch_alter_table('sales') as batch_op:
+        batch_op.drop_constraint('uq_sales_store_receipt_seq', type_='unique')
+        batch_op.drop_column('receipt_seq')
+        batch_op.alter_column('receipt_number', existing_type=sa.String(length=50), nullable=False)
+    op.create_index('ix_sales_receipt_number', 'sales', ['receipt_number'], unique=True)
@@ -0,0 +1,157 @@
+"""partition sales by month
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0013'
+down_revision: Union[str, None] = '0012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+
+def _month(day: date, offset: int = 0) -> date:
+    months = day.year * 12 + day.month - 1 + offset
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def _create_month_partitions(first: date, last: date) -> None:
+    month = first
+    while month <= last:
+        suffix = f"y{month.year}m{month.month:02d}"
+        bounds = f"FROM ('{month}') TO ('{_month(month, 1)}')"
+        op.execute(f"CREATE TABLE sales_{suffix} PARTITION OF sales FOR VALUES {bounds}")
+        op.execute(f"CREATE TABLE sale_line_items_{suffix} PARTITION OF sale_line_items FOR VALUES {bounds}")
+        month = _month(month, 1)
+
+
+def _add_sales_constraints(unique_columns: str) -> None:
+    op.execute("ALTER TABLE sales ADD CONSTRAINT sales_customer_id_fkey "
+               "FOREIGN KEY (customer_id) REFERENCES customers (customer_id)")
+    op.execute("ALTER TABLE sales ADD CONSTRAINT sales_store_id_fkey "
+               "FOREIGN KEY (store_id) REFERENCES stores (store_id)")
+    op.execute("ALTER TABLE sales ADD CONSTRAINT sales_user_id_fkey "
+               "FOREIGN KEY (user_id) REFERENCES users (user_id)")
+    op.execute(f"ALTER TABLE sales ADD CONSTRAINT uq_sales_store_receipt_seq UNIQUE ({unique_columns})")
+    op.create_index('ix_sales_sale_id', 'sales', ['sale_id'])
+    op.create_index('ix_sales_date', 'sales', ['date'])
+    op.execute("ALTER TABLE sale_line_items ADD CONSTRAINT sale_line_items_product_id_fkey "
+               "FOREIGN KEY (product_id) REFERENCES products (product_id)")
+    op.create_index('ix_sale_line_items_line_item_id', 'sale_line_items', ['line_item_id'])
+    op.create_index('ix_sale_line_items_sale_id', 'sale_line_items', ['sale_id'])
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        # Same columns everywhere; only PostgreSQL partitions the tables
+        op.execute("UPDATE sales SET date = CURRENT_TIMESTAMP WHERE date IS NULL")
+        op.add_column('sale_line_items', sa.Column('sale_date', sa.DateTime(), nullable=True))
+        op.execute(
+            "UPDATE sale_line_items SET sale_date = sales.date FROM sales "
+            "WHERE sales.sale_id = sale_line_items.sale_id"
+        )
+        with op.batch_alter_table('sales') as batch_op:
+            batch_op.alter_column('date', existing_type=sa.DateTime(), nullable=False)
+        with op.batch_alter_table('sale_line_items') as batch_op:
+            batch_op.alter_column('sale_date', existing_type=sa.DateTime(), nullable=False)
+        return
+
+    # Rebuild both tables as range-partitioned parents and copy the rows over.
+    # Primary and unique keys of a partitioned table must include its
+    # partition key, so sales is keyed (sale_id, date) and line items
+    # reference their sale through (sale_id, sale_date).
+    op.execute("UPDATE sales SET date = CURRENT_TIMESTAMP WHERE date IS NULL")
+    op.execute("ALTER SEQUENCE sales_sale_id_seq OWNED BY NONE")
+    op.execute("ALTER SEQUENCE sale_line_items_line_item_id_seq OWNED BY NONE")
+    # The ledger keeps sale ids but can no longer reference sale_id alone
+    op.drop_constraint('loyalty_ledger_sale_id_fkey', 'loyalty_ledger', type_='foreignkey')
+    op.rename_table('sale_line_items', 'sale_line_items_unpartitioned')
+    op.rename_table('sales', 'sales_unpartitioned')
+
+    op.execute("CREATE TABLE sales (LIKE sales_unpartitioned INCLUDING DEFAULTS) PARTITION BY RANGE (date)")
+    op.execute("ALTER TABLE sales ALTER COLUMN date SET NOT NULL")
+    op.execute(
+        "CREATE TABLE sale_line_items (LIKE sale_line_items_unpartitioned INCLUDING DEFAULTS, "
+        "sale_date timestamp without time zone NOT NULL) PARTITION BY RANGE (sale_date)"
+    )
+    today = date.today()
+    oldest = bind.execute(sa.text("SELECT MIN(date) FROM sales_unpartitioned")).scalar()
+    _create_month_partitions(_month(min(oldest.date(), today) if oldest else today), _month(today, MONTHS_AHEAD))
+
+    op.execute("INSERT INTO sales SELECT * FROM sales_unpartitioned")
+    op.execute(
+        "INSERT INTO sale_line_items SELECT items.*, sales.date FROM sale_line_items_unpartitioned AS items "
+        "JOIN sales_unpartitioned AS sales ON sales.sale_id = items.sale_id"
+    )
+    op.drop_table('sale_line_items_unpartitioned')
+    op.drop_table('sales_unpartitioned')
+    op.execute("ALTER SEQUENCE sales_sale_id_seq OWNED BY sales.sale_id")
+    op.execute("ALTER SEQUENCE sale_line_items_line_item_id_seq OWNED BY sale_line_items.line_item_id")
+
+    # Keys and indexes are built once the rows are in place
+    op.execute("ALTER TABLE sales ADD CONSTRAINT sales_pkey PRIMARY KEY (sale_id, date)")
+    op.execute("ALTER TABLE sale_line_items ADD CONSTRAINT sale_line_items_pkey PRIMARY KEY (line_item_id, sale_date)")
+    _add_sales_constraints('store_id, receipt_seq, date')
+    op.execute("ALTER TABLE sale_line_items ADD CONSTRAINT sale_line_items_sale_fkey "
+               "FOREIGN KEY (sale_id, sale_date) REFERENCES sales (sale_id, date)")
+    op.execute("ANALYZE sales")
+    op.execute("ANALYZE sale_line_items")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        with op.batch_alter_table('sale_line_items') as batch_op:
+            batch_op.drop_column('sale_date')
+        with op.batch_alter_table('sales') as batch_op:
+            batch_op.alter_column('date', existing_type=sa.DateTime(), nullable=True)
+        return
+
+    # Back to plain tables. Months already detached into the archive schema
+    # stay there and are not copied back; any of their line items still
+    # keyed to sales (archived before the key was dropped on detach) lose
+    # that key, or dropping the partitioned sales table would fail.
+    stale_keys = bind.execute(sa.text(
+        "SELECT conrelid::regclass::text, conname FROM pg_constraint "
+        "WHERE contype = 'f' AND confrelid = 'sales'::regclass AND conparentid = 0 "
+        "AND conrelid <> 'sale_line_items'::regclass"
+    )).all()
+    for table, constraint in stale_keys:
+        op.execute(f'ALTER TABLE {table} DROP CONSTRAINT "{constraint}"')
+    op.execute("ALTER SEQUENCE sales_sale_id_seq OWNED BY NONE")
+    op.execute("ALTER SEQUENCE sale_line_items_line_item_id_seq OWNED BY NONE")
+    op.rename_table('sale_line_items', 'sale_line_items_partitioned')
+    op.rename_table('sales', 'sales_partitioned')
+    op.execute("CREATE TABLE sales (LIKE sales_partitioned INCLUDING DEFAULTS)")
+    op.execute("ALTER TABLE sales ALTER COLUMN date DROP NOT NULL")
+    op.execute("CREATE TABLE sale_line_items (LIKE sale_line_items_partitioned INCLUDING DEFAULTS)")
+    op.execute("ALTER TABLE sale_line_items DROP COLUMN sale_date")
+    op.execute("INSERT INTO sales SELECT * FROM sales_partitioned")
+    op.execute(
+        "INSERT INTO sale_line_items SELECT line_item_id, sale_id, product_id, quantity, unit_price, discount, total "
+        "FROM sale_line_items_partitioned"
+    )
+    op.drop_table('sale_line_items_partitioned')
+    op.drop_table('sales_partitioned')
+    op.execute("ALTER SEQUENCE sales_sale_id_seq OWNED BY sales.sale_id")
+    op.execute("ALTER SEQUENCE sale_line_items_line_item_id_seq OWNED BY sale_line_items.line_item_id")
+
+    op.execute("ALTER TABLE sales ADD CONSTRAINT sales_pkey PRIMARY KEY (sale_id)")
+    op.execute("ALTER TABLE sale_line_items ADD CONSTRAINT sale_line_items_pkey PRIMARY KEY (line_item_id)")
+    _add_sales_constraints('store_id, receipt_seq')
+    op.execute("ALTER TABLE sale_line_items ADD CONSTRAINT sale_line_items_sale_id_fkey "
+               "FOREIGN KEY (sale_id) REFERENCES sales (sale_id)")
+    op.execute("ALTER TABLE loyalty_ledger ADD CONSTRAINT loyalty_ledger_sale_id_fkey "
+               "FOREIGN KEY (sale_id) REFERENCES sales (sale_id)")
@@ -0,0 +1,48 @@
+"""stock transfers
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0014'
+down_revision: Union[str, None] = '0013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'stock_transfers',
+        sa.Column('transfer_id', sa.Integer(), nullable=False),
+        sa.Column('from_store_id', sa.Integer(), nullable=False),
+        sa.Column('to_store_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('item_count', sa.Integer(), nullable=False),
+        sa.Column('total_quantity', sa.Float(), nullable=False),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['from_store_id'], ['stores.store_id']),
+        sa.ForeignKeyConstraint(['to_store_id'], ['stores.store_id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.user_id']),
+        sa.PrimaryKeyConstraint('transfer_id')
+    )
+    op.create_index(op.f('ix_stock_transfers_transfer_id'), 'stock_transfers', ['transfer_id'], unique=False)
+    with op.batch_alter_table('transactions') as batch_op:
+        batch_op.add_column(sa.Column('store_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_transactions_store_id_stores', 'stores', ['store_id'], ['store_id'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('transactions') as batch_op:
+        batch_op.drop_constraint('fk_transactions_store_id_stores', type_='foreignkey')
+        batch_op.drop_column('store_id')
+    op.drop_index(op.f('ix_stock_transfers_transfer_id'), table_name='stock_transfers')
+    op.drop_table('stock_transfers')
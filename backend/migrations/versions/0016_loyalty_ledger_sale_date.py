@@ -0,0 +1,27 @@
+"""loyalty ledger sale date
+
+Revision ID: 0016
+Revises: 0015
+Create Date: 2026-10-19 23:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0016'
+down_revision: Union[str, None] = '0015'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing entries keep falling back to created_at when folded
+    op.add_column('loyalty_ledger', sa.Column('sale_date', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('loyalty_ledger', 'sale_date')
@@ -9,16 +9,21 @@ export const API_ENDPOINTS = {
   PRODUCTS: '/products',
   PRODUCT_BY_ID: (id) => `/products/${id}`,
   PRODUCT_BY_BARCODE: (barcode) => `/products/barcode/${barcode}`,
+  PRODUCT_CHANGES: '/products/changes',
   
   // Inventory
   INVENTORY: '/inventory',
   INVENTORY_LOW_STOCK: '/inventory/low-stock',
   INVENTORY_EXPIRY_RISK: '/inventory/expiry-risk',
   INVENTORY_ADJUST: '/inventory/adjust',
+  INVENTORY_TRANSFERS: '/inventory/transfers',
+  INVENTORY_STREAM: '/inventory/stream',
   
   // Sales
   SALES: '/sales',
   SALE_BY_ID: (id) => `/sales/${id}`,
+  SALE_RECEIPT_PDF: (id) => `/sales/${id}/receipt.pdf`,
+  SALES_RECEIPTS_ZIP: '/sales/receipts.zip',
   
   // Customers
   CUSTOMERS: '/customers',
@@ -36,6 +41,7 @@ export const API_ENDPOINTS = {
   ANALYTICS_INVENTORY_METRICS: '/analytics/inventory-metrics',
   ANALYTICS_DAILY_SALES: '/analytics/daily-sales',
   ANALYTICS_CUSTOMER_INSIGHTS: '/analytics/customer-insights',
+  ANALYTICS_CUSTOMER_SEGMENTS: '/analytics/customer-segments',
 };
 
 export const UserRole = {
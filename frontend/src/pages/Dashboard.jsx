@@ -51,6 +51,12 @@ const Dashboard = () => {
 
   useEffect(() => {
     loadDashboardData();
+    // Low-stock list and metrics only change when an item crosses its reorder level
+    return inventoryService.subscribeStock(({ changes }) => {
+      if (changes.some((change) => change.crossed)) {
+        loadDashboardData();
+      }
+    });
   }, []);
 
   const loadDashboardData = async () => {
@@ -33,6 +33,14 @@ const Inventory = () => {
 
   useEffect(() => {
     loadInventory();
+    // Patch rows in place as stock moves instead of re-fetching the list
+    return inventoryService.subscribeStock(({ store_id, changes }) => {
+      const byProduct = new Map(changes.map((change) => [change.product_id, change]));
+      setInventory((rows) => rows.map((row) => {
+        const change = row.store_id === store_id && byProduct.get(row.product_id);
+        return change ? { ...row, quantity: change.quantity, reorder_level: change.reorder_level } : row;
+      }));
+    });
   }, []);
 
   const loadInventory = async () => {
@@ -10,7 +10,10 @@ import {
   TableHead,
   TableRow,
   Chip,
+  IconButton,
+  Tooltip,
 } from '@mui/material';
+import { Print } from '@mui/icons-material';
 import { saleService } from '../services/saleService';
 import { format } from 'date-fns';
 
@@ -23,13 +26,24 @@ const Sales = () => {
 
   const loadSales = async () => {
     try {
-      const data = await saleService.getSales();
+      const data = await saleService.getSales({ include: 'summary' });
       setSales(data);
     } catch (error) {
       console.error('Error loading sales:', error);
     }
   };
 
+  const printReceipt = async (saleId) => {
+    try {
+      const pdf = await saleService.getReceiptPdf(saleId);
+      const url = URL.createObjectURL(pdf);
+      window.open(url, '_blank');
+      setTimeout(() => URL.revokeObjectURL(url), 60000);
+    } catch (error) {
+      console.error('Error loading receipt:', error);
+    }
+  };
+
   const getPaymentMethodColor = (method) => {
     const colors = {
       cash: 'success',
@@ -58,6 +72,7 @@ const Sales = () => {
                 <TableCell align="right">Final Amount</TableCell>
                 <TableCell>Payment Method</TableCell>
                 <TableCell align="right">Items</TableCell>
+                <TableCell />
               </TableRow>
             </TableHead>
             <TableBody>
@@ -79,7 +94,14 @@ const Sales = () => {
                       size="small"
                     />
                   </TableCell>
-                  <TableCell align="right">{sale.line_items?.length || 0}</TableCell>
+                  <TableCell align="right">{sale.item_count}</TableCell>
+                  <TableCell align="right">
+                    <Tooltip title="Print receipt">
+                      <IconButton size="small" onClick={() => printReceipt(sale.sale_id)}>
+                        <Print fontSize="small" />
+                      </IconButton>
+                    </Tooltip>
+                  </TableCell>
                 </TableRow>
               ))}
             </TableBody>
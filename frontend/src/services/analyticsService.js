@@ -28,8 +28,15 @@ export const analyticsService = {
     return response.data;
   },
 
-  getCustomerInsights: async (limit = 10) => {
-    const response = await api.get(API_ENDPOINTS.ANALYTICS_CUSTOMER_INSIGHTS, { params: { limit } });
+  getCustomerInsights: async (limit = 10, segment = null, offset = 0) => {
+    const params = { limit, offset };
+    if (segment) params.segment = segment;
+    const response = await api.get(API_ENDPOINTS.ANALYTICS_CUSTOMER_INSIGHTS, { params });
+    return response.data;
+  },
+
+  getCustomerSegments: async () => {
+    const response = await api.get(API_ENDPOINTS.ANALYTICS_CUSTOMER_SEGMENTS);
     return response.data;
   },
 };
@@ -26,7 +26,14 @@ api.interceptors.request.use(
 api.interceptors.response.use(
   (response) => response,
   (error) => {
-    if (error.response?.status === 401) {
+    const { config, response } = error;
+    // Reads turned away by rate limiting are retried once after Retry-After
+    if (response?.status === 429 && config?.method === 'get' && !config.retried) {
+      const seconds = Math.min(Number(response.headers['retry-after']) || 1, 10);
+      config.retried = true;
+      return new Promise((resolve) => setTimeout(resolve, seconds * 1000)).then(() => api(config));
+    }
+    if (response?.status === 401) {
       // Token expired or invalid
       localStorage.removeItem('access_token');
       localStorage.removeItem('refresh_token');
@@ -1,11 +1,21 @@
 import api from './api';
-import { API_ENDPOINTS } from '../constants/api';
+import { API_BASE_URL, API_ENDPOINTS } from '../constants/api';
 
 export const inventoryService = {
-  getInventory: async (storeId = null) => {
-    const params = storeId ? { store_id: storeId } : {};
-    const response = await api.get(API_ENDPOINTS.INVENTORY, { params });
-    return response.data;
+  getInventory: async (storeId = null, filters = {}) => {
+    // Follow X-Next-Cursor to the last page. Each page carries an ETag, so the
+    // browser cache revalidates unchanged pages with a 304 instead of a download.
+    const items = [];
+    let cursor = null;
+    do {
+      const params = { ...filters };
+      if (storeId) params.store_id = storeId;
+      if (cursor) params.cursor = cursor;
+      const response = await api.get(API_ENDPOINTS.INVENTORY, { params });
+      items.push(...response.data);
+      cursor = response.headers['x-next-cursor'];
+    } while (cursor);
+    return items;
   },
 
   getLowStockItems: async (storeId = null) => {
@@ -19,8 +29,26 @@ export const inventoryService = {
     return response.data;
   },
 
+  // Live stock changes for a store (defaults to the user's store). onChanges
+  // receives { store_id, changes: [{ product_id, quantity, reorder_level,
+  // low_stock, crossed }] }. Returns a function that closes the stream.
+  subscribeStock: (onChanges, storeId = null) => {
+    const params = new URLSearchParams({ token: localStorage.getItem('access_token') || '' });
+    if (storeId) params.set('store_id', storeId);
+    const source = new EventSource(`${API_BASE_URL}${API_ENDPOINTS.INVENTORY_STREAM}?${params}`);
+    source.addEventListener('stock', (event) => onChanges(JSON.parse(event.data)));
+    return () => source.close();
+  },
+
   adjustInventory: async (adjustmentData) => {
     const response = await api.post(API_ENDPOINTS.INVENTORY_ADJUST, adjustmentData);
     return response.data;
   },
+
+  // Move many products between stores in one transaction:
+  // { from_store_id, to_store_id, items: [{ product_id, quantity }], notes }
+  createTransfer: async (transferData) => {
+    const response = await api.post(API_ENDPOINTS.INVENTORY_TRANSFERS, transferData);
+    return response.data;
+  },
 };
@@ -32,6 +32,15 @@ export const productService = {
     return response.data;
   },
 
+  // Delta sync for a local catalog copy: page with the returned cursor while
+  // has_more, then keep `version` as the next `since`
+  getCatalogChanges: async (since = 0, cursor = null) => {
+    const params = { since };
+    if (cursor) params.cursor = cursor;
+    const response = await api.get(API_ENDPOINTS.PRODUCT_CHANGES, { params });
+    return response.data;
+  },
+
   searchProducts: async (query) => {
     const response = await api.get(API_ENDPOINTS.PRODUCTS, { params: { search: query } });
     return response.data;
@@ -16,4 +16,16 @@ export const saleService = {
     const response = await api.get(API_ENDPOINTS.SALE_BY_ID(id));
     return response.data;
   },
+
+  getReceiptPdf: async (id) => {
+    const response = await api.get(API_ENDPOINTS.SALE_RECEIPT_PDF(id), { responseType: 'blob' });
+    return response.data;
+  },
+
+  getReceiptsZip: async (startDate, endDate, storeId = null) => {
+    const params = { start_date: startDate, end_date: endDate };
+    if (storeId) params.store_id = storeId;
+    const response = await api.get(API_ENDPOINTS.SALES_RECEIPTS_ZIP, { params, responseType: 'blob' });
+    return response.data;
+  },
 };